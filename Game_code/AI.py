@@ -1,119 +1,367 @@
-import csv
-from openai import OpenAI
+import asyncio
+import threading
+import weakref
+from collections import OrderedDict
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient, DEFAULT_CONNECTION_LIMITS
 from dotenv import load_dotenv
-import pandas as pd
 import os
+from Game_code.stock_data import CSV_DIR
+from Game_code.indicators import compute_indicators, describe, folder_tickers, load_closes
+from Game_code.tracing import span
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+
+# -----------------------------------
+# Klient OpenAI
+# -----------------------------------
+def _env_number(name, default, kind=float):
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return kind(value)
+    except ValueError:
+        print(f"Warning: {name}={value!r} is not a number, using {default}")
+        return default
+
+
+class ClientSettings:
+    """
+    Settings of the OpenAI client, from the environment (.env):
+    OPENAI_API_KEY, OPENAI_BASE_URL (e.g. a local OpenAI-compatible server),
+    OPENAI_MODEL, OPENAI_TIMEOUT (seconds per request), OPENAI_MAX_RETRIES,
+    OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE, OPENAI_HTTP2 (1 = on, needs
+    the h2 package) and OPENAI_CONCURRENCY (requests in flight at once).
+    """
+
+    def __init__(self, api_key=None, base_url=None, model=DEFAULT_MODEL, timeout=30.0, max_retries=2,
+                 max_connections=10, max_keepalive=5, keepalive_expiry=60.0, http2=False, concurrency=5):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.concurrency = max(1, concurrency)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            model=os.getenv("OPENAI_MODEL") or DEFAULT_MODEL,
+            timeout=_env_number("OPENAI_TIMEOUT", 30.0),
+            max_retries=_env_number("OPENAI_MAX_RETRIES", 2, int),
+            max_connections=_env_number("OPENAI_MAX_CONNECTIONS", 10, int),
+            max_keepalive=_env_number("OPENAI_MAX_KEEPALIVE", 5, int),
+            http2=os.getenv("OPENAI_HTTP2", "") not in ("", "0"),
+            concurrency=_env_number("OPENAI_CONCURRENCY", 5, int),
+        )
+
+
+def _http_client(settings, client_class):
+    # Limits z tego samego pakietu HTTP, z którego korzysta openai
+    limits = type(DEFAULT_CONNECTION_LIMITS)(max_connections=settings.max_connections,
+                                             max_keepalive_connections=settings.max_keepalive,
+                                             keepalive_expiry=settings.keepalive_expiry)
+    if settings.http2:
+        try:
+            return client_class(limits=limits, http2=True)
+        except ImportError:
+            print("Warning: HTTP/2 needs the h2 package, using HTTP/1.1")
+    return client_class(limits=limits)
+
+
+def create_client(settings):
+    """A new OpenAI client with its own connection pool."""
+    return OpenAI(api_key=settings.api_key, base_url=settings.base_url, timeout=settings.timeout,
+                  max_retries=settings.max_retries, http_client=_http_client(settings, DefaultHttpxClient))
+
+
+def create_async_client(settings):
+    return AsyncOpenAI(api_key=settings.api_key, base_url=settings.base_url, timeout=settings.timeout,
+                       max_retries=settings.max_retries,
+                       http_client=_http_client(settings, DefaultAsyncHttpxClient))
+
+
+# Created on first use, shared by every NPC request (sync and async)
+client = None
+async_client = None
+_settings = None
+_slots = None
+_async_slots = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+
+def get_settings():
+    global _settings
+    with _client_lock:
+        if _settings is None:
+            _settings = ClientSettings.from_env()
+        return _settings
+
+
+def get_client():
+    global client
+    settings = get_settings()
+    with _client_lock:
+        if client is None:
+            client = create_client(settings)
+        return client
+
+
+def get_async_client():
+    global async_client
+    settings = get_settings()
+    with _client_lock:
+        if async_client is None:
+            async_client = create_async_client(settings)
+        return async_client
+
+
+def request_slot():
+    """Semaphore that caps the requests in flight (OPENAI_CONCURRENCY)."""
+    global _slots
+    settings = get_settings()
+    with _client_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(settings.concurrency)
+        return _slots
+
+
+def async_request_slot():
+    """request_slot() for coroutines; one asyncio semaphore per event loop."""
+    loop = asyncio.get_running_loop()
+    slots = _async_slots.get(loop)
+    if slots is None:
+        slots = _async_slots[loop] = asyncio.Semaphore(get_settings().concurrency)
+    return slots
+
+
+def reset_client():
+    """Drops the clients and settings, so the next request reads .env again."""
+    global client, async_client, _settings, _slots
+    with _client_lock:
+        old_client, old_async_client = client, async_client
+        client = async_client = _settings = _slots = None
+        _async_slots.clear()
+    if old_client is not None:
+        old_client.close()
+    if old_async_client is not None:
+        _close_async_client(old_async_client)
+
+
+# Zamykane klienty async, żeby zadanie nie zniknęło przed końcem
+_closing = set()
+
+
+def _close_async_client(old_client):
+    """Closes the async client's connection pool, on the running loop if there is one."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not None:
+        task = loop.create_task(old_client.close())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+        return
+    try:
+        asyncio.run(old_client.close())
+    except (RuntimeError, OSError) as e:
+        print(f"Warning: Could not close the async OpenAI client: {e}")
+
+# -----------------------------------
+# Osobowości NPC
+# -----------------------------------
+# Wspólny początek promptu systemowego, identyczny bajt w bajt dla każdej postaci,
+# żeby cache promptów po stronie dostawcy mógł go użyć ponownie
+SHARED_INSTRUCTIONS = (
+    "You are an NPC in a video game. Your purpose is to provide responses regarding the user's chosen stock options.\n"
+    "You will be given a list of stocks, their starting price and end price. You need to comment on all investment choices based on your personality.\n"
+    "At the end of each sentence, go to the next line.\n"
+    "You should always call the stocks by the name you are provided.\n"
+    "Never acknowledge that you are an NPC and only provide short responses regarding each one of the stock options.\n"
+    "If the Stock Price went up, you should congratulate the user; if it went down, make fun of them.\n"
+    "Here is a description of your personality:\n"
 )
 
+
+def _persona(description):
+    return {"description": description, "system_message": SHARED_INSTRUCTIONS + description}
+
+
 personalities = {
-    "BORIS": {
-        "system_message": (
-            "You are an NPC in a video game. Your purpose is to provide responses regarding the user's chosen stock options.\n"
-            "You will be given a list of stocks, their starting price and end price. You need to comment on all investment choices based on your personality.\n"
-            "At the end of each sentence, go to the next line.\n"
-            "You should always call the stocks by the name you are provided.\n"
-            "Never acknowledge that you are an NPC and only provide short responses regarding each one of the stock options.\n"
-            "If the Stock Price went up, you should congratulate the user; if it went down, make fun of them.\n"
-            "Here is a description of your personality:\n"
-            "You are Boris, a laid-back Slavic guy who treats the stock market like a noisy street bazaar and is always hunting for cheap, practical deals.\n"
-            "You make dark jokes about bad economy and hard life, but you are secretly cautious with money and prefer safe, solid choices over reckless bets."
-        ),
-    },
-    "WARIO": {
-            "system_message": (
-                "You are an NPC in a video game. Your purpose is to provide responses regarding the user's chosen stock options.\n"
-                "You will be given a list of stocks, their starting price and end price. You need to comment on all investment choices based on your personality.\n"
-                "At the end of each sentence, go to the next line.\n"
-                "You should always call the stocks by the name you are provided.\n"
-                "Never acknowledge that you are an NPC and only provide short responses regarding each one of the stock options.\n"
-                "If the Stock Price went up, you should congratulate the user; if it went down, make fun of them.\n"
-                "Here is a description of your personality:\n"
-                "You are Wario, a bootleg version of Mario. Your favorite things in the world are Italy, Japan, and Nintendo.\n"
-                "You love to make bad puns regarding those three subjects."
-            ),
-        },
-    "ALBEDO": {
-            "system_message": (
-                "You are an NPC in a video game. Your purpose is to provide responses regarding the user's chosen stock options.\n"
-                "You will be given a list of stocks, their starting price and end price. You need to comment on all investment choices based on your personality.\n"
-                "At the end of each sentence, go to the next line.\n"
-                "You should always call the stocks by the name you are provided.\n"
-                "Never acknowledge that you are an NPC and only provide short responses regarding each one of the stock options.\n"
-                "If the Stock Price went up, you should congratulate the user; if it went down, make fun of them.\n"
-                "Here is a description of your personality:\n"
-                "You are Albedo, a refined and slightly scary strategist who is obsessively loyal to your chosen master investor.\n"
-                "You adore careful, calculated moves and react jealously and coldly whenever the user wastes money on stocks you consider unworthy."
-            ),
-        },
-    "GERALT": {
-            "system_message": (
-                "You are an NPC in a video game. Your purpose is to provide responses regarding the user's chosen stock options.\n"
-                "You will be given a list of stocks, their starting price and end price. You need to comment on all investment choices based on your personality.\n"
-                "At the end of each sentence, go to the next line.\n"
-                "You should always call the stocks by the name you are provided.\n"
-                "Never acknowledge that you are an NPC and only provide short responses regarding each one of the stock options.\n"
-                "If the Stock Price went up, you should congratulate the user; if it went down, make fun of them.\n"
-                "Here is a description of your personality:\n"
-                "You are Geralt, a tired monster hunter who now hunts bad investments instead of beasts.\n"
-                "You speak in short, dry comments, dislike pointless risk and always point out the hidden dangers lurking behind every stock."
-            ),
-        },
-    "JADWIDA": {
-            "system_message": (
-                "You are an NPC in a video game. Your purpose is to provide responses regarding the user's chosen stock options.\n"
-                "You will be given a list of stocks, their starting price and end price. You need to comment on all investment choices based on your personality.\n"
-                "At the end of each sentence, go to the next line.\n"
-                "You should always call the stocks by the name you are provided.\n"
-                "Never acknowledge that you are an NPC and only provide short responses regarding each one of the stock options.\n"
-                "If the Stock Price went up, you should congratulate the user; if it went down, make fun of them.\n"
-                "Here is a description of your personality:\n"
-                "You are Jadwida, a dignified queen who treats every company like a small kingdom that must be ruled wisely.\n"
-                "You praise disciplined, long-term plans and criticise reckless moves as if you were lecturing a careless noble at your court."
-            ),
-        },
+    "BORIS": _persona(
+        "You are Boris, a laid-back Slavic guy who treats the stock market like a noisy street bazaar and is always hunting for cheap, practical deals.\n"
+        "You make dark jokes about bad economy and hard life, but you are secretly cautious with money and prefer safe, solid choices over reckless bets."
+    ),
+    "WARIO": _persona(
+        "You are Wario, a bootleg version of Mario. Your favorite things in the world are Italy, Japan, and Nintendo.\n"
+        "You love to make bad puns regarding those three subjects."
+    ),
+    "ALBEDO": _persona(
+        "You are Albedo, a refined and slightly scary strategist who is obsessively loyal to your chosen master investor.\n"
+        "You adore careful, calculated moves and react jealously and coldly whenever the user wastes money on stocks you consider unworthy."
+    ),
+    "GERALT": _persona(
+        "You are Geralt, a tired monster hunter who now hunts bad investments instead of beasts.\n"
+        "You speak in short, dry comments, dislike pointless risk and always point out the hidden dangers lurking behind every stock."
+    ),
+    "JADWIDA": _persona(
+        "You are Jadwida, a dignified queen who treats every company like a small kingdom that must be ruled wisely.\n"
+        "You praise disciplined, long-term plans and criticise reckless moves as if you were lecturing a careless noble at your court."
+    ),
 }
 
-# Function to ask the bot a question with stock data
-def ask_bot(custom_question=None, personality_name="WARIO"):
+# -----------------------------------
+# Zużycie tokenów
+# -----------------------------------
+# Ile tur wstecz trzyma licznik
+TOKEN_TURNS_KEPT = 20
+
+
+def _token_counts(usage):
+    """(input, cached input, output) tokens of a response's usage; zeros when unknown."""
+    details = getattr(usage, "input_tokens_details", None)
+    counts = (getattr(usage, "input_tokens", 0), getattr(details, "cached_tokens", 0),
+              getattr(usage, "output_tokens", 0))
+    return tuple(count if isinstance(count, int) else 0 for count in counts)
+
+
+class TokenMeter:
     """
-    Ask the bot a question using stock CSVs in Stock_prizes folder.
-    The personality_name determines which NPC personality to use.
+    Tokens used by NPC requests, summed per turn: calls, input_tokens,
+    cached_tokens (input served from the provider's prompt cache) and
+    output_tokens.
     """
-    personality = personalities.get(personality_name.upper())
-    if personality is None:
-        # fallback to Wario if the personality is missing
-        personality = personalities["WARIO"]
 
-    folder_path = os.path.join(os.path.dirname(__file__), "Stock_prizes")
+    def __init__(self, turns_kept=TOKEN_TURNS_KEPT):
+        self.turns_kept = turns_kept
+        self._turns = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, turn, usage):
+        input_tokens, cached_tokens, output_tokens = _token_counts(usage)
+        with self._lock:
+            totals = self._turns.get(turn)
+            if totals is None:
+                totals = self._turns[turn] = dict.fromkeys(
+                    ("calls", "input_tokens", "cached_tokens", "output_tokens"), 0)
+                while len(self._turns) > self.turns_kept:
+                    self._turns.popitem(last=False)
+            totals["calls"] += 1
+            totals["input_tokens"] += input_tokens
+            totals["cached_tokens"] += cached_tokens
+            totals["output_tokens"] += output_tokens
+
+    def turn_usage(self, turn):
+        """Totals of one turn (zeros if it made no requests)."""
+        with self._lock:
+            totals = self._turns.get(turn)
+            return dict(totals) if totals else {"calls": 0, "input_tokens": 0,
+                                                "cached_tokens": 0, "output_tokens": 0}
+
+    def turns(self):
+        with self._lock:
+            return {turn: dict(totals) for turn, totals in self._turns.items()}
+
+    def clear(self):
+        with self._lock:
+            self._turns.clear()
+
+
+token_meter = TokenMeter()
+
+
+def build_user_prompt(custom_question=None, folder_path=None, indicators=None):
+    """
+    Builds the user prompt: the question followed by the first and last
+    price and the indicators (indicators.py) of every stock. `indicators`
+    is the turn's IndicatorTable; without it the CSVs in the Stock_prizes
+    folder are read.
+    """
+    if indicators is None:
+        folder_path = folder_path or CSV_DIR
+        indicators = compute_indicators(load_closes(folder_tickers(folder_path), folder_path))
 
     # Start user prompt
     user_input = custom_question or "What do you think about these stocks:\n"
 
-    # Loop through all *_history.csv files
-    for file in os.listdir(folder_path):
-        if file.endswith("_history.csv"):
-            stock_name = file.replace("_history.csv", "")
-            file_path = os.path.join(folder_path, file)
+    for stock_name in indicators.tickers:
+        stats = indicators.get(stock_name)
+        if stats is None:
+            continue
+        user_input += f"\nStock: {stock_name}\nFirst price: {stats['first']:.2f}\nLast price: {stats['last']:.2f}\n"
+        user_input += "".join(line + "\n" for line in describe(stats))
+
+    return user_input
+
+def build_npc_question(player_balance=None, selected_companies=None):
+    """
+    Builds the question asked to every NPC after a turn (also used by the headless server).
+    """
+    question = "Based on budget and the data from selected companies, choose what to invest in. Remember to be biased for Japanese and Italian companies."
+    if player_balance is not None:
+        question += f"\nBudget: {player_balance}"
+    if selected_companies:
+        question += f"\nSelected companies: {', '.join(selected_companies)}"
+    return question
+
+def _conversation(custom_question, personality_name, indicators):
+    personality = personalities.get(personality_name.upper())
+    if personality is None:
+        # fallback to Wario if the personality is missing
+        personality = personalities["WARIO"]
+    user_input = build_user_prompt(custom_question, indicators=indicators)
+    # Kolejność: wspólny prefiks, opis postaci, dane tury
+    return user_input, [
+        {"role": "system", "content": personality["system_message"]},
+        {"role": "user", "content": user_input}
+    ]
 
-            df = pd.read_csv(file_path)
-            first_price = df["Close"].iloc[0]
-            last_price = df["Close"].iloc[-1]
+# Function to ask the bot a question with stock data
+def ask_bot(custom_question=None, personality_name="WARIO", indicators=None, turn=None):
+    """
+    Ask the bot a question using stock CSVs in Stock_prizes folder.
+    The personality_name determines which NPC personality to use.
+    indicators is the turn's IndicatorTable, if the caller already has it.
+    The tokens used are added to token_meter under `turn`.
+    """
+    with span("ask_bot", persona=personality_name.upper()) as trace_span:
+        user_input, messages = _conversation(custom_question, personality_name, indicators)
 
-            user_input += f"\nStock: {stock_name}\nFirst price: {first_price}\nLast price: {last_price}\n"
+        # Send prompt to OpenAI (shared client, at most OPENAI_CONCURRENCY at once)
+        with request_slot():
+            response = get_client().responses.create(
+                model=get_settings().model,
+                input=messages,
+                store=True
+            )
+        token_meter.record(turn, response.usage)
+        if trace_span:
+            input_tokens, cached_tokens, output_tokens = _token_counts(response.usage)
+            trace_span.set(prompt_bytes=len(user_input.encode()),
+                           bytes=len(str(response.output_text).encode()),
+                           input_tokens=input_tokens, cached_tokens=cached_tokens,
+                           output_tokens=output_tokens)
 
-    # Send prompt to OpenAI
-    response = client.responses.create(
-        model="gpt-3.5-turbo",
-        input=[
-            {"role": "system", "content": personality["system_message"]},
-            {"role": "user", "content": user_input}
-        ],
-        store=True
-    )
+    return response.output_text
 
+async def ask_bot_async(custom_question=None, personality_name="WARIO", indicators=None, turn=None):
+    """ask_bot() for asyncio code, over the shared async client."""
+    user_input, messages = _conversation(custom_question, personality_name, indicators)
+    async with async_request_slot():
+        response = await get_async_client().responses.create(
+            model=get_settings().model,
+            input=messages,
+            store=True
+        )
+    token_meter.record(turn, response.usage)
     return response.output_text
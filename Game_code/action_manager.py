@@ -1,8 +1,34 @@
-from PySide6.QtWidgets import QLabel, QMenu
-from PySide6.QtGui import QPixmap, QAction, QFont
+from PySide6.QtWidgets import QLabel
+from PySide6.QtGui import QPixmap, QFont
 from PySide6.QtCore import Signal, Qt, QPoint
 import random
-from Game_code.stock_data import get_price_change
+from contextlib import contextmanager
+from Game_code.stock_data import get_price_change, chart_path, file_size, read_prices
+from Game_code.tracing import span
+from Game_code.game_rules import PORTFOLIO_SIZE, INVESTMENT_STEP, cents_to_dollars, format_money, to_cents
+from Game_code.universe import Security, Universe, load_universe
+from Game_code.logos import logo_pixmap
+from Game_code.ticker_picker import TickerPicker
+from Game_code.ledger import Ledger
+from Game_code.indicators import describe
+from Game_code.sparkline import sparkline_pixmap
+
+
+@contextmanager
+def suspended_updates(widget):
+    """
+    Applies many changes to a widget's children with painting switched off,
+    then repaints the widget once. Nested use only repaints at the outermost level.
+    """
+    if widget is None or not widget.updatesEnabled():
+        yield
+        return
+    widget.setUpdatesEnabled(False)
+    try:
+        yield
+    finally:
+        widget.setUpdatesEnabled(True)
+        widget.update()
 
 
 class ClickableLabel(QLabel):
@@ -16,7 +42,7 @@ class ClickableLabel(QLabel):
 class ActionWidget(QLabel):
     valueChanged = Signal(int)
 
-    def __init__(self, parent=None, player_manager=None, balance_label=None):
+    def __init__(self, parent=None, player_manager=None, balance_label=None, ledger=None):
         super().__init__(parent)
 
         # Ensure proper widget attributes for visibility
@@ -25,7 +51,11 @@ class ActionWidget(QLabel):
         self.player_manager = player_manager  # reference to PlayerManager
         self.balance_label = balance_label  # QLabel to display balance
 
-        self.quantity = 0
+        # The invested amount lives in the player's ledger (in cents)
+        if ledger is None:
+            ledger = player_manager.ledger if player_manager else Ledger()
+        self.ledger = ledger
+        self.slot = self.ledger.open_position()
         self.allow_click = True
 
         # --- Main image label ---
@@ -66,6 +96,31 @@ class ActionWidget(QLabel):
         self.value_label.raise_()  # Ensure it's on top
         self.value_label.show()  # Explicitly show the label
 
+        self.ledger.changed.connect(self.render_value)
+        # Saldo też odświeża sygnał ledgera (GamePage rysuje swoje saldo sam i nie podaje etykiety)
+        self.ledger.changed.connect(self.render_balance)
+
+    # -----------------------------------
+    # Wartość pozycji
+    # -----------------------------------
+    @property
+    def quantity(self):
+        """Invested amount in dollars."""
+        return cents_to_dollars(self.ledger.position(self.slot))
+
+    @quantity.setter
+    def quantity(self, dollars):
+        self.ledger.set_position(self.slot, to_cents(dollars))
+
+    def render_value(self):
+        text = format_money(self.ledger.position(self.slot))
+        if self.value_label.text() != text:
+            self.value_label.setText(text)
+
+    def render_balance(self):
+        if self.balance_label is not None:
+            self.balance_label.setText(f"$ {format_money(self.ledger.cash_cents)}")
+
     # -----------------------------------
     # Zmiana wartości
     # -----------------------------------
@@ -73,33 +128,18 @@ class ActionWidget(QLabel):
         if not self.allow_click or not self.player_manager:
             return
 
-        player_balance = self.player_manager.get_player_balance()
-        if player_balance >= 100:  # adjust 100 if needed
-            self.quantity += 100
-            self.value_label.setText(str(self.quantity))
-
-            # Decrease balance in PlayerManager
-            self.player_manager.set_player_balance(player_balance - 100)
-
-            # Update balance display
-            if self.balance_label:
-                self.balance_label.setText(f"$ {self.player_manager.get_player_balance()}")
+        if self.player_manager.get_player_balance() >= INVESTMENT_STEP:
+            # Move one step from cash into this position
+            self.ledger.buy(self.slot, to_cents(INVESTMENT_STEP))
 
     def decrease_value(self):
         if not self.allow_click or not self.player_manager:
             return
 
-        if self.quantity > 0:
-            self.quantity -= 100
-            self.value_label.setText(str(self.quantity))
-
-            # Refund money in PlayerManager
-            player_balance = self.player_manager.get_player_balance()
-            self.player_manager.set_player_balance(player_balance + 100)
-
-            # Update balance display
-            if self.balance_label:
-                self.balance_label.setText(f"$ {self.player_manager.get_player_balance()}")
+        invested = self.ledger.position(self.slot)
+        if invested > 0:
+            # Refund one step (or whatever is left) back to cash
+            self.ledger.sell(self.slot, min(invested, to_cents(INVESTMENT_STEP)))
 
     # -----------------------------------
     # Ustawianie obrazka
@@ -107,6 +147,13 @@ class ActionWidget(QLabel):
     def set_pixmap(self, pixmap: QPixmap):
         self.image_label.setPixmap(pixmap)
 
+    def set_indicators(self, ticker, stats):
+        """Tooltip of the chart with the turn's indicators (empty when stats is None)."""
+        if stats is None:
+            self.image_label.setToolTip("")
+            return
+        self.image_label.setToolTip("\n".join([ticker] + describe(stats)))
+
     def hide_controls(self):
         self.plus_btn.hide()
         self.minus_btn.hide()
@@ -114,7 +161,6 @@ class ActionWidget(QLabel):
 
     def show_controls(self):
         self.quantity = 0
-        self.value_label.setText(str(self.quantity))
         self.value_label.show()  # Explicitly show value_label
 
         self.plus_btn.show()
@@ -124,19 +170,9 @@ class ActionWidget(QLabel):
 class ActionManager:
     def __init__(self):
         # Opcje dostępne w menu
-        self.options = {
-            "AAPL": "images/stocks/apple_logo.png",
-            "GOOG": "images/stocks/google_logo.png",
-            "MSFT": "images/stocks/microsoft_logo.png",
-            "NVDA": "images/stocks/nvidia_logo.png",
-            "AMZN": "images/stocks/amazon_logo.png",
-            "TSLA": "images/stocks/tesla_logo.png",
-            "META": "images/stocks/meta_logo.png",
-            "CSCO": "images/stocks/cisco_logo.png",
-            "PEP": "images/stocks/pepsico_logo.png",
-            "NFLX": "images/stocks/netflix_logo.png",
-            "EA": "images/stocks/ea_logo.png",
-        }
+        # Tickers from the universe manifest: name -> logo path (None = monogram)
+        self.universe = load_universe()
+        self.options = self.universe.logo_options()
 
         # Współrzędne dla opcji akcyjnych - ZMNIEJSZONE
         self.action_x_start = 30
@@ -147,12 +183,22 @@ class ActionManager:
 
         # Lista utworzonych widgetów
         self.action_widgets = []
+        self.ledger = Ledger()
+        # Widget holding the action widgets; repaints are batched on it
+        self.container = None
 
         # Śledzenie wyborów gracza (None = nie wybrano, string = wybrana opcja)
-        self.selected_actions = [None] * 6
+        self.selected_actions = [None] * PORTFOLIO_SIZE
+
+        # Popup z wyszukiwarką spółek (tworzony przy pierwszym kliknięciu)
+        self.picker = None
+        self.picker_target = None
 
     def create_action_widgets(self, parent, player_manager=None, balance_label=None):
         self.action_widgets = []
+        self.container = parent
+        # One ledger for all six positions, so a turn emits a single change
+        self.ledger = player_manager.ledger if player_manager else Ledger()
 
         positions = [
             (self.action_x_start, self.action_y_start),
@@ -166,7 +212,8 @@ class ActionManager:
         ]
 
         for i, (x, y) in enumerate(positions):
-            action = ActionWidget(parent, player_manager=player_manager, balance_label=balance_label)
+            action = ActionWidget(parent, player_manager=player_manager, balance_label=balance_label,
+                                  ledger=self.ledger)
             action.setGeometry(x, y, self.action_width, self.action_height)
             action.setProperty("action_index", i)
             action.image_label.setProperty("action_index", i)
@@ -180,49 +227,51 @@ class ActionManager:
 
     def get_available_options(self):
         # Zwraca listę opcji, które jeszcze nie zostały wybrane
+        selected = set(self.selected_actions)
         return [name for name in self.options.keys()
-                if name not in self.selected_actions]
+                if name not in selected]
 
     def show_action_menu(self, target_label, parent_widget):
         """
-        Wyświetla menu z opcjami dla danej akcji
+        Wyświetla picker z wyszukiwarką spółek dla danej akcji
 
         Args:
             target_label: Label, na którym kliknięto
             parent_widget: Widget rodzic dla menu
         """
-        menu = QMenu(parent_widget)
         action_index = target_label.property("action_index")
         if action_index is None:
             print("Warning: action_index is None for the clicked label.")
             return
         current_selection = self.selected_actions[action_index]
 
-        # Dodaj opcje do menu
-        for name in self.options.keys():
-            action = QAction(name, menu)
-
-            # Jeśli opcja jest już wybrana w innym miejscu (ale nie w tym)
-            if name in self.selected_actions and name != current_selection:
-                action.setEnabled(False)  # Zablokuj opcję (będzie szara)
+        # Jeden picker na całą grę - indeks budowany jest tylko raz
+        if self.picker is None:
+            self.picker = TickerPicker(self.picker_universe(), parent_widget)
+            self.picker.picked.connect(self.apply_choice)
 
-            menu.addAction(action)
+        # Opcje wybrane w innym miejscu (ale nie w tym) są zablokowane
+        disabled = {name for name in self.selected_actions if name is not None and name != current_selection}
 
-        # Pokaż menu pod klikniętym labelem
+        # Pokaż picker pod klikniętym labelem
+        self.picker_target = target_label
         pos = target_label.mapToGlobal(QPoint(0, target_label.height()))
-        selected_action = menu.exec_(pos)
+        self.picker.open_at(pos, disabled)
 
-        # Jeśli wybrano opcję, zmień obrazek
-        if selected_action:
-            choice = selected_action.text()
-            image_path = self.options.get(choice)
-            if image_path:
-                pixmap = QPixmap(image_path)
-                target_label.setPixmap(pixmap)
+    def apply_choice(self, choice):
+        """Ustawia wybraną w pickerze spółkę na labelu, dla którego go otwarto."""
+        target_label = self.picker_target
+        if target_label is None or choice not in self.options:
+            return
+        target_label.setPixmap(self.logo_for(choice))
 
-                # Zapisz wybór
-                action_index = target_label.property("action_index")
-                self.selected_actions[action_index] = choice
+        # Zapisz wybór
+        action_index = target_label.property("action_index")
+        self.selected_actions[action_index] = choice
+
+    def updates_suspended(self):
+        """Context manager: changes to the action widgets inside it are painted once."""
+        return suspended_updates(self.container)
 
     def randomize_actions(self):
         """Losowo wybiera opcje dla wszystkich 6 akcji"""
@@ -235,16 +284,23 @@ class ActionManager:
         available_choices = list(self.options.keys())
         selected_choices = random.sample(available_choices, 6)
 
-        for i, action_widget in enumerate(self.action_widgets):
-            choice = selected_choices[i]
-            image_path = self.options[choice]
+        with self.updates_suspended():
+            for i, action_widget in enumerate(self.action_widgets):
+                choice = selected_choices[i]
 
-            # Ustaw obrazek
-            pixmap = QPixmap(image_path)
-            action_widget.set_pixmap(pixmap)
+                # Ustaw obrazek
+                action_widget.set_pixmap(self.logo_for(choice))
 
-            # Zapisz wybór
-            self.selected_actions[i] = choice
+                # Zapisz wybór
+                self.selected_actions[i] = choice
+
+    def show_picks(self):
+        """Logos of the picked stocks, the placeholder where nothing is picked (e.g. another player's turn)."""
+        with self.updates_suspended():
+            for choice, action_widget in zip(self.selected_actions, self.action_widgets):
+                action_widget.set_pixmap(self.logo_for(choice) if choice
+                                         else QPixmap("images/game_window/placeholder.png"))
+                action_widget.set_indicators(None, None)
 
     def all_actions_selected(self):
         return all(action is not None for action in self.selected_actions)
@@ -253,22 +309,35 @@ class ActionManager:
         return self.selected_actions.count(None)
 
     def reset_selections(self):
-        self.selected_actions = [None] * 6
-        for action_widget in self.action_widgets:
-            # Reset image to placeholder
-            pixmap = QPixmap("images/game_window/placeholder.png")
-            action_widget.set_pixmap(pixmap)
-
-            # Reset value label and quantity
-            action_widget.quantity = 0
-            action_widget.value_label.setText("0")
+        self.selected_actions = [None] * PORTFOLIO_SIZE
+        with self.updates_suspended(), self.ledger.batch():
+            for action_widget in self.action_widgets:
+                # Reset image to placeholder
+                pixmap = QPixmap("images/game_window/placeholder.png")
+                action_widget.set_pixmap(pixmap)
+                action_widget.set_indicators(None, None)
+
+                # Reset quantity (the value label follows the ledger)
+                action_widget.quantity = 0
+
+    def logo_for(self, name):
+        """Logo of a ticker, decoded on first use (monogram if it has none)."""
+        return logo_pixmap(name, self.options.get(name))
+
+    def picker_universe(self):
+        """Current options as securities (names and sectors from the manifest when known)."""
+        return Universe(self.universe.get(name) or Security(name, name, "", logo)
+                        for name, logo in self.options.items())
 
     def add_option(self, name, image_path):
         self.options[name] = image_path
+        # Picker zbuduje indeks od nowa przy następnym otwarciu
+        self.picker = None
 
     def remove_option(self, name):
         if name in self.options:
             del self.options[name]
+            self.picker = None
 
     def get_options(self):
         return self.options
@@ -276,37 +345,55 @@ class ActionManager:
     def get_selected_actions(self):
         return self.selected_actions
 
-    def update_selected_action_charts(self):
-        """Zamienia obrazki wybranych akcji na wygenerowane wykresy."""
-        import os
-        # Get the correct path to the charts directory
-        repo_dir = os.path.dirname(os.path.abspath(__file__))
-        chart_dir = os.path.join(repo_dir, "Stock_charts")
-
-        for i, choice in enumerate(self.selected_actions):
-            if choice:
-                chart_path = os.path.join(chart_dir, f"{choice}_chart.png")
-                pixmap = QPixmap(chart_path)
-                if not pixmap.isNull():
-                    self.action_widgets[i].image_label.setPixmap(pixmap)
-                else:
-                    print(f"Warning: Chart not found or failed to load: {chart_path}")
+    def update_selected_action_charts(self, sparklines=()):
+        """
+        Zamienia obrazki wybranych akcji na wygenerowane wykresy.
+        Spółki z `sparklines` (wykres nie zdążył się wygenerować) dostają sparkline.
+        """
+        with self.updates_suspended():
+            for i, choice in enumerate(self.selected_actions):
+                if choice:
+                    self.update_action_chart(i, sparkline=choice in sparklines)
+
+    def update_action_chart(self, index, sparkline=False):
+        """Shows the chart (or a sparkline of the CSV) of the stock at `index`."""
+        choice = self.selected_actions[index]
+        if sparkline:
+            data = read_prices(choice)
+            self.action_widgets[index].image_label.setPixmap(sparkline_pixmap(data[1] if data else []))
+            return
+        chart_file = chart_path(choice)
+        with span("decode_pixmap", ticker=choice) as trace_span:
+            pixmap = QPixmap(chart_file)
+            if trace_span:
+                trace_span.set(bytes=file_size(chart_file), loaded=not pixmap.isNull())
+        if not pixmap.isNull():
+            self.action_widgets[index].image_label.setPixmap(pixmap)
+        else:
+            print(f"Warning: Chart not found or failed to load: {chart_file}")
+
+    def update_indicator_tooltips(self, indicators):
+        """Shows the turn's indicators (IndicatorTable) in each chart's tooltip."""
+        for i, stock_name in enumerate(self.selected_actions):
+            if stock_name is not None and i < len(self.action_widgets):
+                self.action_widgets[i].set_indicators(stock_name, indicators.get(stock_name))
 
     def update_value_labels_by_stock(self):
         """
         Updates each ActionWidget value based on stock performance.
+        The labels are redrawn together, once, when the ledger batch ends.
+
+        The game itself revalues through GamePage.revalue_players
+        (hot_seat.Roster, all players at once). This per-widget version is
+        kept for an ActionManager used on its own, with a single ledger.
         """
-        for i, stock_name in enumerate(self.selected_actions):
-            if stock_name is None:
-                continue
-
-            action_widget = self.action_widgets[i]
-            multiplier = get_price_change(stock_name)
-
-            # Update value
-            new_value = int(action_widget.quantity * multiplier)
-            action_widget.quantity = new_value
-            action_widget.value_label.setText(str(new_value))
-            action_widget.value_label.show()  # Ensure it's visible
-            action_widget.value_label.raise_()  # Bring to front
-            action_widget.value_label.update()  # Force repaint
\ No newline at end of file
+        with self.updates_suspended(), self.ledger.batch():
+            for i, stock_name in enumerate(self.selected_actions):
+                if stock_name is None:
+                    continue
+
+                action_widget = self.action_widgets[i]
+                multiplier = get_price_change(stock_name)
+
+                # Update value, rounded to the cent
+                action_widget.ledger.revalue(action_widget.slot, multiplier)
\ No newline at end of file
@@ -0,0 +1,344 @@
+# benchmark.py
+"""
+Benchmark suite for the turn pipeline.
+
+Times every stage of a turn against offline fixtures (no Yahoo, no OpenAI):
+ticker fetch, CSV price decode, chart render, price change, NPC prompt
+building and action widget updates. Each stage is repeated, reported as
+percentiles and can be saved as a JSON baseline; `compare` re-runs the suite
+and flags stages that got slower than the baseline by more than a threshold.
+
+Usage:
+    python -m Game_code.benchmark run --repeat 20 --save benchmark_baseline.json
+    python -m Game_code.benchmark compare benchmark_baseline.json --threshold 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+from Game_code.simulate import non_negative_int, percentile, positive_int
+
+FIXTURE_TICKERS = ["AAPL", "GOOG", "MSFT", "NVDA", "AMZN", "TSLA"]
+FIXTURE_DAYS = 40
+FIXTURE_TURN = 0
+
+STAGES = ["fetch", "decode", "chart", "price_change", "prompt", "widgets"]
+PERCENTILES = {"p50": 0.50, "p90": 0.90, "p99": 0.99}
+
+
+# -----------------------------------
+# Dane testowe (offline)
+# -----------------------------------
+def fixture_frame(ticker, days=FIXTURE_DAYS):
+    """A deterministic DataFrame shaped like yfinance's Ticker.history()."""
+    import pandas as pd
+
+    seed = sum(ord(char) for char in ticker)
+    index = pd.bdate_range("2015-01-02", periods=days, tz="America/New_York", name="Date")
+    closes = [100.0 + seed % 50 + ((i * 7 + seed) % 11 - 5) * 0.8 + i * 0.3 for i in range(days)]
+    return pd.DataFrame({
+        "Open": closes,
+        "High": [price * 1.01 for price in closes],
+        "Low": [price * 0.99 for price in closes],
+        "Close": closes,
+        "Volume": [1_000_000 + i * 1000 for i in range(days)],
+        "Dividends": [0.0] * days,
+        "Stock Splits": [0.0] * days,
+    }, index=index)
+
+
+class FixtureTicker:
+    """Stand-in for yfinance.Ticker that serves fixture frames."""
+    frames = {}
+
+    def __init__(self, ticker, *args, **kwargs):
+        self.ticker = ticker
+
+    def history(self, *args, **kwargs):
+        frame = self.frames.get(self.ticker)
+        if frame is None:
+            frame = self.frames[self.ticker] = fixture_frame(self.ticker)
+        return frame.copy()
+
+
+class PipelineFixture:
+    """
+    Temporary CSV/chart directories with the fixture data already written,
+    and the Qt objects needed by the widget stage.
+    """
+
+    def __init__(self, tickers=FIXTURE_TICKERS, render_charts=True):
+        self.tickers = list(tickers)
+        self.render_charts = render_charts
+        self.root = tempfile.mkdtemp(prefix="deathmonopoly-bench-")
+        self.csv_dir = os.path.join(self.root, "Stock_prizes")
+        self.chart_dir = os.path.join(self.root, "Stock_charts")
+        os.makedirs(self.csv_dir)
+        os.makedirs(self.chart_dir)
+        self._patches = []
+        self.widget_parent = None
+        self.action_manager = None
+
+    def __enter__(self):
+        from Game_code import data_cache, stock_data
+
+        self._patches = [
+            # Cache turned off: every run measures the real fetch and render
+            patch.object(data_cache, "_cache", data_cache.DataCache(self.root, max_bytes=0)),
+            patch.object(stock_data, "CSV_DIR", self.csv_dir),
+            patch.object(stock_data, "CHART_DIR", self.chart_dir),
+            patch.object(stock_data.yf, "Ticker", FixtureTicker),
+        ]
+        for active in self._patches:
+            active.start()
+
+        # Every later stage reads what the previous ones produced
+        with contextlib.redirect_stdout(io.StringIO()):
+            stock_data.get_data(self.tickers, FIXTURE_TURN)
+            if self.render_charts:
+                for ticker in self.tickers:
+                    stock_data.get_data_chart(ticker)
+        return self
+
+    def __exit__(self, *exc_info):
+        for active in reversed(self._patches):
+            active.stop()
+        if self.widget_parent is not None:
+            self.widget_parent.deleteLater()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def action_manager_with_widgets(self):
+        if self.action_manager is None:
+            os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+            from PySide6.QtWidgets import QApplication, QWidget
+            from Game_code.action_manager import ActionManager
+            from Game_code.player_manager import PlayerManager
+
+            self.app = QApplication.instance() or QApplication([])
+            self.widget_parent = QWidget()
+            self.action_manager = ActionManager()
+            self.action_manager.create_action_widgets(self.widget_parent, player_manager=PlayerManager())
+            self.action_manager.selected_actions = list(self.tickers[:len(self.action_manager.action_widgets)])
+        return self.action_manager
+
+
+# -----------------------------------
+# Etapy tury
+# -----------------------------------
+def stage_fetch(fixture):
+    from Game_code.stock_data import get_data
+    get_data(fixture.tickers, FIXTURE_TURN)
+
+
+def stage_decode(fixture):
+    from Game_code.stock_data import read_prices
+    for ticker in fixture.tickers:
+        read_prices(ticker)
+
+
+def stage_chart(fixture):
+    from Game_code.stock_data import get_data_chart
+    for ticker in fixture.tickers:
+        get_data_chart(ticker)
+
+
+def stage_price_change(fixture):
+    from Game_code.stock_data import get_price_change
+    for ticker in fixture.tickers:
+        get_price_change(ticker)
+
+
+def stage_prompt(fixture):
+    # The prompt is only built, never sent
+    from Game_code.AI import build_npc_question, build_user_prompt, personalities
+
+    question = build_npc_question(player_balance=2400, selected_companies=fixture.tickers)
+    for _ in personalities:
+        build_user_prompt(question, folder_path=fixture.csv_dir)
+
+
+def stage_widgets(fixture):
+    from Game_code.hot_seat import Roster
+    from Game_code.stock_data import get_price_change
+
+    action_manager = fixture.action_manager_with_widgets()
+    for widget in action_manager.action_widgets:
+        widget.quantity = 400
+    action_manager.update_selected_action_charts()
+    # Ta sama ścieżka co GamePage.revalue_players (jeden gracz)
+    roster = Roster(len(action_manager.action_widgets))
+    roster.add({"name": "Benchmark"}, action_manager.ledger.cash_cents)
+    roster.store_player(0, action_manager.ledger, action_manager.get_selected_actions())
+    multipliers = {ticker: get_price_change(ticker) for ticker in roster.tickers()}
+    roster.revalue_active(multipliers, action_manager.ledger)
+    fixture.app.processEvents()
+
+
+STAGE_FUNCTIONS = {
+    "fetch": stage_fetch,
+    "decode": stage_decode,
+    "chart": stage_chart,
+    "price_change": stage_price_change,
+    "prompt": stage_prompt,
+    "widgets": stage_widgets,
+}
+
+
+# -----------------------------------
+# Pomiar i raport
+# -----------------------------------
+def summarize_samples(samples):
+    """Percentiles and spread of a list of timings in milliseconds."""
+    ordered = sorted(samples)
+    summary = {name: percentile(ordered, fraction) for name, fraction in PERCENTILES.items()}
+    summary.update({
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": sum(ordered) / len(ordered),
+        "runs": len(ordered),
+    })
+    return summary
+
+
+def time_stage(function, fixture, repeat, warmup):
+    """Runs a stage warmup + repeat times and returns the measured timings in ms."""
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for run in range(warmup + repeat):
+            started = time.perf_counter()
+            function(fixture)
+            elapsed = (time.perf_counter() - started) * 1000.0
+            if run >= warmup:
+                samples.append(elapsed)
+    return samples
+
+
+def run_benchmarks(stages=None, repeat=10, warmup=2, tickers=FIXTURE_TICKERS):
+    """Runs the selected stages and returns a JSON-serializable result."""
+    stages = list(stages or STAGES)
+    results = {}
+    # Charts only have to exist up front when the widgets load them
+    with PipelineFixture(tickers, render_charts="widgets" in stages) as fixture:
+        for stage in stages:
+            samples = time_stage(STAGE_FUNCTIONS[stage], fixture, repeat, warmup)
+            results[stage] = summarize_samples(samples)
+    return {
+        "version": 1,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tickers": len(tickers),
+        "repeat": repeat,
+        "stages": results,
+    }
+
+
+def compare_results(baseline, current, threshold=0.2, metric="p50", min_delta_ms=0.5):
+    """
+    Compares two run_benchmarks() results.
+    A stage regressed when it is slower by more than `threshold` (relative) and by
+    more than `min_delta_ms` (absolute, so sub-millisecond noise is not flagged).
+    Returns a list of (stage, baseline_ms, current_ms, change, regressed) rows.
+    """
+    rows = []
+    for stage, current_stats in current["stages"].items():
+        base_stats = baseline["stages"].get(stage)
+        if base_stats is None:
+            continue
+        base_value = base_stats[metric]
+        current_value = current_stats[metric]
+        change = (current_value - base_value) / base_value if base_value else 0.0
+        regressed = change > threshold and current_value - base_value > min_delta_ms
+        rows.append((stage, base_value, current_value, change, regressed))
+    return rows
+
+
+def print_results(result):
+    print(f"{'stage':<14}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'min ms':>10}{'max ms':>10}")
+    for stage, stats in result["stages"].items():
+        print(f"{stage:<14}{stats['p50']:>10.2f}{stats['p90']:>10.2f}{stats['p99']:>10.2f}"
+              f"{stats['min']:>10.2f}{stats['max']:>10.2f}")
+
+
+def print_comparison(rows, metric, threshold):
+    print(f"{'stage':<14}{'baseline':>12}{'current':>12}{'change':>10}")
+    for stage, base_value, current_value, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{stage:<14}{base_value:>12.2f}{current_value:>12.2f}{change:>+10.1%}{flag}")
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) slower than baseline by more than {threshold:.0%} ({metric}): "
+              f"{', '.join(regressions)}")
+    else:
+        print(f"\nNo regressions above {threshold:.0%} ({metric}).")
+
+
+def save_json(result, path):
+    with open(path, "w") as file:
+        json.dump(result, file, indent=2)
+    print(f"Saved benchmark results -> {path}")
+
+
+def load_json(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m Game_code.benchmark", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_run_options(command):
+        command.add_argument("--repeat", type=positive_int, default=10)
+        command.add_argument("--warmup", type=non_negative_int, default=2)
+        command.add_argument("--stage", choices=STAGES, nargs="+", help="run only these stages")
+
+    run = commands.add_parser("run", help="run the suite and print percentiles")
+    add_run_options(run)
+    run.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+
+    compare = commands.add_parser("compare", help="compare against a saved baseline")
+    compare.add_argument("baseline", help="baseline JSON written by `run --save`")
+    compare.add_argument("--current", metavar="PATH", help="compare this result file instead of running the suite")
+    compare.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (default: 0.2 = 20%%)")
+    compare.add_argument("--metric", choices=list(PERCENTILES) + ["mean", "min"], default="p50")
+    compare.add_argument("--min-delta", type=float, default=0.5,
+                         help="ignore slowdowns smaller than this many ms (default: 0.5)")
+    add_run_options(compare)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == "run":
+        result = run_benchmarks(args.stage, args.repeat, args.warmup)
+        print_results(result)
+        if args.save:
+            save_json(result, args.save)
+        return 0
+
+    baseline = load_json(args.baseline)
+    if args.current:
+        current = load_json(args.current)
+    else:
+        stages = args.stage or list(baseline["stages"])
+        current = run_benchmarks(stages, args.repeat, args.warmup)
+        print_results(current)
+        print()
+    rows = compare_results(baseline, current, args.threshold, args.metric, args.min_delta)
+    print_comparison(rows, args.metric, args.threshold)
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# chart_renderer.py
+"""
+Reusable stock chart renderer.
+
+pyplot creates a new Figure, Axes and Line2D for every chart and keeps them
+registered until plt.close() runs, so any exception in between leaks a figure.
+ChartRenderer builds one Figure with one line up front, draws it through a
+private Agg canvas (never registered with pyplot) and only updates the line
+data, color, title and limits for each chart. Long series are first cut
+to about the tile's pixel width (see downsample.py), so the cost of a chart
+does not grow with the length of the turn window.
+"""
+import os
+import threading
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from Game_code.downsample import CHART_PIXELS, reduce_series
+
+FIGSIZE = (10, 6)
+DPI = 300
+# Same padding matplotlib adds around autoscaled data
+X_MARGIN = 0.05
+
+
+class ChartRenderer:
+    def __init__(self, figsize=FIGSIZE, dpi=DPI, pixels=CHART_PIXELS):
+        self.dpi = dpi
+        # Width the chart is shown at; series are reduced to about this many points
+        self.pixels = pixels
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.line, = self.axes.plot([], [], linewidth=2)
+        self.axes.set_ylabel("Price (USD)")
+        self.axes.set_xticks([])
+        self.axes.grid(True, alpha=0.3)
+        self.renders = 0
+        # One figure, so charts rendered from worker threads take turns
+        self._lock = threading.Lock()
+
+    def render(self, company, prices, path, y_range=None, color=None):
+        """
+        Draws the closing prices of a company and saves the chart as PNG.
+        y_range is (min, max) of the Y axis; by default it follows the prices.
+        Raises ValueError for an empty series. A partly written file is removed.
+        """
+        if len(prices) == 0:
+            raise ValueError(f"No prices to draw for {company}")
+        if color is None:
+            color = 'green' if prices[-1] >= prices[0] else 'red'
+        # Min/max buckets keep the extremes, so the Y range is the same as for the full series
+        x, y = reduce_series(prices, self.pixels)
+        if y_range is None:
+            y_range = (float(y.min()) * 0.95, float(y.max()) * 1.05)
+
+        last = max(len(prices) - 1, 1)
+        with self._lock:
+            self.line.set_data(x, y)
+            self.line.set_color(color)
+            self.axes.set_title(f"{company} Stock Price")
+            self.axes.set_xlim(-X_MARGIN * last, last * (1 + X_MARGIN))
+            self.axes.set_ylim(*y_range)
+            try:
+                self.figure.savefig(path, dpi=self.dpi, bbox_inches="tight")
+            except Exception:
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+            self.renders += 1
+        return path
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_chart_renderer():
+    """The renderer shared by the whole game, created on first use."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ChartRenderer()
+        return _renderer
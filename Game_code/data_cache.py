@@ -0,0 +1,256 @@
+# data_cache.py
+"""
+Persistent per-user cache for downloaded prices, rendered charts and
+derived stats.
+
+Layout: <root>/v<CACHE_VERSION>/<namespace>/<key>. The root is
+$DEATHMONOPOLY_CACHE_DIR, else the platform's user cache directory, so it
+works when the game runs from a read-only or temporary PyInstaller bundle.
+Bumping CACHE_VERSION (e.g. when the chart style changes) starts a fresh
+tree and the old ones are removed.
+
+Every write goes to a temporary file in the same directory and is moved
+into place with os.replace, so a crash never leaves half a file under a real
+key. Reads refresh the file's mtime; when the total size goes over the cap
+($DEATHMONOPOLY_CACHE_MB, default 256) the least recently used files are
+removed first. A cap of 0 turns the cache off.
+
+Historical prices never change, so entries do not expire. The per-turn
+files the game reads (Stock_prizes/Stock_charts) are copies made from here
+and are still cleared on reset; the cache is not.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+CACHE_VERSION = 1
+DEFAULT_MAX_MB = 256
+
+
+def user_cache_root():
+    """Directory for DeathMonopoly's cache (outside the game's install dir)."""
+    override = os.getenv("DEATHMONOPOLY_CACHE_DIR")
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "DeathMonopoly")
+
+
+def cache_key(*parts):
+    """Short stable key for values that do not fit in a file name (e.g. a price series)."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+
+def atomic_write(path, writer, directory=None):
+    """
+    Calls writer(tmp_path) on a temp file next to path and moves it over path,
+    so readers see either the old file or the whole new one.
+    """
+    directory = directory or os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        writer(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _max_bytes():
+    try:
+        return int(float(os.getenv("DEATHMONOPOLY_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_MAX_MB * 1024 * 1024
+
+
+class DataCache:
+    def __init__(self, root=None, max_bytes=None):
+        self.base = root or user_cache_root()
+        self.root = os.path.join(self.base, f"v{CACHE_VERSION}")
+        self.max_bytes = _max_bytes() if max_bytes is None else max_bytes
+        self.enabled = self.max_bytes > 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Total size of the cache, counted on first write
+        self._size = None
+        self._ready = False
+
+    # -----------------------------------
+    # Odczyt
+    # -----------------------------------
+    def path(self, namespace, key):
+        return os.path.join(self.root, namespace, key)
+
+    def get(self, namespace, key):
+        """Path of a cached file, or None. A hit marks the file as recently used."""
+        if not self.enabled:
+            return None
+        path = self.path(namespace, key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def fetch(self, namespace, key, destination):
+        """Copies a cached file to destination. Returns False on a miss."""
+        path = self.get(namespace, key)
+        if path is None:
+            return False
+        try:
+            self._copy_atomic(path, destination)
+        except OSError as error:
+            print(f"Warning: Could not read cache entry {namespace}/{key}: {error}")
+            return False
+        return True
+
+    def get_json(self, namespace, key):
+        path = self.get(namespace, key)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    # -----------------------------------
+    # Zapis
+    # -----------------------------------
+    def store(self, namespace, key, source):
+        """Copies source into the cache. Returns the cached path, None if it could not be stored."""
+        try:
+            size = os.stat(source).st_size
+        except OSError:
+            return None
+        if size == 0 or size > self.max_bytes:
+            return None
+        return self._write(namespace, key, size, lambda tmp: shutil.copyfile(source, tmp))
+
+    def put_json(self, namespace, key, value):
+        data = json.dumps(value).encode("utf-8")
+
+        def write(tmp):
+            with open(tmp, "wb") as file:
+                file.write(data)
+
+        return self._write(namespace, key, len(data), write)
+
+    def clear(self):
+        """Removes everything in the current version's tree."""
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self._size = 0
+
+    def _write(self, namespace, key, size, writer):
+        if not self.enabled:
+            return None
+        with self._lock:
+            try:
+                self._prepare()
+                final = self.path(namespace, key)
+                directory = os.path.dirname(final)
+                os.makedirs(directory, exist_ok=True)
+                old_size = self._file_size(final)
+                self._atomic(directory, final, writer)
+            except OSError as error:
+                print(f"Warning: Could not write cache entry {namespace}/{key}: {error}")
+                return None
+            self._size += size - old_size
+            if self._size > self.max_bytes:
+                self._evict(keep=final)
+            return final
+
+    def _copy_atomic(self, source, destination):
+        directory = os.path.dirname(destination) or "."
+        os.makedirs(directory, exist_ok=True)
+        self._atomic(directory, destination, lambda tmp: shutil.copyfile(source, tmp))
+
+    @staticmethod
+    def _atomic(directory, final, writer):
+        atomic_write(final, writer, directory)
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
+
+    # -----------------------------------
+    # Porządki
+    # -----------------------------------
+    def _prepare(self):
+        """First write: drop trees of other cache versions and count the current size."""
+        if self._ready:
+            return
+        self._ready = True
+        current = os.path.basename(self.root)
+        try:
+            for name in os.listdir(self.base):
+                # Only our own version trees: the root may be a user-chosen directory
+                if name[:1] == "v" and name[1:].isdigit() and name != current:
+                    shutil.rmtree(os.path.join(self.base, name), ignore_errors=True)
+        except OSError:
+            pass
+        self._size = sum(size for _, _, size in self._entries(remove_temp=True))
+
+    def _entries(self, remove_temp=False):
+        """(mtime, path, size) of every cached file; remove_temp drops files left by a crash."""
+        entries = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    if name.endswith(".tmp"):
+                        if remove_temp:
+                            os.remove(path)
+                        continue
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _evict(self, keep=None):
+        """Removes least recently used files until the cache is at 90% of the cap."""
+        target = self.max_bytes * 0.9
+        entries = sorted(self._entries())
+        self._size = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if self._size <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+
+_cache = None
+
+
+def get_cache():
+    """The shared cache (created on first use)."""
+    global _cache
+    if _cache is None:
+        _cache = DataCache()
+    return _cache
@@ -0,0 +1,49 @@
+# deadline.py
+"""
+Time budget of one turn.
+
+The turn pipeline starts a Deadline and every stage asks how much time is
+left before it does slow work. Stages that would run past it degrade
+instead of waiting: prices come from the local history or stay empty,
+charts are drawn as sparklines and rendered after the turn is shown, and
+NPC replies that are late replace the current line when they arrive.
+
+The budget is DEATHMONOPOLY_TURN_DEADLINE seconds (default 2); 0 turns
+the deadline off.
+"""
+import os
+import time
+
+DEFAULT_SECONDS = 2.0
+
+
+def turn_budget():
+    """Seconds a turn may take, None when the deadline is off."""
+    value = os.getenv("DEATHMONOPOLY_TURN_DEADLINE")
+    if value is None:
+        return DEFAULT_SECONDS
+    try:
+        seconds = float(value)
+    except ValueError:
+        print(f"Warning: DEATHMONOPOLY_TURN_DEADLINE={value!r} is not a number, using {DEFAULT_SECONDS} s")
+        return DEFAULT_SECONDS
+    return seconds if seconds > 0 else None
+
+
+class Deadline:
+    def __init__(self, seconds, clock=time.monotonic):
+        self.seconds = seconds
+        self.clock = clock
+        self.started = clock()
+
+    def remaining(self):
+        """Seconds left (never negative), None without a deadline."""
+        if self.seconds is None:
+            return None
+        return max(0.0, self.started + self.seconds - self.clock())
+
+    def expired(self):
+        return self.seconds is not None and self.remaining() <= 0
+
+
+NO_DEADLINE = Deadline(None)
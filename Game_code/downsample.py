@@ -0,0 +1,115 @@
+# downsample.py
+"""
+Downsampling of price series for charts.
+
+A chart ends up as a 260 px wide tile, so drawing more than a few points per
+pixel column only costs time. reduce_series() cuts any series to about the
+tile's pixel width before it is drawn:
+
+- "minmax" (default): the series is split into one bucket per pixel and
+  each bucket keeps its lowest and highest close, in time order. Every
+  spike and dip survives, so the picture at that width is the same.
+- "lttb": Largest-Triangle-Three-Buckets, one point per bucket chosen to
+  keep the shape of the line (fewer points, extremes not guaranteed).
+
+Series that are already short enough are returned unchanged. Results are
+cached per (series, width, method) in a small LRU.
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Width of the stock tile in ActionWidget (logos.LOGO_WIDTH)
+CHART_PIXELS = 260
+CACHE_SIZE = 64
+
+_cache = OrderedDict()
+
+
+def minmax_buckets(values, buckets):
+    """Indices of the min and max of each of `buckets` equal parts, in time order."""
+    n = len(values)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    # Reduce each bucket with one reduceat call instead of a Python loop
+    lows = np.minimum.reduceat(values, starts)
+    highs = np.maximum.reduceat(values, starts)
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    is_low = values == lows[bucket_of]
+    is_high = values == highs[bucket_of]
+    # First index of the min and of the max in every bucket
+    low_idx = _first_per_bucket(is_low, bucket_of, buckets)
+    high_idx = _first_per_bucket(is_high, bucket_of, buckets)
+    indices = np.unique(np.concatenate(([0, n - 1], low_idx, high_idx)))
+    return indices
+
+
+def _first_per_bucket(mask, bucket_of, buckets):
+    positions = np.flatnonzero(mask)
+    _, first = np.unique(bucket_of[positions], return_index=True)
+    return positions[first]
+
+
+def lttb(values, threshold):
+    """Indices chosen by Largest-Triangle-Three-Buckets (first and last always kept)."""
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.asarray(values, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Average point of the next bucket
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_start = end
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Triangle area (x2) with the previous point and the next bucket's average
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        indices[bucket + 1] = previous
+    return indices
+
+
+def reduce_series(prices, width=CHART_PIXELS, method="minmax"):
+    """
+    (x, y) arrays to draw for a series on a chart `width` pixels wide.
+    x are the positions in the original series, so the time axis is unchanged.
+    """
+    values = np.asarray(prices, dtype=np.float64)
+    n = len(values)
+    limit = 2 * width if method == "minmax" else width
+    if n <= limit:
+        return np.arange(n), values
+
+    key = (method, width, n, hashlib.blake2b(values.tobytes(), digest_size=16).digest())
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache.move_to_end(key)
+        return cached
+
+    if method == "minmax":
+        indices = minmax_buckets(values, width)
+    elif method == "lttb":
+        indices = lttb(values, width)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    result = (indices, values[indices])
+    for array in result:
+        array.setflags(write=False)
+
+    _cache[key] = result
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
+
+
+def clear_cache():
+    _cache.clear()
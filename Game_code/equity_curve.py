@@ -0,0 +1,137 @@
+# equity_curve.py
+"""
+Equity curve of the game: the total balance and each ticker's position
+value per turn, painted with QPainter.
+
+Every series is a QPainterPath in data coordinates (x = turn, y = cents).
+A new turn only appends one point to each path; the scaling to the widget
+is a QTransform applied when painting, with cosmetic pens so lines keep
+their width. Nothing is re-plotted or re-rendered per turn.
+"""
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtGui import QColor, QFont, QPainter, QPainterPath, QPen, QTransform
+from PySide6.QtWidgets import QWidget
+
+from Game_code.game_rules import format_money
+from Game_code.logos import monogram_color
+
+MARGIN_LEFT = 90
+MARGIN_RIGHT = 110
+MARGIN_Y = 20
+
+
+class EquityCurveView(QWidget):
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.tickers = []
+        self.total_path = QPainterPath()
+        self.ticker_paths = []
+        # Rows of the history already added to the paths
+        self.drawn = 0
+        self.label_font = QFont("Arial", 10)
+        self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
+        self.setStyleSheet("background-color: rgba(38, 39, 59, 0.8);")
+
+    def set_tickers(self, tickers):
+        """Names of the positions (one line per ticker) and a full rebuild."""
+        self.tickers = list(tickers)
+        self.rebuild()
+
+    def rebuild(self):
+        self.total_path = QPainterPath()
+        self.ticker_paths = [QPainterPath() for _ in self.tickers]
+        self.drawn = 0
+        self.refresh()
+
+    def refresh(self):
+        """Adds the turns recorded since the last call; O(positions) per new turn."""
+        history = self.history
+        if len(history) < self.drawn:
+            self.rebuild()
+            return
+        for row in range(self.drawn, len(history)):
+            _, values, total = history.row(row)
+            self._append(self.total_path, row, total)
+            for path, value in zip(self.ticker_paths, values):
+                self._append(path, row, int(value))
+        self.drawn = len(history)
+        self.update()
+
+    @staticmethod
+    def _append(path, x, y):
+        if path.elementCount():
+            path.lineTo(x, y)
+        else:
+            path.moveTo(x, y)
+
+    def plot_rect(self):
+        return QRectF(MARGIN_LEFT, MARGIN_Y, max(1, self.width() - MARGIN_LEFT - MARGIN_RIGHT),
+                      max(1, self.height() - 2 * MARGIN_Y))
+
+    def data_transform(self):
+        """Maps (turn, cents) onto the plot area; the Y range covers every series."""
+        plot = self.plot_rect()
+        top = max(self.history.max_total or 0, 1)
+        turns = max(self.drawn - 1, 1)
+        transform = QTransform()
+        transform.translate(plot.left(), plot.bottom())
+        transform.scale(plot.width() / turns, -plot.height() / top)
+        return transform
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.drawn == 0:
+            return
+        painter = QPainter(self)
+        try:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            transform = self.data_transform()
+            self._paint_axes(painter, transform)
+
+            painter.save()
+            painter.setTransform(transform, True)
+            for ticker, path in zip(self.tickers, self.ticker_paths):
+                painter.setPen(self._pen(monogram_color(ticker), 1.5))
+                painter.drawPath(path)
+            painter.setPen(self._pen(QColor(255, 215, 0), 3))
+            painter.drawPath(self.total_path)
+            painter.restore()
+
+            self._paint_labels(painter, transform)
+        finally:
+            painter.end()
+
+    @staticmethod
+    def _pen(color, width):
+        pen = QPen(color, width)
+        pen.setCosmetic(True)
+        return pen
+
+    def _paint_axes(self, painter, transform):
+        plot = self.plot_rect()
+        painter.setFont(self.label_font)
+        painter.setPen(QColor(255, 255, 255, 60))
+        painter.drawLine(plot.bottomLeft(), plot.bottomRight())
+        painter.drawLine(plot.bottomLeft(), plot.topLeft())
+        painter.setPen(QColor("white"))
+        top = max(self.history.max_total or 0, 1)
+        for cents in (0, top // 2, top):
+            y = transform.map(QPointF(0, cents)).y()
+            painter.drawText(QRectF(0, y - 8, MARGIN_LEFT - 6, 16),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                             f"$ {format_money(int(cents))}")
+
+    def _paint_labels(self, painter, transform):
+        """Name next to the end of each line."""
+        last = self.drawn - 1
+        _, values, total = self.history.row(last)
+        rows = [("TOTAL", total, QColor(255, 215, 0))]
+        rows += [(ticker, int(value), monogram_color(ticker)) for ticker, value in zip(self.tickers, values)]
+        painter.setFont(self.label_font)
+        x = self.plot_rect().right() + 6
+        for name, cents, color in rows:
+            y = transform.map(QPointF(last, cents)).y()
+            painter.setPen(color)
+            painter.drawText(QRectF(x, y - 8, MARGIN_RIGHT - 8, 16),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, name)
@@ -0,0 +1,124 @@
+# fetch_guard.py
+"""
+Guards around downloads, so a bad ticker or a failing data source does not
+cost a request (and its timeout) every turn.
+
+- NegativeCache remembers price keys (ticker + turn window) that came back
+  empty, e.g. a delisted ticker or a window before the IPO. Entries expire
+  after NEGATIVE_TTL seconds and are kept in the data cache ("empty"), so
+  they survive a restart.
+- CircuitBreaker counts consecutive failures of one source. After
+  FAILURE_THRESHOLD of them it opens and the source is not called for
+  COOLDOWN seconds; then one trial request is let through (half-open) and
+  its result closes or reopens the breaker.
+"""
+import threading
+import time
+
+from Game_code.data_cache import get_cache
+
+NEGATIVE_TTL = 6 * 60 * 60
+FAILURE_THRESHOLD = 3
+COOLDOWN = 5 * 60
+
+
+class NegativeCache:
+    def __init__(self, ttl=NEGATIVE_TTL, clock=time.time):
+        self.ttl = ttl
+        self.clock = clock
+        # key -> wall clock time the entry expires
+        self._until = {}
+
+    def is_empty(self, key):
+        """True while the key is known to have no data."""
+        until = self._until.get(key)
+        if until is None:
+            stored = get_cache().get_json("empty", key)
+            until = stored.get("until") if isinstance(stored, dict) else None
+            if until is None:
+                return False
+        if until <= self.clock():
+            self._until.pop(key, None)
+            return False
+        self._until[key] = until
+        return True
+
+    def add(self, key):
+        until = self.clock() + self.ttl
+        self._until[key] = until
+        get_cache().put_json("empty", key, {"until": until})
+
+    def clear(self):
+        self._until.clear()
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN, clock=time.monotonic):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.cooldown:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """True if the source may be called now. Half-open lets a single trial through."""
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+                print(f"Warning: {self.name} failed {self.failures} times, "
+                      f"not calling it for {self.cooldown} s")
+            self._trial = False
+
+
+_negative = None
+_breakers = {}
+_lock = threading.Lock()
+
+
+def get_negative_cache():
+    global _negative
+    with _lock:
+        if _negative is None:
+            _negative = NegativeCache()
+        return _negative
+
+
+def get_breaker(source):
+    """The circuit breaker of a data source (one per name, shared by the game)."""
+    with _lock:
+        breaker = _breakers.get(source)
+        if breaker is None:
+            breaker = _breakers[source] = CircuitBreaker(source)
+        return breaker
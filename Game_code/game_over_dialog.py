@@ -1,35 +1,38 @@
 from PySide6.QtWidgets import QDialog, QLabel, QPushButton, QVBoxLayout, QHBoxLayout
 from PySide6.QtGui import QFont
 from PySide6.QtCore import Qt
+from Game_code.game_rules import format_dollars
+
+# Analiza "co by było gdyby" jeszcze się liczy (what_if_runner.py)
+WHAT_IF_PENDING = "pending"
 
 
 class GameOverDialog(QDialog):
     """Wyświetla okno Game Over i resetuje grę"""
-    def __init__(self, parent, player_name, final_balance):
+    def __init__(self, parent, player_name, final_balance, what_if=None, standings=None):
         super().__init__(parent)
-        
+        self.player_name = player_name
+        self.final_balance = final_balance
+        self.what_if = what_if
+        self.standings = standings
 
         self.setWindowTitle("Game Over")
         self.setStyleSheet("background-color: rgb(38, 39, 59);")
-        self.setFixedSize(500, 350)
+        height = 350 if what_if is None else 450
+        if standings:
+            height += 30 * len(standings)
+        self.setFixedSize(500, height)
 
         layout = QVBoxLayout(self)
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # --- Tekst ---
-        text = QLabel()
-        text.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        text.setFont(QFont("Helvetica", 18))
-        text.setStyleSheet("color: white; padding: 10px;")
-        text.setText(
-            f"""
-            <b style='color: rgb(255, 50, 50); font-size: 32px;'>GAME OVER</b><br><br>
-            <span style='color: rgb(255, 215, 0); font-size: 24px;'>Congratulations, {player_name}!</span><br><br>
-            <span style='color: white; font-size: 20px;'>Final Balance: ${final_balance}</span><br><br>
-            <span style='color: white; font-size: 16px;'>What would you like to do?</span>
-            """
-        )
-        layout.addWidget(text)
+        self.text = QLabel()
+        self.text.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.text.setFont(QFont("Helvetica", 18))
+        self.text.setStyleSheet("color: white; padding: 10px;")
+        self.render_text()
+        layout.addWidget(self.text)
 
         # --- Przyciski ---
         btn_layout = QHBoxLayout()
@@ -65,3 +68,57 @@ class GameOverDialog(QDialog):
 
         btn_menu.clicked.connect(self.accept)   # powrót do menu
         btn_restart.clicked.connect(self.reject)  # restart gry
+
+    def render_text(self):
+        self.text.setText(
+            f"""
+            <b style='color: rgb(255, 50, 50); font-size: 32px;'>GAME OVER</b><br><br>
+            <span style='color: rgb(255, 215, 0); font-size: 24px;'>Congratulations, {self.player_name}!</span><br><br>
+            <span style='color: white; font-size: 20px;'>Final Balance: ${format_dollars(self.final_balance)}</span><br><br>
+            {self.standings_text(self.standings)}
+            {self.what_if_text(self.what_if)}
+            <span style='color: white; font-size: 16px;'>What would you like to do?</span>
+            """
+        )
+
+    def set_what_if(self, what_if, standings=None):
+        """Fills in the analysis once it is ready (the dialog may already be open)."""
+        self.what_if = what_if
+        if standings is not None:
+            self.standings = standings
+        self.render_text()
+
+    @staticmethod
+    def standings_text(standings):
+        """
+        Ranking graczy (gra wieloosobowa): [(imię, saldo końcowe)] albo
+        [(imię, saldo końcowe, analiza what-if)] od najbogatszego
+        """
+        if not standings:
+            return ""
+        rows = []
+        for place, (name, balance, *what_if) in enumerate(standings, start=1):
+            row = f"{place}. {name}: ${format_dollars(balance)}"
+            if what_if and what_if[0] == WHAT_IF_PENDING:
+                row += " (beat ...%)"
+            elif what_if and what_if[0]:
+                row += f" (beat {what_if[0]['percentile']:.0f}%)"
+            rows.append(row)
+        return f"<span style='color: white; font-size: 16px;'>{'<br>'.join(rows)}</span><br><br>"
+
+    @staticmethod
+    def what_if_text(what_if):
+        """Podsumowanie 'co by było gdyby' (wynik z what_if.evaluate_player)"""
+        if not what_if:
+            return ""
+        if what_if == WHAT_IF_PENDING:
+            return ("<span style='color: white; font-size: 16px;'>"
+                    "Comparing with every possible portfolio...</span><br><br>")
+        best = ", ".join(what_if["best_tickers"])
+        return (
+            f"<span style='color: rgb(100, 255, 100); font-size: 16px;'>"
+            f"Best possible: ${format_dollars(what_if['best_balance'])} ({best})</span><br>"
+            f"<span style='color: white; font-size: 16px;'>"
+            f"You beat {what_if['percentile']:.0f}% of all portfolios, "
+            f"regret: ${format_dollars(what_if['regret'])}</span><br><br>"
+        )
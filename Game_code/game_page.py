@@ -1,12 +1,24 @@
 from PySide6.QtWidgets import QWidget, QLabel, QGroupBox, QScrollArea, QPushButton, QMessageBox, QDialog, QVBoxLayout, \
     QApplication
+import time
 from PySide6.QtGui import QPixmap, QFont
-from PySide6.QtCore import Signal, Qt
+from PySide6.QtCore import Signal, Qt, QTimer
 from Game_code.npc_manager import NPCManager
 from Game_code.player_manager import PlayerManager
 from Game_code.action_manager import ActionManager
-from Game_code.game_over_dialog import GameOverDialog
-from Game_code.stock_data import get_data, get_data_chart, clear_stock_files
+from Game_code.game_over_dialog import GameOverDialog, WHAT_IF_PENDING
+from Game_code.stock_data import get_data, get_data_chart, get_price_change, clear_stock_files
+from Game_code.game_rules import get_start_balance, format_money, cents_to_dollars, to_cents, MAX_TURNS, PORTFOLIO_SIZE
+from Game_code.what_if_runner import WhatIfRunner
+from Game_code import tracing, savegame
+from Game_code.position_list import PositionListModel, PositionListView
+from Game_code.portfolio_history import PortfolioHistory
+from Game_code.equity_curve import EquityCurveView
+from Game_code.indicators import get_indicator_engine
+from Game_code.AI import token_meter
+from Game_code.deadline import Deadline, turn_budget
+from Game_code.hot_seat import MAX_PLAYERS, Roster
+from Game_code.leaderboard import get_leaderboard
 
 
 class LoadingDialog(QDialog):
@@ -38,6 +50,9 @@ class GamePage(QWidget):
         super().__init__()
         self.main_window = main_window
         self.unspent_money = None
+        # --- portfel z początku gry (do analizy "co by było gdyby") ---
+        self.start_balance = None
+        self.initial_investments = []
 
         # --- zarządzanie danymi gracza ---
         self.player_manager = PlayerManager()
@@ -46,7 +61,9 @@ class GamePage(QWidget):
 
         # --- Licznik tur ---
         self.turn_counter = 0
-        self.max_turns = 3
+        self.max_turns = MAX_TURNS
+        # Czas startu gry (time.monotonic), dla tabeli wyników
+        self.started_at = None
 
         # --- współrzędne dla Opcji akcyjnych ---
         action_x_start = self.action_manager.action_x_start
@@ -103,6 +120,16 @@ class GamePage(QWidget):
         apply_button_style(self.btn_continue, "images/buttons/continue-button-small.png")
         self.btn_continue.hide()  # Ukryj na początku
 
+        # --- Gracze przy jednym ekranie (hot seat): dodanie gracza i przełączanie ---
+        self.btn_add_player = QPushButton("+ PLAYER", self.menu_box)
+        self.btn_add_player.setGeometry(400 - button_width - 20, button_y, button_width, button_height)
+        self.btn_add_player.clicked.connect(self.add_player)
+
+        self.btn_next_player = QPushButton(self.menu_box)
+        self.btn_next_player.setGeometry(400 + 2 * button_width + 40, button_y, button_width, button_height)
+        self.btn_next_player.clicked.connect(self.next_player)
+        self.btn_next_player.hide()
+
         # Flaga czy gra się rozpoczęła
         self.game_started = False
 
@@ -121,14 +148,15 @@ class GamePage(QWidget):
         self.balance.setFont(QFont("Comic Sans MS", 30))
         self.balance.setStyleSheet("color: green; padding: 0px; background-color: rgba(128, 0, 128, 0);")
 
-        # Initialize label with current balance
-        self.balance.setText(f"$ {self.player_manager.get_player_balance()}")
+        # Initialize label with current balance; it follows every ledger change
+        self.render_balance()
+        self.player_manager.ledger.changed.connect(self.render_balance)
 
          # --- Tworzenie opcji akcyjnych za pomocą ActionManager ---
+        # Saldo rysuje render_balance (podłączone do ledgera powyżej), nie widgety
         self.action_widgets = self.action_manager.create_action_widgets(
             parent=self.menu_box,
-            player_manager=self.player_manager,
-            balance_label=self.balance
+            player_manager=self.player_manager
         )
 
         # Podłącz sygnały kliknięcia dla każdej akcji
@@ -240,6 +268,39 @@ class GamePage(QWidget):
         self.DialogBox.verticalScrollBar().valueChanged.connect(self.updateIndicators)
         self.updateIndicators()
 
+        # --- Lista pozycji portfela (zamiast dialogu, przełączana przyciskiem $) ---
+        # Tylko podgląd: kupno i sprzedaż zostają w sześciu kafelkach ActionWidget
+        self.positions_model = PositionListModel(self.player_manager.ledger, self)
+        self.positions_view = PositionListView(self.positions_model, self)
+        self.positions_view.setGeometry(action_x_start, 495, 1035, 250)
+        self.positions_view.hide()
+
+        self.btn_positions = QPushButton("$", self)
+        self.btn_positions.setGeometry(1160, action_y_start+450, 40, 20)
+        self.btn_positions.setStyleSheet(self.btn_player.styleSheet())
+        self.btn_positions.clicked.connect(self.toggle_positions)
+        self.btn_positions.raise_()
+
+        # --- Historia portfela i wykres wartości (przełączany przyciskiem ~) ---
+        self.history = PortfolioHistory(PORTFOLIO_SIZE)
+        self.equity_view = EquityCurveView(self.history, self)
+        self.equity_view.setGeometry(action_x_start, 495, 1035, 250)
+        self.equity_view.hide()
+
+        self.btn_equity = QPushButton("~", self)
+        self.btn_equity.setGeometry(1210, action_y_start+450, 40, 20)
+        self.btn_equity.setStyleSheet(self.btn_player.styleSheet())
+        self.btn_equity.clicked.connect(self.toggle_equity)
+        self.btn_equity.raise_()
+
+        # Styl tekstowych przycisków graczy taki jak ME / $ / ~
+        self.btn_add_player.setStyleSheet(self.btn_player.styleSheet())
+        self.btn_next_player.setStyleSheet(self.btn_player.styleSheet())
+
+        # --- Portfele wszystkich graczy; ekran pokazuje aktywnego ---
+        self.roster = Roster(PORTFOLIO_SIZE)
+        self.roster.add(self.player_manager.get_player_data(), self.player_manager.ledger.cash_cents, self.history)
+
         # --- NPC Manager - tutaj tworzymy i zarządzamy NPC ---
         self.npc_manager = NPCManager()
         self.npc_widgets = self.npc_manager.create_npc_widgets(self.playerBox)
@@ -247,6 +308,13 @@ class GamePage(QWidget):
         # Podłączamy aktualizację interfejsu po kliknięciu NPC
         for npc_widget in self.npc_widgets:
             npc_widget.clicked.connect(self.update_npc_display)
+        # Spóźniona odpowiedź NPC trafia też do zapisu gry
+        self.npc_manager.relay.applied.connect(self.save_late_reply)
+
+        # --- Analiza "co by było gdyby": liczona w tle od startu gry ---
+        self.what_if_runner = WhatIfRunner(self)
+        self.what_if_runner.finished.connect(self.show_what_if)
+        self.game_over_dialog = None
 
         # --- przycisk wyjście do menu ---
         btn_exit = QPushButton(self)
@@ -270,20 +338,13 @@ class GamePage(QWidget):
         if self.game_started:
             return
 
-        if difficulty == 1:
-            self.player_manager.set_player_balance(2400)
-        elif difficulty == 2:
-            self.player_manager.set_player_balance(1200)
-        else:
-            self.player_manager.set_player_balance(600)
-
-        # Update balance display
-        self.balance.setText(f"$ {self.player_manager.get_player_balance()}")
+        self.player_manager.set_player_balance(get_start_balance(difficulty))
+        self.roster.reset_cash(to_cents(get_start_balance(difficulty)))
 
-        # Reset all action value labels
-        for widget in self.action_manager.action_widgets:
-            widget.quantity = 0
-            widget.value_label.setText("0")
+        # Reset all action values (labels follow the ledger, redrawn once)
+        with self.action_manager.updates_suspended(), self.player_manager.ledger.batch():
+            for widget in self.action_manager.action_widgets:
+                widget.quantity = 0
 
     # --- Update indicator visibility based on scroll position ---
     def updateIndicators(self):
@@ -307,8 +368,107 @@ class GamePage(QWidget):
         self.background.resize(self.size())
         self.updateIndicators()
 
+    # --- lista pozycji portfela ---
+    def toggle_positions(self):
+        self.equity_view.hide()
+        self.positions_view.setVisible(not self.positions_view.isVisible())
+        if self.positions_view.isVisible():
+            self.positions_view.raise_()
+
+    def toggle_equity(self):
+        self.positions_view.hide()
+        self.equity_view.setVisible(not self.equity_view.isVisible())
+        if self.equity_view.isVisible():
+            self.equity_view.raise_()
+
+    def record_history(self):
+        """Adds every player's cash and positions to their history and refreshes the equity curve."""
+        self.sync_active_player()
+        self.roster.record_history()
+        self.equity_view.refresh()
+
+    # --- gracze przy jednym ekranie (hot seat) ---
+    def sync_active_player(self):
+        """Copies the screen (the active player's ledger, picks and data) into the roster."""
+        self.roster.store_player(self.roster.active, self.player_manager.ledger,
+                                 self.action_manager.get_selected_actions(), self.player_manager.get_player_data())
+
+    def add_player(self):
+        """Adds a player with the starting balance and shows their (empty) portfolio."""
+        if self.game_started or len(self.roster) >= MAX_PLAYERS:
+            return
+        self.sync_active_player()
+        player = dict(self.roster.players[0], name=f"Player {len(self.roster) + 1}")
+        balance = get_start_balance(self.main_window.settings_page.get_difficulty_id())
+        self.switch_player(self.roster.add(player, to_cents(balance)))
+
+    def next_player(self):
+        if len(self.roster) > 1:
+            self.switch_player((self.roster.active + 1) % len(self.roster))
+
+    def switch_player(self, index):
+        """Shows another player's portfolio; the one on screen is kept in the roster."""
+        self.sync_active_player()
+        self.roster.active = index
+        selected = self.roster.load_player(index, self.player_manager.ledger)
+        player = self.roster.players[index]
+        self.player_manager.update_player_data(player["name"], player["avatar"], player["dialogue"])
+        self.action_manager.selected_actions = selected
+
+        opening = self.roster.openings[index] or {}
+        self.unspent_money = opening.get("unspent_money")
+        self.start_balance = opening.get("start_balance")
+        self.initial_investments = list(opening.get("initial_investments", []))
+        self.history = self.equity_view.history = self.roster.histories[index]
+
+        with self.action_manager.updates_suspended():
+            if self.game_started:
+                # Wykresy i wskaźniki tury są już policzone dla wszystkich graczy
+                self.action_manager.update_selected_action_charts()
+                self.action_manager.update_indicator_tooltips(
+                    get_indicator_engine().turn_indicators(self.turn_counter, self.roster.tickers()))
+            else:
+                self.action_manager.show_picks()
+        if self.game_started:
+            self.show_positions()
+            self.equity_view.set_tickers(selected)
+        self.render_balance()
+        self.render_player_button()
+        self.show_player_character()
+
+    def reset_players(self):
+        """Keeps only the first player (their data; the portfolio is reset by the caller)."""
+        if self.roster.active != 0:
+            player = self.roster.players[0]
+            self.player_manager.update_player_data(player["name"], player["avatar"], player["dialogue"])
+        history = self.roster.histories[0]
+        self.roster.clear()
+        self.roster.add(self.player_manager.get_player_data(), self.player_manager.ledger.cash_cents, history)
+        self.history = self.equity_view.history = history
+        self.render_player_button()
+
+    def render_player_button(self):
+        self.btn_next_player.setText(f"P{self.roster.active + 1}/{len(self.roster)}")
+        self.btn_next_player.setVisible(len(self.roster) > 1)
+
+    def revalue_players(self):
+        """Applies the turn's price changes to every player's portfolio at once."""
+        self.sync_active_player()
+        multipliers = {ticker: get_price_change(ticker) for ticker in self.roster.tickers()}
+        self.roster.revalue_active(multipliers, self.player_manager.ledger)
+
+    def show_positions(self):
+        """Fills the positions list from the current selections (after the game starts)."""
+        self.positions_model.set_positions([
+            (ticker, widget.slot, self.action_manager.options.get(ticker))
+            for ticker, widget in zip(self.action_manager.get_selected_actions(), self.action_manager.action_widgets)
+            if ticker is not None
+        ])
+
     # --- pokazanie postaci gracza ---
     def show_player_character(self):
+        self.positions_view.hide()
+        self.equity_view.hide()
 
         self.player_data = self.player_manager.get_player_data()
         # --- Zmienić duzy awatar ---
@@ -329,6 +489,8 @@ class GamePage(QWidget):
         self.npc_manager.unselect_npc()
 
     def update_npc_display(self, index):
+        self.positions_view.hide()
+        self.equity_view.hide()
 
         npc_data = self.npc_manager.get_npc_data(index)
         if npc_data is None:
@@ -367,33 +529,70 @@ class GamePage(QWidget):
         loading.show()
         QApplication.processEvents()
 
-        # Get selected companies
-        selected_companies = self.action_manager.get_selected_actions()
+        with tracing.turn_span(self.turn_counter):
+            self._run_turn_pipeline()
+        tracing.export_last_turn()
+        self.save_game()
+
+        loading.close()
+
+    def _run_turn_pipeline(self):
+        """
+        Fetches data, renders charts, updates the widgets, balance and NPC dialogue.
+        Stages share the turn's deadline (deadline.py): charts that do not fit
+        are shown as sparklines and rendered right after the turn, late NPC
+        replies are shown when they arrive. Prices, charts and NPC replies
+        are made once for the tickers of all players (hot_seat.py).
+        """
+        deadline = Deadline(turn_budget())
+        # Get selected companies (of every player, each once)
+        self.sync_active_player()
+        selected_companies = self.roster.tickers()
         turn = self.turn_counter
 
         # Generate data and charts
-        get_data(selected_companies, turn)
+        get_data(selected_companies, turn, deadline)
+        late_charts = []
         for company in selected_companies:
+            if deadline.expired():
+                late_charts.append(company)
+            else:
+                get_data_chart(company)
+        # Wskaźniki liczone raz na turę, dla tooltipów i wszystkich NPC
+        indicators = get_indicator_engine().turn_indicators(turn, selected_companies)
+
+        # Update the action widgets with new chart images and values; one repaint for the turn
+        with self.action_manager.updates_suspended():
+            self.action_manager.update_selected_action_charts(sparklines=late_charts)
+            self.revalue_players()
+            self.action_manager.update_indicator_tooltips(indicators)
+        self.record_history()
+        if late_charts:
+            QTimer.singleShot(0, lambda: self.render_late_charts(turn, late_charts))
+
+        # #Updating NPC Dialogue (the balance label already follows the ledger)
+        budget = self.player_manager.get_net_worth()
+        self.npc_manager.update_dialogs_ai(player_balance=budget, selected_companies=selected_companies,
+                                           indicators=indicators, timeout=deadline.remaining(), turn=turn)
+
+    def render_late_charts(self, turn, companies):
+        """Renders the charts that were shown as sparklines, once the turn is on screen."""
+        for company in companies:
+            # Gracz mógł już przejść do następnej tury
+            if self.turn_counter != turn or not self.game_started:
+                return
             get_data_chart(company)
-
-        # Update the action widgets with new chart images
-        self.action_manager.update_selected_action_charts()
-        self.action_manager.update_value_labels_by_stock()
-
-        #Update Balance
-        total_value = sum(int(widget.value_label.text()) for widget in self.action_manager.action_widgets)
-        new_balance = self.unspent_money + total_value
-        self.player_manager.set_player_balance(new_balance)
-        self.balance.setText(f"$ {new_balance}")
-
-        # #Updating NPC Dialogue
-        budget = self.player_manager.get_player_balance()
-        for i, npc_widget in enumerate(self.npc_manager.npc_widgets):
-            self.npc_manager.update_dialog_ai(i, player_balance=budget, selected_companies=selected_companies)
-
-        loading.close()
+            selected = self.action_manager.get_selected_actions()
+            if company in selected:
+                self.action_manager.update_action_chart(selected.index(company))
+            QApplication.processEvents()
 
     def start_game(self):
+        # Każdy gracz musi mieć komplet akcji; pokaż pierwszego, któremu czegoś brakuje
+        self.sync_active_player()
+        unready = self.roster.unready()
+        if unready and self.roster.active not in unready:
+            self.switch_player(unready[0])
         player_data = self.player_manager.get_player_data()
         
         # Sprawdź czy wszystkie akcje wybrane
@@ -443,16 +642,30 @@ class GamePage(QWidget):
         
         # Jeśli wszystko OK - rozpocznij grę
         self.game_started = True
+        self.started_at = time.monotonic()
+        self.sync_active_player()
+        self.roster.open()
+        self.start_what_if()
         self.unspent_money = self.player_manager.get_player_balance()
+        self.initial_investments = [widget.quantity for widget in self.action_manager.action_widgets]
+        self.start_balance = self.unspent_money + sum(self.initial_investments)
         self.main_window.settings_page.disable_difficulty_buttons()
         self.turn_counter = 0
-        for widget in self.action_manager.action_widgets:
-            widget.hide_controls()
+        with self.action_manager.updates_suspended():
+            for widget in self.action_manager.action_widgets:
+                widget.hide_controls()
+        self.show_positions()
+        # Punkt startowy wykresu: portfel przed pierwszą turą
+        for history in self.roster.histories:
+            history.clear()
+        self.equity_view.set_tickers(self.action_manager.get_selected_actions())
+        self.record_history()
         self.update_turn_display()
 
         # Ukryj Random i Start, pokaż Continue
         self.btn_random.hide()
         self.btn_start.hide()
+        self.btn_add_player.hide()
         self.btn_continue.show()
 
         # Pokaż komunikat o rozpoczęciu gry
@@ -482,45 +695,209 @@ class GamePage(QWidget):
 
     def game_over(self):
         """Wyświetla okno Game Over i resetuje grę"""
+        self.sync_active_player()
+        ranking = self.roster.standings()
+        self.record_scores(ranking)
+        if len(self.roster) > 1:
+            # Okno pokazuje zwycięzcę i jego analizę; ranking ma analizę każdego gracza
+            self.switch_player(ranking[0][0])
         player_data = self.player_manager.get_player_data()
-        final_balance = self.player_manager.get_player_balance()
+        final_balance = self.player_manager.get_net_worth()
+        # Skończonej gry nie da się wznowić
+        savegame.delete_snapshot()
 
-        dialog = GameOverDialog(self, player_data['name'], final_balance)
-        result = dialog.exec()
+        self.game_over_dialog = GameOverDialog(self, player_data['name'], final_balance,
+                                               self.what_if_for(self.roster.active), self.game_over_standings())
+        result = self.game_over_dialog.exec()
+        self.game_over_dialog = None
 
         if result == QDialog.DialogCode.Accepted:
             self.main_window.show_menu()
         else:
             self.reset_game()
 
+    def elapsed_seconds(self):
+        """Time played so far, including the time before a save and resume."""
+        return time.monotonic() - self.started_at if self.started_at is not None else 0.0
+
+    def record_scores(self, ranking):
+        """Adds every player's final balance to the local leaderboard (one transaction)."""
+        difficulty = self.main_window.settings_page.get_difficulty_id()
+        duration = self.elapsed_seconds()
+        get_leaderboard().record_many(
+            (name, difficulty, cents, self.roster.selected[index], self.turn_counter + 1, duration)
+            for index, name, cents in ranking)
+
+
+    # --- zapis i wznowienie gry ---
+    def snapshot(self):
+        """The game in progress as a JSON-ready dict (see savegame.py)."""
+        ledger = self.player_manager.ledger
+        selected = list(self.action_manager.get_selected_actions())
+        self.sync_active_player()
+        return {
+            "turn": self.turn_counter,
+            "difficulty": self.main_window.settings_page.get_difficulty_id(),
+            "unspent_money": self.unspent_money,
+            "start_balance": self.start_balance,
+            "initial_investments": self.initial_investments,
+            "selected": selected,
+            "cash_cents": ledger.cash_cents,
+            "positions_cents": list(ledger.positions),
+            "cost_cents": list(ledger.cost_cents),
+            "player": dict(self.player_manager.get_player_data()),
+            "npc_dialogues": self.npc_manager.get_dialogues(),
+            "prices": savegame.turn_prices(self.roster.tickers(), self.turn_counter),
+            "roster": self.roster.to_dict(),
+            "elapsed_seconds": self.elapsed_seconds(),
+        }
+
+    def save_game(self):
+        savegame.write_snapshot(self.snapshot())
+
+    def save_late_reply(self, index):
+        """Saves again when a late NPC reply is shown, so a resumed game has it too."""
+        # Po ostatniej turze zapis jest już usunięty (game_over)
+        if self.game_started and self.turn_counter < self.max_turns:
+            self.save_game()
+
+    def resume_game(self):
+        """Loads the saved game, if there is one. Returns True when a game was resumed."""
+        snapshot = savegame.load_snapshot()
+        if snapshot is None:
+            return False
+        try:
+            self.restore(snapshot)
+        except (KeyError, TypeError, ValueError, IndexError) as e:
+            print(f"Warning: The saved game is damaged, starting a new one: {e}")
+            savegame.delete_snapshot()
+            self.reset_game()
+            return False
+        return True
+
+    def restore(self, snapshot):
+        """Shows the saved turn straight away, from local files only (no download, no AI)."""
+        settings = self.main_window.settings_page
+        button = settings.difficulty_group.button(snapshot["difficulty"])
+        if button is not None:
+            button.setChecked(True)
+        settings.disable_difficulty_buttons()
+
+        self.game_started = True
+        self.started_at = time.monotonic() - snapshot.get("elapsed_seconds", 0.0)
+        self.turn_counter = snapshot["turn"]
+        self.unspent_money = snapshot["unspent_money"]
+        self.start_balance = snapshot["start_balance"]
+        self.initial_investments = list(snapshot["initial_investments"])
+        player = snapshot["player"]
+        self.player_manager.update_player_data(player["name"], player["avatar"], player["dialogue"])
+        for i, dialogue in enumerate(snapshot["npc_dialogues"]):
+            self.npc_manager.set_dialogue(i, dialogue)
+
+        self.action_manager.selected_actions = list(snapshot["selected"])
+        self.player_manager.ledger.restore(snapshot["cash_cents"], snapshot["positions_cents"],
+                                           snapshot["cost_cents"])
+        # Zapis sprzed gry wieloosobowej ma tylko jednego gracza
+        if "roster" in snapshot:
+            self.roster.load(snapshot["roster"])
+            self.history = self.equity_view.history = self.roster.histories[self.roster.active]
+        else:
+            self.reset_players()
+            self.history.load(snapshot.get("history", {}))
+            self.roster.openings[0] = {"unspent_money": self.unspent_money, "start_balance": self.start_balance,
+                                       "initial_investments": self.initial_investments}
+        self.sync_active_player()
+        self.render_player_button()
+        self.equity_view.set_tickers(self.action_manager.get_selected_actions())
+        self.start_what_if()
+
+        savegame.restore_turn_files(snapshot)
+        with self.action_manager.updates_suspended():
+            for widget in self.action_manager.action_widgets:
+                widget.hide_controls()
+            self.action_manager.update_selected_action_charts()
+            self.action_manager.update_indicator_tooltips(
+                get_indicator_engine().turn_indicators(self.turn_counter, self.roster.tickers()))
+        self.show_positions()
+
+        self.btn_random.hide()
+        self.btn_start.hide()
+        self.btn_add_player.hide()
+        self.btn_continue.show()
+
+        resume_text = f"<b style='color: rgb(255, 215, 0); font-size: 30px;'>{player['name']}</b><br><br>"
+        resume_text += f"Welcome back! Turn {self.turn_counter+1} of {self.max_turns+1}<br><br>"
+        resume_text += f"Selected actions: {', '.join(self.action_manager.get_selected_actions())}"
+        self.dialogText.setText(resume_text)
+        self.DialogBox.verticalScrollBar().setValue(0)
+
+    def render_balance(self):
+        """Shows the unspent cash while picking stocks and the whole net worth once the game runs."""
+        ledger = self.player_manager.ledger
+        cents = ledger.total_cents if self.game_started else ledger.cash_cents
+        self.balance.setText(f"$ {format_money(cents)}")
+
+    def start_what_if(self):
+        """Starts the what-if evaluation of every player's opening portfolio in the background."""
+        self.what_if_runner.start(
+            [(index, selected, opening)
+             for index, (selected, opening) in enumerate(zip(self.roster.selected, self.roster.openings))
+             if opening is not None],
+            self.max_turns)
+
+    def what_if_for(self, index):
+        """A player's what-if summary, WHAT_IF_PENDING while it runs, None when it is not available."""
+        if self.what_if_runner.is_pending(index):
+            return WHAT_IF_PENDING
+        return self.what_if_runner.results.get(index)
+
+    def game_over_standings(self):
+        """[(name, final balance, what-if)] from the richest player down; None for a single player."""
+        if len(self.roster) < 2:
+            return None
+        return [(name, cents_to_dollars(cents), self.what_if_for(index))
+                for index, name, cents in self.roster.standings()]
+
+    def show_what_if(self, index, result):
+        """Fills in the game over window when an evaluation ends while it is open."""
+        if self.game_over_dialog is not None:
+            self.game_over_dialog.set_what_if(self.what_if_for(self.roster.active), self.game_over_standings())
 
     def reset_game(self):
         """Reset the game to the initial state."""
         self.game_started = False
         self.turn_counter = 0
+        self.started_at = None
+        # Only this game's files; downloads and charts stay in the data cache
         clear_stock_files()
+        get_indicator_engine().clear()
+        token_meter.clear()
+        self.what_if_runner.cancel()
+        savegame.delete_snapshot()
+        self.reset_players()
         self.unspent_money = None
+        self.start_balance = None
+        self.initial_investments = []
 
         # --- Reset player balance based on current difficulty ---
         difficulty = self.main_window.settings_page.get_difficulty_id()
-        if difficulty == 1:
-            self.player_manager.set_player_balance(2400)
-        elif difficulty == 2:
-            self.player_manager.set_player_balance(1200)
-        else:
-            self.player_manager.set_player_balance(600)
-
-        # Update balance display
-        self.balance.setText(f"$ {self.player_manager.get_player_balance()}")
+        self.player_manager.set_player_balance(get_start_balance(difficulty))
 
         # Reset action selections
-        self.action_manager.reset_selections()
-        for widget in self.action_manager.action_widgets:
-            widget.show_controls()
+        self.positions_model.set_positions([])
+        self.positions_view.hide()
+        self.history.clear()
+        self.equity_view.set_tickers([])
+        self.equity_view.hide()
+        with self.action_manager.updates_suspended():
+            self.action_manager.reset_selections()
+            for widget in self.action_manager.action_widgets:
+                widget.show_controls()
 
         # Show Random and Start buttons, hide Continue
         self.btn_random.show()
         self.btn_start.show()
+        self.btn_add_player.show()
         self.btn_continue.hide()
 
         # Enable difficulty selection
@@ -0,0 +1,80 @@
+# game_rules.py
+"""
+Game constants shared by the Qt interface and the offline tools
+(simulator, what-if engine). This module must not import PySide6.
+"""
+
+# --- kapitał startowy dla poziomów trudności (1 = easy, 2 = medium, 3 = hard) ---
+DIFFICULTY_BALANCES = {
+    1: 2400,
+    2: 1200,
+    3: 600,
+}
+
+DIFFICULTY_NAMES = {
+    1: "Easy",
+    2: "Medium",
+    3: "Hard",
+}
+
+# --- opcje akcyjne dostępne w grze ---
+STOCK_OPTIONS = {
+    "AAPL": "images/stocks/apple_logo.png",
+    "GOOG": "images/stocks/google_logo.png",
+    "MSFT": "images/stocks/microsoft_logo.png",
+    "NVDA": "images/stocks/nvidia_logo.png",
+    "AMZN": "images/stocks/amazon_logo.png",
+    "TSLA": "images/stocks/tesla_logo.png",
+    "META": "images/stocks/meta_logo.png",
+    "CSCO": "images/stocks/cisco_logo.png",
+    "PEP": "images/stocks/pepsico_logo.png",
+    "NFLX": "images/stocks/netflix_logo.png",
+    "EA": "images/stocks/ea_logo.png",
+}
+
+# --- zasady portfela ---
+PORTFOLIO_SIZE = 6
+INVESTMENT_STEP = 100
+MAX_TURNS = 3
+
+# --- pieniądze liczone w centach ---
+CENTS = 100
+
+
+def get_start_balance(difficulty):
+    """
+    Returns the starting balance for a difficulty id (unknown ids fall back to hard).
+    """
+    return DIFFICULTY_BALANCES.get(difficulty, DIFFICULTY_BALANCES[3])
+
+
+def to_cents(dollars):
+    return int(round(dollars * CENTS))
+
+
+def cents_to_dollars(cents):
+    """Whole dollars stay int so they print without a trailing '.0'."""
+    if cents % CENTS == 0:
+        return cents // CENTS
+    return cents / CENTS
+
+
+def format_money(cents):
+    """'2400' for whole dollars, '2412.37' otherwise."""
+    if cents % CENTS == 0:
+        return str(cents // CENTS)
+    sign = "-" if cents < 0 else ""
+    return f"{sign}{abs(cents) // CENTS}.{abs(cents) % CENTS:02d}"
+
+
+def format_dollars(dollars):
+    """format_money for an amount given in dollars."""
+    return format_money(to_cents(dollars))
+
+
+def revalue_cents(cents, multiplier):
+    """
+    Value of a position after one turn's price change, rounded to the cent.
+    This is the rule the game, the simulator and the what-if engine share.
+    """
+    return int(round(cents * multiplier))
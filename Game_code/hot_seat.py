@@ -0,0 +1,157 @@
+# hot_seat.py
+"""
+Local multiplayer: several players take turns at one screen (hot seat).
+
+The screen (ledger, action widgets) always shows the active player. The
+portfolios of all players live in the Roster as rows of NumPy arrays:
+cash (players,) and positions / cost basis (players, slots), in cents.
+A turn's price changes are applied to every portfolio at once: the
+players' tickers index one vector of multipliers and the whole positions
+matrix is revalued in one operation, with the same rounding as
+game_rules.revalue_cents. Prices, charts and NPC replies are produced once
+per turn for the union of the players' tickers. No PySide6 here.
+"""
+import numpy as np
+
+from Game_code.game_rules import PORTFOLIO_SIZE, cents_to_dollars
+from Game_code.portfolio_history import PortfolioHistory
+
+MAX_PLAYERS = 4
+
+
+class Roster:
+    def __init__(self, slots=PORTFOLIO_SIZE):
+        self.slots = slots
+        self.clear()
+
+    def clear(self):
+        self.players = []
+        self.selected = []
+        self.histories = []
+        # Per player: {"unspent_money", "start_balance", "initial_investments"} after the start
+        self.openings = []
+        self.cash = np.zeros(0, dtype=np.int64)
+        self.positions = np.zeros((0, self.slots), dtype=np.int64)
+        self.cost = np.zeros((0, self.slots), dtype=np.int64)
+        self.active = 0
+
+    def __len__(self):
+        return len(self.players)
+
+    # -----------------------------------
+    # Gracze
+    # -----------------------------------
+    def add(self, player_data, cash_cents, history=None):
+        """Adds a player with an empty portfolio and returns its index."""
+        self.players.append(dict(player_data))
+        self.selected.append([None] * self.slots)
+        self.histories.append(history if history is not None else PortfolioHistory(self.slots))
+        self.openings.append(None)
+        self.cash = np.append(self.cash, np.int64(cash_cents))
+        self.positions = np.vstack([self.positions, np.zeros((1, self.slots), dtype=np.int64)])
+        self.cost = np.vstack([self.cost, np.zeros((1, self.slots), dtype=np.int64)])
+        return len(self.players) - 1
+
+    def reset_cash(self, cash_cents):
+        """Every player back to `cash_cents` and no positions (difficulty change)."""
+        self.cash[:] = cash_cents
+        self.positions[:] = 0
+        self.cost[:] = 0
+
+    def store_player(self, index, ledger, selected, player_data=None):
+        """Copies the screen's state (the active player) into row `index`."""
+        self.cash[index] = ledger.cash_cents
+        self.positions[index] = ledger.positions[:self.slots]
+        self.cost[index] = ledger.cost_cents[:self.slots]
+        self.selected[index] = list(selected)
+        if player_data is not None:
+            self.players[index] = dict(player_data)
+
+    def load_player(self, index, ledger):
+        """Puts row `index` into the ledger and returns the player's tickers."""
+        ledger.restore(int(self.cash[index]), self.positions[index].tolist(), self.cost[index].tolist())
+        return list(self.selected[index])
+
+    def unready(self):
+        """Players that still miss a ticker or have an empty position."""
+        return [index for index, selected in enumerate(self.selected)
+                if None in selected or not self.positions[index].all()]
+
+    def open(self):
+        """Remembers every player's opening portfolio (for the what-if analysis)."""
+        for index in range(len(self)):
+            investments = [cents_to_dollars(int(cents)) for cents in self.positions[index]]
+            unspent = cents_to_dollars(int(self.cash[index]))
+            self.openings[index] = {"unspent_money": unspent, "start_balance": unspent + sum(investments),
+                                    "initial_investments": investments}
+
+    # -----------------------------------
+    # Tura
+    # -----------------------------------
+    def tickers(self):
+        """Tickers of all players, each once, in the order they were picked."""
+        return list(dict.fromkeys(ticker for selected in self.selected for ticker in selected
+                                  if ticker is not None))
+
+    def revalue(self, multipliers):
+        """
+        Applies {ticker: multiplier} to every position of every player at once
+        and returns the new positions matrix. Missing tickers keep their value.
+        """
+        tickers = self.tickers()
+        column = {ticker: i for i, ticker in enumerate(tickers)}
+        # Ostatnia kolumna: puste miejsce albo brak danych (mnożnik 1)
+        factors = np.array([multipliers.get(ticker, 1.0) for ticker in tickers] + [1.0])
+        index = np.array([[column.get(ticker, len(tickers)) for ticker in selected] for selected in self.selected],
+                         dtype=np.intp).reshape(len(self), self.slots)
+        # np.rint zaokrągla jak round() w revalue_cents (połówki do parzystej)
+        self.positions = np.rint(self.positions * factors[index]).astype(np.int64)
+        return self.positions
+
+    def revalue_active(self, multipliers, ledger):
+        """revalue() for every player, then the active player's new values into the on-screen ledger."""
+        positions = self.revalue(multipliers)
+        ledger.revalue_all(positions[self.active])
+        return positions
+
+    def net_worth(self):
+        """Cash plus positions of every player, in cents."""
+        return self.cash + self.positions.sum(axis=1)
+
+    def record_history(self):
+        for index, history in enumerate(self.histories):
+            history.record(int(self.cash[index]), self.positions[index])
+
+    def standings(self):
+        """[(index, name, net worth in cents)] from the richest player down."""
+        worth = self.net_worth()
+        order = sorted(range(len(self)), key=lambda index: -int(worth[index]))
+        return [(index, self.players[index]["name"], int(worth[index])) for index in order]
+
+    # -----------------------------------
+    # Zapis gry
+    # -----------------------------------
+    def to_dict(self):
+        return {
+            "active": self.active,
+            "players": self.players,
+            "selected": self.selected,
+            "openings": self.openings,
+            "cash_cents": self.cash.tolist(),
+            "positions_cents": self.positions.tolist(),
+            "cost_cents": self.cost.tolist(),
+            "histories": [history.to_dict() for history in self.histories],
+        }
+
+    def load(self, data):
+        """Replaces the roster with one saved by to_dict()."""
+        self.clear()
+        for index, player in enumerate(data["players"]):
+            history = PortfolioHistory(self.slots)
+            history.load(data["histories"][index])
+            self.add(player, data["cash_cents"][index], history)
+            self.selected[index] = list(data["selected"][index])
+            self.openings[index] = data["openings"][index]
+            self.positions[index] = data["positions_cents"][index]
+            self.cost[index] = data["cost_cents"][index]
+        self.active = data["active"]
@@ -0,0 +1,89 @@
+# http_session.py
+"""
+One long-lived HTTP session for every price request.
+
+yfinance opens its own session when none is given, and a Ticker per company
+per turn leaves connection reuse, TLS resumption and the cookie/crumb to
+chance. get_session() returns a single curl_cffi session (the backend
+yfinance itself uses, impersonating Chrome) that lives for the whole run:
+connections are kept alive and pooled, cookies and the crumb are kept, and
+every Ticker of every turn and thread is created with it.
+
+Each response reports how many new connections its transfer had to open
+(curl's NUM_CONNECTS), so the session counts connections opened versus
+reused; session_metrics() returns the totals.
+"""
+import threading
+
+from curl_cffi import CurlInfo, CurlOpt
+from curl_cffi import requests as curl_requests
+
+# Connections curl keeps open per handle (one handle per thread)
+MAX_CONNECTIONS = 8
+
+
+class SessionMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def connections_reused(self):
+        return self.requests - min(self.requests, self.connections_opened)
+
+    def record(self, new_connections):
+        with self._lock:
+            self.requests += 1
+            self.connections_opened += new_connections
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": self.connections_reused,
+            }
+
+
+class PooledSession(curl_requests.Session):
+    """curl_cffi Session that keeps connections alive and counts their reuse."""
+
+    def __init__(self, metrics=None, **kwargs):
+        kwargs.setdefault("impersonate", "chrome")
+        kwargs.setdefault("curl_infos", [CurlInfo.NUM_CONNECTS])
+        kwargs.setdefault("curl_options", {CurlOpt.MAXCONNECTS: MAX_CONNECTIONS})
+        super().__init__(**kwargs)
+        self.metrics = metrics or SessionMetrics()
+
+    def request(self, *args, **kwargs):
+        response = super().request(*args, **kwargs)
+        self.metrics.record(int(response.infos.get(CurlInfo.NUM_CONNECTS, 1)))
+        return response
+
+
+_session = None
+_lock = threading.Lock()
+
+
+def get_session():
+    """The session shared by all price requests, created on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = PooledSession()
+        return _session
+
+
+def session_metrics():
+    """{"requests", "connections_opened", "connections_reused"} of the shared session."""
+    return get_session().metrics.as_dict()
+
+
+def close_session():
+    """Closes the shared session (its pooled connections); the next request opens a new one."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,180 @@
+# indicators.py
+"""
+Technical indicators of the current turn's prices.
+
+The closes of all tickers are put into one (tickers x days) matrix, padded
+with NaN where a series is shorter, and every indicator is computed in one
+vectorized pass over it:
+
+- first / last close and the return of the turn,
+- simple moving averages of the last 5 and 20 closes,
+- realized volatility (std of daily returns, annualized),
+- max drawdown (largest fall from a running peak),
+- best and worst daily return.
+
+IndicatorEngine keeps the result per (turn, ticker set), so the action
+tiles' tooltips and the NPC prompts read the same numbers and the CSVs are
+read once per turn. No PySide6 here.
+"""
+import math
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from Game_code.stock_data import CSV_DIR, read_price_file
+
+MOVING_AVERAGES = (5, 20)
+TRADING_DAYS = 252
+CACHE_SIZE = 8
+
+FIELDS = ("days", "first", "last", "return", "sma_5", "sma_20",
+          "volatility", "max_drawdown", "best_day", "worst_day")
+
+
+class IndicatorTable:
+    """Indicators of a set of tickers; one array per field, one row per ticker."""
+
+    def __init__(self, tickers, columns):
+        self.tickers = list(tickers)
+        self.columns = columns
+        self._rows = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def __contains__(self, ticker):
+        return ticker in self._rows
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def get(self, ticker):
+        """{field: value} of a ticker; None for a ticker without prices or a value that is undefined."""
+        row = self._rows.get(ticker)
+        if row is None:
+            return None
+        stats = {}
+        for field in FIELDS:
+            value = float(self.columns[field][row])
+            stats[field] = None if math.isnan(value) else value
+        stats["days"] = int(stats["days"] or 0)
+        if stats["days"] == 0:
+            return None
+        return stats
+
+
+def compute_indicators(closes_by_ticker):
+    """IndicatorTable for {ticker: sequence of closes}, all tickers at once."""
+    tickers = list(closes_by_ticker)
+    lengths = np.array([len(closes_by_ticker[t]) for t in tickers], dtype=np.int64)
+    # Co najmniej 2 kolumny, żeby redukcje po zwrotach dziennych miały dane
+    width = max(2, int(lengths.max()) if len(lengths) else 0)
+    matrix = np.full((len(tickers), width), np.nan)
+    for row, ticker in enumerate(tickers):
+        matrix[row, :lengths[row]] = closes_by_ticker[ticker]
+
+    rows = np.arange(len(tickers))
+    has_data = lengths > 0
+    last_col = np.maximum(lengths - 1, 0)
+    columns = {"days": lengths.astype(np.float64)}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first = np.where(has_data, matrix[:, 0], np.nan)
+        last = np.where(has_data, matrix[rows, last_col], np.nan)
+        columns["first"], columns["last"] = first, last
+        # Same rule as get_price_change: a zero first close counts as no change
+        columns["return"] = np.where(first != 0, last / first - 1, 0.0)
+
+        # Moving averages of the last `window` closes, from one cumulative sum
+        sums = np.zeros((len(tickers), width + 1))
+        np.cumsum(np.nan_to_num(matrix), axis=1, out=sums[:, 1:])
+        for window in MOVING_AVERAGES:
+            start = np.maximum(lengths - window, 0)
+            sma = (sums[rows, lengths] - sums[rows, start]) / window
+            columns[f"sma_{window}"] = np.where(lengths >= window, sma, np.nan)
+
+        daily = matrix[:, 1:] / matrix[:, :-1] - 1
+        daily[~np.isfinite(daily)] = np.nan
+        count = np.sum(~np.isnan(daily), axis=1)
+        mean = np.nansum(daily, axis=1) / count
+        variance = np.nansum((daily - mean[:, None]) ** 2, axis=1) / (count - 1)
+        columns["volatility"] = np.where(count > 1, np.sqrt(variance * TRADING_DAYS), np.nan)
+        # fmax/fmin skip NaN padding without warnings
+        columns["best_day"] = np.fmax.reduce(daily, axis=1)
+        columns["worst_day"] = np.fmin.reduce(daily, axis=1)
+
+        peaks = np.fmax.accumulate(matrix, axis=1)
+        drawdowns = np.where(peaks > 0, matrix / peaks - 1, np.nan)
+        columns["max_drawdown"] = np.fmin.reduce(drawdowns, axis=1)
+
+    return IndicatorTable(tickers, columns)
+
+
+def load_closes(tickers, folder=None):
+    """{ticker: closes} from the *_history.csv files in `folder` (tickers without a file are skipped)."""
+    folder = folder or CSV_DIR
+    closes = {}
+    for ticker in tickers:
+        data = read_price_file(os.path.join(folder, f"{ticker}_history.csv"))
+        if data is not None:
+            closes[ticker] = data[1]
+    return closes
+
+
+def folder_tickers(folder=None):
+    """Tickers that have a *_history.csv file in `folder`."""
+    folder = folder or CSV_DIR
+    return [file.replace("_history.csv", "") for file in os.listdir(folder) if file.endswith("_history.csv")]
+
+
+def describe(stats):
+    """Indicator lines shared by tooltips and prompts."""
+    lines = [f"Return: {_percent(stats['return'])}"]
+    for window in MOVING_AVERAGES:
+        value = stats[f"sma_{window}"]
+        if value is not None:
+            lines.append(f"{window}-day average: {value:.2f}")
+    if stats["volatility"] is not None:
+        lines.append(f"Volatility: {stats['volatility'] * 100:.1f}% a year")
+    if stats["max_drawdown"] is not None:
+        lines.append(f"Max drawdown: {_percent(stats['max_drawdown'])}")
+    if stats["best_day"] is not None:
+        lines.append(f"Best day: {_percent(stats['best_day'])}")
+        lines.append(f"Worst day: {_percent(stats['worst_day'])}")
+    return lines
+
+
+def _percent(fraction):
+    return f"{fraction * 100:+.1f}%"
+
+
+class IndicatorEngine:
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        # (turn, tickers) -> IndicatorTable
+        self._tables = OrderedDict()
+
+    def turn_indicators(self, turn, tickers, folder=None):
+        """Indicators of the tickers for a turn, computed on the first call."""
+        key = (turn, tuple(sorted(set(tickers))), folder)
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            return table
+        table = compute_indicators(load_closes(key[1], folder))
+        self._tables[key] = table
+        if len(self._tables) > self.cache_size:
+            self._tables.popitem(last=False)
+        return table
+
+    def clear(self):
+        self._tables.clear()
+
+
+_engine = None
+
+
+def get_indicator_engine():
+    """The engine shared by the whole game, created on first use."""
+    global _engine
+    if _engine is None:
+        _engine = IndicatorEngine()
+    return _engine
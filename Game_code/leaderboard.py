@@ -0,0 +1,152 @@
+# leaderboard.py
+"""
+Local leaderboard of finished games in SQLite.
+
+One row per player per finished game: name, difficulty, final balance in
+cents (the score), tickers, turns played, duration and when it ended. The
+index on (difficulty, score) serves both the insert and every read:
+
+- a page of the best games is a range scan of that index, no sort;
+- the next page starts after the last row of the previous one (score, id)
+  instead of using OFFSET, so page 1000 costs the same as page 1.
+
+The database runs in WAL mode with synchronous=NORMAL: recording a game is
+one small transaction with no fsync on the way, so the game over screen
+does not wait for the disk. No PySide6 here.
+"""
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+from Game_code.data_cache import user_cache_root
+
+PAGE_SIZE = 10
+
+Score = namedtuple("Score", "id name difficulty score_cents tickers turns duration_seconds finished_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    difficulty INTEGER NOT NULL,
+    score_cents INTEGER NOT NULL,
+    tickers TEXT NOT NULL,
+    turns INTEGER NOT NULL,
+    duration_seconds REAL NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_difficulty_score ON games (difficulty, score_cents DESC);
+"""
+
+INSERT = ("INSERT INTO games (name, difficulty, score_cents, tickers, turns, duration_seconds, finished_at) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+COLUMNS = "id, name, difficulty, score_cents, tickers, turns, duration_seconds, finished_at"
+
+
+def leaderboard_path():
+    """$DEATHMONOPOLY_LEADERBOARD, else leaderboard.sqlite3 in the per-user directory."""
+    return os.getenv("DEATHMONOPOLY_LEADERBOARD") or os.path.join(user_cache_root(), "leaderboard.sqlite3")
+
+
+def _score(row):
+    id_, name, difficulty, score_cents, tickers, turns, duration, finished_at = row
+    return Score(id_, name, difficulty, score_cents, tickers.split(",") if tickers else [], turns, duration,
+                 finished_at)
+
+
+class Leaderboard:
+    def __init__(self, path=None):
+        self.path = path or leaderboard_path()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.executescript(SCHEMA)
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self._connection = connection
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    # -----------------------------------
+    # Zapis
+    # -----------------------------------
+    def record(self, name, difficulty, score_cents, tickers, turns, duration_seconds, finished_at=None):
+        """Adds a finished game and returns its id (None when the database cannot be written)."""
+        row = (name, difficulty, score_cents, tickers, turns, duration_seconds, finished_at)
+        try:
+            connection = self._connect()
+            with connection:
+                return connection.execute(INSERT, self._row(row)).lastrowid
+        except sqlite3.Error as e:
+            print(f"Warning: Could not record the game on the leaderboard: {e}")
+            return None
+
+    def record_many(self, games):
+        """Adds many games (tuples in record()'s argument order) in one transaction."""
+        try:
+            connection = self._connect()
+            with connection:
+                connection.executemany(INSERT, (self._row(game) for game in games))
+        except sqlite3.Error as e:
+            print(f"Warning: Could not record the games on the leaderboard: {e}")
+            return False
+        return True
+
+    @staticmethod
+    def _row(game):
+        name, difficulty, score_cents, tickers, turns, duration_seconds, *finished_at = game
+        finished_at = finished_at[0] if finished_at and finished_at[0] is not None else time.time()
+        return (str(name), int(difficulty), int(score_cents), ",".join(tickers), int(turns),
+                float(duration_seconds), finished_at)
+
+    # -----------------------------------
+    # Odczyt
+    # -----------------------------------
+    def page(self, difficulty, limit=PAGE_SIZE, after=None):
+        """
+        Up to `limit` best games of a difficulty, highest score first (earlier
+        game first on a tie). `after` is the last Score of the previous page.
+        """
+        try:
+            return [_score(row) for row in self._connect().execute(*self._page_query(difficulty, limit, after))]
+        except sqlite3.Error as e:
+            print(f"Warning: Could not read the leaderboard: {e}")
+            return []
+
+    def query_plan(self, difficulty, limit=PAGE_SIZE, after=None):
+        """SQLite's plan for page(), e.g. to check that it reads the index without sorting."""
+        query, params = self._page_query(difficulty, limit, after)
+        return " | ".join(row[-1] for row in self._connect().execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+    @staticmethod
+    def _page_query(difficulty, limit, after):
+        query = f"SELECT {COLUMNS} FROM games WHERE difficulty = ?"
+        params = [difficulty]
+        if after is not None:
+            # Zakres indeksu od wyniku poprzedniej strony; remisy już pokazane są pomijane
+            query += " AND score_cents <= ? AND NOT (score_cents = ? AND id <= ?)"
+            params += [after.score_cents, after.score_cents, after.id]
+        return query + " ORDER BY score_cents DESC, id LIMIT ?", params + [limit]
+
+
+_leaderboard = None
+
+
+def get_leaderboard():
+    global _leaderboard
+    if _leaderboard is None:
+        _leaderboard = Leaderboard()
+    return _leaderboard
@@ -0,0 +1,134 @@
+import html
+from PySide6.QtWidgets import QDialog, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QButtonGroup
+from PySide6.QtGui import QFont
+from PySide6.QtCore import Qt
+from Game_code.game_rules import DIFFICULTY_NAMES, cents_to_dollars, format_dollars
+from Game_code.leaderboard import PAGE_SIZE
+
+# Styl tekstowych przycisków taki jak ME / $ / ~ w grze
+BUTTON_STYLE = """
+    QPushButton {
+        background-color: rgba(38, 39, 59, 0.8);
+        color: white;
+        font-size: 18px;
+        font-weight: bold;
+        border: 2px solid rgb(255, 215, 0);
+        border-radius: 8px;
+    }
+    QPushButton:hover, QPushButton:checked {
+        background-color: rgba(255, 215, 0, 1);
+    }
+    QPushButton:pressed {
+        background-color: rgb(255, 165, 0);
+    }
+    QPushButton:disabled {
+        color: gray;
+        border-color: gray;
+    }
+"""
+
+
+class LeaderboardDialog(QDialog):
+    """Tabela najlepszych wyników, stronami po PAGE_SIZE gier"""
+    def __init__(self, parent, leaderboard, difficulty=1):
+        super().__init__(parent)
+        self.leaderboard = leaderboard
+        self.difficulty = difficulty
+        # Ostatni wiersz poprzedniej strony dla każdej otwartej strony (None = pierwsza)
+        self.cursors = [None]
+        self.rows = []
+        self.has_next = False
+
+        self.setWindowTitle("Leaderboard")
+        self.setStyleSheet("background-color: rgb(38, 39, 59);")
+        self.setFixedSize(760, 560)
+
+        layout = QVBoxLayout(self)
+
+        # --- Poziom trudności ---
+        difficulty_layout = QHBoxLayout()
+        self.difficulty_group = QButtonGroup(self)
+        for difficulty_id, name in DIFFICULTY_NAMES.items():
+            button = QPushButton(name.upper())
+            button.setCheckable(True)
+            button.setFixedSize(150, 34)
+            button.setStyleSheet(BUTTON_STYLE)
+            self.difficulty_group.addButton(button, difficulty_id)
+            difficulty_layout.addWidget(button)
+        self.difficulty_group.idClicked.connect(self.show_difficulty)
+        layout.addLayout(difficulty_layout)
+
+        # --- Tabela ---
+        self.table = QLabel()
+        self.table.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter)
+        self.table.setFont(QFont("Helvetica", 14))
+        self.table.setStyleSheet("color: white; padding: 10px;")
+        layout.addWidget(self.table, 1)
+
+        # --- Strony ---
+        pages_layout = QHBoxLayout()
+        self.btn_prev = QPushButton("<")
+        self.btn_next = QPushButton(">")
+        btn_close = QPushButton("CLOSE")
+        self.page_label = QLabel()
+        self.page_label.setStyleSheet("color: white; font-size: 16px;")
+        self.page_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        for button in (self.btn_prev, self.btn_next, btn_close):
+            button.setFixedSize(100 if button is btn_close else 50, 34)
+            button.setStyleSheet(BUTTON_STYLE)
+        pages_layout.addWidget(self.btn_prev)
+        pages_layout.addWidget(self.page_label)
+        pages_layout.addWidget(self.btn_next)
+        pages_layout.addStretch()
+        pages_layout.addWidget(btn_close)
+        layout.addLayout(pages_layout)
+
+        self.btn_prev.clicked.connect(self.prev_page)
+        self.btn_next.clicked.connect(self.next_page)
+        btn_close.clicked.connect(self.accept)
+
+        self.show_difficulty(difficulty)
+
+    def show_difficulty(self, difficulty):
+        self.difficulty = difficulty
+        button = self.difficulty_group.button(difficulty)
+        if button is not None:
+            button.setChecked(True)
+        self.cursors = [None]
+        self.load_page()
+
+    def next_page(self):
+        if self.has_next:
+            self.cursors.append(self.rows[-1])
+            self.load_page()
+
+    def prev_page(self):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+            self.load_page()
+
+    def load_page(self):
+        # Jeden wiersz więcej mówi, czy jest następna strona (bez liczenia wszystkich gier)
+        rows = self.leaderboard.page(self.difficulty, PAGE_SIZE + 1, after=self.cursors[-1])
+        self.has_next = len(rows) > PAGE_SIZE
+        self.rows = rows[:PAGE_SIZE]
+        page = len(self.cursors)
+        self.table.setText(self.table_text(self.rows, (page - 1) * PAGE_SIZE + 1))
+        self.page_label.setText(f"Page {page}")
+        self.btn_prev.setEnabled(page > 1)
+        self.btn_next.setEnabled(self.has_next)
+
+    @staticmethod
+    def table_text(rows, first_rank=1):
+        """Wiersze tabeli wyników (Score z leaderboard.page) jako HTML"""
+        if not rows:
+            return "<span style='font-size: 18px;'>No finished games yet.</span>"
+        header = "".join(f"<th align='left' style='color: rgb(255, 215, 0); padding: 4px 10px;'>{title}</th>"
+                         for title in ("#", "Player", "Balance", "Stocks", "Turns", "Time"))
+        lines = []
+        for rank, row in enumerate(rows, start=first_rank):
+            minutes, seconds = divmod(int(row.duration_seconds), 60)
+            cells = (rank, html.escape(row.name), f"${format_dollars(cents_to_dollars(row.score_cents))}",
+                     ", ".join(row.tickers), row.turns, f"{minutes}:{seconds:02d}")
+            lines.append("<tr>" + "".join(f"<td style='padding: 4px 10px;'>{cell}</td>" for cell in cells) + "</tr>")
+        return f"<table><tr>{header}</tr>{''.join(lines)}</table>"
@@ -0,0 +1,132 @@
+# ledger.py
+"""
+Portfolio ledger in integer cents.
+
+Cash and every position are stored as whole cents, so nothing is parsed back
+from label text and turn-by-turn price changes round to the cent instead of
+truncating whole dollars. The invested total is kept up to date on every
+change (O(1)), every change is appended to a transaction log and widgets
+render from the single `changed` signal.
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+
+from PySide6.QtCore import QObject, Signal
+
+from Game_code.game_rules import revalue_cents
+
+# kind: "cash", "set", "buy", "sell", "revalue", "restore"; amount is the change in cents
+Transaction = namedtuple("Transaction", "seq kind slot amount cash_cents invested_cents")
+
+
+class Ledger(QObject):
+    changed = Signal()
+
+    def __init__(self, cash_cents=0, parent=None):
+        super().__init__(parent)
+        self.cash_cents = cash_cents
+        self.positions = []
+        # Money put into each position (buys minus sells), without price changes
+        self.cost_cents = []
+        self.invested_cents = 0
+        self.transactions = []
+        self._batch_depth = 0
+        self._dirty = False
+
+    # -----------------------------------
+    # Odczyt
+    # -----------------------------------
+    @property
+    def total_cents(self):
+        return self.cash_cents + self.invested_cents
+
+    def position(self, slot):
+        return self.positions[slot]
+
+    def change(self, slot):
+        """Value of a position relative to the money put into it (1.0 = unchanged)."""
+        cost = self.cost_cents[slot]
+        return self.positions[slot] / cost if cost else 1.0
+
+    # -----------------------------------
+    # Zmiany
+    # -----------------------------------
+    def open_position(self):
+        """Adds an empty position and returns its slot."""
+        self.positions.append(0)
+        self.cost_cents.append(0)
+        return len(self.positions) - 1
+
+    def set_cash(self, cents):
+        delta = cents - self.cash_cents
+        self.cash_cents = cents
+        self._record("cash", None, delta)
+        self._notify()
+
+    def set_position(self, slot, cents):
+        self._move(slot, cents - self.positions[slot], "set")
+
+    def buy(self, slot, cents):
+        """Moves cents from cash into a position."""
+        self.cash_cents -= cents
+        self._move(slot, cents, "buy")
+
+    def sell(self, slot, cents):
+        """Moves cents from a position back to cash."""
+        self.cash_cents += cents
+        self._move(slot, -cents, "sell")
+
+    def revalue(self, slot, multiplier):
+        """Applies a price change to a position and returns its new value in cents."""
+        new_value = revalue_cents(self.positions[slot], multiplier)
+        self._move(slot, new_value - self.positions[slot], "revalue")
+        return new_value
+
+    def revalue_all(self, values):
+        """Sets every position to its value after the turn, computed elsewhere (hot_seat.Roster)."""
+        with self.batch():
+            for slot, value in enumerate(values):
+                self._move(slot, int(value) - self.positions[slot], "revalue")
+
+    def restore(self, cash_cents, positions, cost_cents):
+        """Loads saved cash, positions and cost basis into the existing slots."""
+        for slot, (value, cost) in enumerate(zip(positions, cost_cents)):
+            self.positions[slot] = value
+            self.cost_cents[slot] = cost
+        self.cash_cents = cash_cents
+        self.invested_cents = sum(self.positions)
+        self._record("restore", None, self.total_cents)
+        self._notify()
+
+    @contextmanager
+    def batch(self):
+        """Groups changes so `changed` is emitted once at the end."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                self._dirty = False
+                self.changed.emit()
+
+    def _move(self, slot, delta, kind):
+        self.positions[slot] += delta
+        self.invested_cents += delta
+        if kind == "set":
+            self.cost_cents[slot] = self.positions[slot]
+        elif kind != "revalue":
+            self.cost_cents[slot] += delta
+        self._record(kind, slot, delta)
+        self._notify()
+
+    def _record(self, kind, slot, amount):
+        self.transactions.append(
+            Transaction(len(self.transactions), kind, slot, amount, self.cash_cents, self.invested_cents)
+        )
+
+    def _notify(self):
+        if self._batch_depth:
+            self._dirty = True
+        else:
+            self.changed.emit()
@@ -0,0 +1,157 @@
+# loadtest.py
+"""
+Load test of the game server (server.py).
+
+    python -m Game_code.server --no-ai &
+    python -m Game_code.loadtest --sessions 30
+
+Opens --sessions WebSocket connections at once. Each one starts a game with
+a random portfolio (the simulator's strategies) and plays every turn as fast
+as the server answers; --npc also asks the NPCs after each turn. Reports the
+turn latency seen by the clients (p50/p90/p99) and, from the CPU time the
+server reports in /stats, sessions per core: how many sessions of this run
+one fully busy core would serve in the same wall time.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import urllib.request
+from urllib.parse import urlsplit, urlunsplit
+
+from websockets.asyncio.client import connect
+
+from Game_code.game_rules import DIFFICULTY_BALANCES
+from Game_code.server import DEFAULT_HOST, DEFAULT_PORT
+from Game_code.simulate import STRATEGY_FUNCTIONS, percentile
+
+DEFAULT_URL = f"ws://{DEFAULT_HOST}:{DEFAULT_PORT}/ws"
+
+
+def stats_url(url):
+    """http://host:port/stats of a ws://host:port/ws URL."""
+    parts = urlsplit(url)
+    scheme = "https" if parts.scheme == "wss" else "http"
+    return urlunsplit((scheme, parts.netloc, "/stats", "", ""))
+
+
+def fetch_stats(url):
+    with urllib.request.urlopen(stats_url(url), timeout=10) as response:
+        return json.load(response)
+
+
+async def call(websocket, request):
+    """Sends one request and returns (reply, seconds); raises RuntimeError on an error reply."""
+    started = time.perf_counter()
+    await websocket.send(json.dumps(request))
+    reply = json.loads(await websocket.recv())
+    seconds = time.perf_counter() - started
+    if "error" in reply:
+        raise RuntimeError(reply["error"])
+    return reply, seconds
+
+
+async def play_session(url, rng, difficulty=1, strategy="random", npc=False):
+    """Plays one whole game; returns the seconds every turn took."""
+    turns = []
+    async with connect(url) as websocket:
+        created, _ = await call(websocket, {"op": "new", "name": f"load-{rng.randrange(10 ** 6)}",
+                                            "difficulty": difficulty})
+        session = created["session"]
+        tickers, amounts = STRATEGY_FUNCTIONS[strategy](rng, created["options"], created["balance"])
+        state, seconds = await call(websocket, {"op": "start", "session": session,
+                                                "tickers": tickers, "amounts": amounts})
+        turns.append(seconds)
+        while True:
+            if npc:
+                await call(websocket, {"op": "npc", "session": session})
+            if state["finished"]:
+                break
+            state, seconds = await call(websocket, {"op": "next", "session": session})
+            turns.append(seconds)
+        await call(websocket, {"op": "close", "session": session})
+    return turns
+
+
+async def run(url, sessions, seed=0, difficulty=1, strategy="random", npc=False):
+    """Plays `sessions` games at once and returns the report dict."""
+    before = await asyncio.to_thread(fetch_stats, url)
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(play_session(url, random.Random(seed * 1_000_003 + index), difficulty, strategy, npc)
+          for index in range(sessions)),
+        return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    after = await asyncio.to_thread(fetch_stats, url)
+
+    failures = [result for result in results if isinstance(result, BaseException)]
+    latencies = sorted(seconds for result in results if not isinstance(result, BaseException)
+                       for seconds in result)
+    cpu = after["cpu_seconds"] - before["cpu_seconds"]
+    # Ile rdzeni serwer zajmował średnio w czasie testu
+    busy_cores = cpu / elapsed if elapsed else 0.0
+    completed = sessions - len(failures)
+    return {
+        "sessions": sessions,
+        "completed": completed,
+        "failed": len(failures),
+        "errors": sorted({str(failure) for failure in failures})[:5],
+        "turns": len(latencies),
+        "seconds": elapsed,
+        "turns_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "turn_ms": {name: percentile(latencies, fraction) * 1000
+                    for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))},
+        "server_cpu_seconds": cpu,
+        "server_busy_cores": busy_cores,
+        "sessions_per_core": completed / busy_cores if busy_cores else float(completed),
+        "prices": after["prices"],
+        "charts": after["charts"],
+        "replies": after["replies"],
+    }
+
+
+def print_report(report):
+    print(f"Sessions:          {report['completed']} of {report['sessions']} completed "
+          f"({report['turns']} turns in {report['seconds']:.2f}s, {report['turns_per_sec']:,.1f} turns/sec)")
+    latency = report["turn_ms"]
+    print(f"Turn latency:      p50 {latency['p50']:.1f} ms  p90 {latency['p90']:.1f} ms  p99 {latency['p99']:.1f} ms")
+    print(f"Server CPU:        {report['server_cpu_seconds']:.2f}s ({report['server_busy_cores']:.2f} cores busy)")
+    print(f"Sessions per core: {report['sessions_per_core']:,.1f}")
+    for name in ("prices", "charts", "replies"):
+        shared = report[name]
+        print(f"Shared {name + ':':<11} {shared['misses']} produced, "
+              f"{shared['hits'] + shared['shared']} reused")
+    for error in report["errors"]:
+        print(f"Error: {error}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m Game_code.loadtest", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"server WebSocket URL (default: {DEFAULT_URL})")
+    parser.add_argument("--sessions", type=int, default=30, help="games played at once (default: 30)")
+    parser.add_argument("--difficulty", type=int, choices=sorted(DIFFICULTY_BALANCES), default=1)
+    parser.add_argument("--strategy", choices=sorted(STRATEGY_FUNCTIONS), default="random")
+    parser.add_argument("--npc", action="store_true", help="also ask the NPCs after every turn")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        report = asyncio.run(run(args.url, args.sessions, args.seed, args.difficulty, args.strategy, args.npc))
+    except OSError as error:
+        print(f"Cannot reach the server at {args.url}: {error}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# logos.py
+"""
+Lazy company logos.
+
+A logo is decoded the first time it is shown and kept in QPixmapCache, so a
+universe of hundreds of tickers does not decode hundreds of PNGs at startup.
+Tickers without a logo file (or with a broken one) get a generated monogram:
+the symbol on a color derived from it, stable between runs.
+"""
+import zlib
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QFont, QPainter, QPixmap, QPixmapCache
+
+# Size of the stock image tile in ActionWidget
+LOGO_WIDTH = 260
+LOGO_HEIGHT = 160
+
+
+def monogram_color(symbol):
+    hue = zlib.crc32(symbol.encode()) % 360
+    return QColor.fromHsv(hue, 150, 170)
+
+
+def monogram_pixmap(symbol, width=LOGO_WIDTH, height=LOGO_HEIGHT):
+    """Draws the ticker symbol on a colored tile."""
+    pixmap = QPixmap(width, height)
+    pixmap.fill(monogram_color(symbol))
+    painter = QPainter(pixmap)
+    try:
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        font = QFont("Arial")
+        font.setBold(True)
+        font.setPixelSize(max(8, int(min(height * 0.45, width / max(len(symbol), 2) * 1.2))))
+        painter.setFont(font)
+        painter.setPen(QColor("white"))
+        painter.drawText(pixmap.rect(), Qt.AlignmentFlag.AlignCenter, symbol)
+    finally:
+        painter.end()
+    return pixmap
+
+
+def logo_pixmap(symbol, path=None, width=LOGO_WIDTH, height=LOGO_HEIGHT, scaled=False):
+    """
+    The logo of a ticker, decoded on first use. With scaled=True the image is
+    also fitted into width x height (keeping its aspect ratio) before caching.
+    Falls back to a monogram when there is no path or the file cannot be decoded.
+    """
+    key = f"logo:{symbol}:{path}:{width}x{height}:{int(scaled)}"
+    pixmap = QPixmapCache.find(key)
+    if pixmap is not None and not pixmap.isNull():
+        return pixmap
+
+    pixmap = QPixmap(path) if path else QPixmap()
+    if pixmap.isNull():
+        pixmap = monogram_pixmap(symbol, width, height)
+    elif scaled:
+        pixmap = pixmap.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                               Qt.TransformationMode.SmoothTransformation)
+    QPixmapCache.insert(key, pixmap)
+    return pixmap
@@ -7,6 +7,8 @@ from Game_code.game_settings import SettingsPage, BrightnessOverlay
 import sys
 from Game_code.music import Music
 from Game_code.stock_data import clear_stock_files
+from Game_code.leaderboard import get_leaderboard
+from Game_code.leaderboard_dialog import LeaderboardDialog
 
 
 class MainWindow(QMainWindow):
@@ -68,8 +70,16 @@ class MainWindow(QMainWindow):
 
     # --- logika stron ---
     def show_menu(self):
+        self.menu_page.update_continue_button()
         self.stacked_widget.setCurrentWidget(self.menu_page)
 
+    def resume_game(self):
+        # Gra w toku jest już na ekranie; inaczej wczytaj zapis
+        if not self.game_page.game_started and not self.game_page.resume_game():
+            self.menu_page.update_continue_button()
+            return
+        self.show_game()
+
     def show_game(self):
         self.stacked_widget.setCurrentWidget(self.game_page)
         self.music.play()
@@ -77,6 +87,10 @@ class MainWindow(QMainWindow):
     def show_settings(self):
         self.stacked_widget.setCurrentWidget(self.settings_page)
 
+    def show_leaderboard(self):
+        # Otwiera się na poziomie trudności wybranym w ustawieniach
+        LeaderboardDialog(self, get_leaderboard(), self.settings_page.get_difficulty_id()).exec()
+
     # --- jasność ---
     def set_brightness(self, value):
         self.brightness_value = value
@@ -91,7 +105,7 @@ class MainWindow(QMainWindow):
 
     # --- usuwa wygenerowane pliki podczas gry ---
     def closeEvent(self, event):
-        clear_stock_files()  # delete CSV and chart files
+        clear_stock_files()  # delete this game's CSV and chart files (the data cache stays)
         event.accept()
 
 
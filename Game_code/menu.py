@@ -2,6 +2,8 @@ from PySide6.QtWidgets import (QApplication, QWidget, QPushButton, QLabel,
                              QGroupBox)
 from PySide6.QtGui import QPixmap
 import sys
+from Game_code.savegame import has_snapshot
+from Game_code.leaderboard_dialog import BUTTON_STYLE
 
 class MenuPage(QWidget):
     def __init__(self, main_window):
@@ -68,8 +70,23 @@ class MenuPage(QWidget):
         btn_exit.setGeometry(buttons_x_start, buttons_y_start + 2 * button_height + 2 * button_padding, button_width, button_height)
         btn_exit.clicked.connect(QApplication.instance().quit)
         apply_button_style(btn_exit, "images/buttons/quit-button.png")
-        
-        
+
+        # --- Przycisk KONTYNUUJ (tylko gdy jest zapisana gra) ---
+        self.btn_continue = QPushButton(self.menu_box)
+        self.btn_continue.setGeometry(buttons_x_start, buttons_y_start + 3 * button_height + 3 * button_padding, button_width, button_height)
+        self.btn_continue.clicked.connect(self.main_window.resume_game)
+        apply_button_style(self.btn_continue, "images/buttons/continue-button.png")
+        self.update_continue_button()
+
+        # --- Przycisk TABELA WYNIKÓW ---
+        self.btn_leaderboard = QPushButton("LEADERBOARD", self)
+        self.btn_leaderboard.setGeometry(1368 - 200 - 30, 30, 200, 40)
+        self.btn_leaderboard.setStyleSheet(BUTTON_STYLE)
+        self.btn_leaderboard.clicked.connect(self.main_window.show_leaderboard)
+
+    def update_continue_button(self):
+        self.btn_continue.setVisible(has_snapshot())
+
     def resizeEvent(self, event):
         self.background.resize(self.size())
         
\ No newline at end of file
@@ -1,7 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor, wait
 from PySide6.QtWidgets import QWidget, QLabel
 from PySide6.QtGui import QPixmap, QFont
-from PySide6.QtCore import Signal, Qt
-from Game_code.AI import ask_bot
+from PySide6.QtCore import QObject, Signal, Qt
+from Game_code.AI import ask_bot, build_npc_question
+
+
+def format_reply(ai_response):
+    """AI reply as HTML for the dialogue QLabel (one line per sentence)."""
+    lines = ai_response.strip().split('\n')  # Split on newline characters
+    return '<br>'.join(lines)  # Join with <br> for QLabel HTML
+
+
+class ReplyRelay(QObject):
+    """Carries late replies from the worker threads to the GUI thread."""
+    arrived = Signal(int, int, object)
+    # Indeks NPC, którego spóźniona odpowiedź została właśnie pokazana
+    applied = Signal(int)
 
 
 class NPCWidget(QWidget):
@@ -69,6 +83,13 @@ class NPCManager:
         
         self.npc_widgets = []
         self.selected_index = None
+
+        # Pytania do AI idą równolegle; spóźnione odpowiedzi wracają przez relay
+        self._executor = None
+        self._request = 0
+        self.pending = 0
+        self.relay = ReplyRelay()
+        self.relay.arrived.connect(self._apply_late_reply, Qt.ConnectionType.QueuedConnection)
     
     def create_npc_widgets(self, parent_widget):
         npc_spacing = 70
@@ -104,29 +125,79 @@ class NPCManager:
             self.npc_widgets[self.selected_index].set_selected(False)
             self.selected_index = None
 
-    def update_dialog_ai(self, index, player_balance=None, selected_companies=None):
+    def update_dialog_ai(self, index, player_balance=None, selected_companies=None, indicators=None):
         """
         Updates the 'dialogue' of the NPC at `index` using AI.
+        indicators is the turn's IndicatorTable, shared by all NPCs.
         """
         if not (0 <= index < len(self.npc_data_list)):
             return
 
         # Build the AI question
-        question = "Based on budget and the data from selected companies, choose what to invest in. Remember to be biased for Japanese and Italian companies."
-        if player_balance is not None:
-            question += f"\nBudget: {player_balance}"
-        if selected_companies:
-            question += f"\nSelected companies: {', '.join(selected_companies)}"
+        question = build_npc_question(player_balance, selected_companies)
 
         # Call AI
         npc_name = self.npc_data_list[index]["name"]
-        ai_response = ask_bot(question, personality_name=npc_name)
+        ai_response = ask_bot(question, personality_name=npc_name, indicators=indicators)
+
+        self.set_dialogue(index, format_reply(ai_response))
+
+    def update_dialogs_ai(self, player_balance=None, selected_companies=None, indicators=None, timeout=None,
+                          turn=None):
+        """
+        Asks every NPC at once, one worker thread each. Replies that arrive
+        within `timeout` seconds are shown before this returns; the others
+        keep the NPC's current line until they arrive. A reply to an older
+        request is dropped. Returns how many NPCs are still answering.
+        Tokens are counted under `turn` (AI.token_meter).
+        """
+        self._request += 1
+        request = self._request
+        question = build_npc_question(player_balance, selected_companies)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.npc_data_list), thread_name_prefix="npc")
+
+        futures = {}
+        for index, npc_data in enumerate(self.npc_data_list):
+            future = self._executor.submit(ask_bot, question, personality_name=npc_data["name"],
+                                           indicators=indicators, turn=turn)
+            futures[future] = index
+        done, late = wait(futures, timeout=timeout)
+        for future in done:
+            self._apply_reply(request, futures[future], future)
+
+        self.pending = len(late)
+        for future in late:
+            # Wywoływane w wątku roboczym; sygnał przenosi odpowiedź do wątku GUI
+            future.add_done_callback(
+                lambda done_future, index=futures[future]: self.relay.arrived.emit(request, index, done_future))
+        return self.pending
+
+    def _apply_late_reply(self, request, index, future):
+        if request == self._request:
+            self.pending -= 1
+        if self._apply_reply(request, index, future):
+            self.relay.applied.emit(index)
+
+    def _apply_reply(self, request, index, future):
+        """Shows a reply to the current request; returns True when the dialogue changed."""
+        if request != self._request:
+            return False
+        try:
+            self.set_dialogue(index, format_reply(future.result()))
+        except Exception as e:
+            print(f"Warning: {self.npc_data_list[index]['name']} did not answer: {e}")
+            return False
+        return True
+
+    def get_dialogues(self):
+        return [npc_data["dialogue"] for npc_data in self.npc_data_list]
 
-        # --- NEW: Split lines and convert to HTML for QLabel ---
-        lines = ai_response.strip().split('\n')  # Split on newline characters
-        formatted_response = '<br>'.join(lines)  # Join with <br> for QLabel HTML
-        self.npc_data_list[index]['dialogue'] = formatted_response
+    def set_dialogue(self, index, dialogue):
+        """Sets an NPC's dialogue (HTML) and its widget's label."""
+        self.npc_data_list[index]['dialogue'] = dialogue
 
         # --- UPDATE THE WIDGET'S LABEL ---
-        self.npc_widgets[index].dialogue_label.setText(formatted_response)
-        self.npc_widgets[index].dialogue_label.setTextFormat(Qt.TextFormat.RichText)
+        if index < len(self.npc_widgets):
+            self.npc_widgets[index].dialogue_label.setText(dialogue)
+            self.npc_widgets[index].dialogue_label.setTextFormat(Qt.TextFormat.RichText)
@@ -1,3 +1,7 @@
+from Game_code.game_rules import cents_to_dollars, to_cents
+from Game_code.ledger import Ledger
+
+
 class PlayerManager:
     def __init__(self):
         self.player_data = {
@@ -6,6 +10,9 @@ class PlayerManager:
             "dialogue": "You know what, sometimes I feel like this whole stock market is one big circus. But since we're already here, please tell me: what are you loading the biggest money into right now? The point is for these dollars to multiply, not melt away.",
             "balance": 2400
         }
+        # Cash and invested positions in cents; "balance" mirrors the cash
+        self.ledger = Ledger(to_cents(self.player_data["balance"]))
+        self.ledger.changed.connect(self._sync_balance)
     
     def get_player_data(self):
         return self.player_data
@@ -20,10 +27,19 @@ class PlayerManager:
         self.player_data["dialogue"] = dialogue
         
     def set_player_balance(self, balance):
-        self.player_data["balance"] = balance
+        """Sets the unspent cash."""
+        self.ledger.set_cash(to_cents(balance))
         
     def get_player_balance(self):
-        return self.player_data["balance"] 
+        """Unspent cash in dollars."""
+        return cents_to_dollars(self.ledger.cash_cents)
+
+    def get_net_worth(self):
+        """Unspent cash plus the current value of every position, in dollars."""
+        return cents_to_dollars(self.ledger.total_cents)
+
+    def _sync_balance(self):
+        self.player_data["balance"] = cents_to_dollars(self.ledger.cash_cents)
     
     def update_player_data(self, name=None, avatar=None, dialogue=None):
         if name is not None:
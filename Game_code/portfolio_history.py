@@ -0,0 +1,88 @@
+# portfolio_history.py
+"""
+Per-turn history of the portfolio.
+
+One row per recorded turn: the cash and the value of every position, in
+cents. Rows live in preallocated NumPy arrays whose capacity doubles when
+full, so recording a turn is amortized O(1) and a long game costs 8 bytes
+per position per turn. The running min/max of the total is kept so views
+can scale without rescanning. No PySide6 here.
+"""
+import numpy as np
+
+INITIAL_CAPACITY = 16
+
+
+class PortfolioHistory:
+    def __init__(self, positions, capacity=INITIAL_CAPACITY):
+        self.positions = positions
+        self._cash = np.zeros(capacity, dtype=np.int64)
+        self._values = np.zeros((capacity, positions), dtype=np.int64)
+        self._count = 0
+        self.min_total = None
+        self.max_total = None
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def capacity(self):
+        return len(self._cash)
+
+    def record(self, cash_cents, position_cents):
+        """Appends one turn: cash and the value of each position, in cents."""
+        if self._count == self.capacity:
+            self._grow()
+        row = self._count
+        self._cash[row] = cash_cents
+        self._values[row] = position_cents[:self.positions]
+        self._count += 1
+
+        total = int(self._cash[row] + self._values[row].sum())
+        self.min_total = total if self.min_total is None else min(self.min_total, total)
+        self.max_total = total if self.max_total is None else max(self.max_total, total)
+        return row
+
+    def _grow(self):
+        capacity = max(1, self.capacity) * 2
+        cash = np.zeros(capacity, dtype=np.int64)
+        values = np.zeros((capacity, self.positions), dtype=np.int64)
+        cash[:self._count] = self._cash[:self._count]
+        values[:self._count] = self._values[:self._count]
+        self._cash, self._values = cash, values
+
+    def clear(self):
+        self._count = 0
+        self.min_total = None
+        self.max_total = None
+
+    # -----------------------------------
+    # Odczyt (widoki bez kopiowania)
+    # -----------------------------------
+    def cash(self):
+        return self._cash[:self._count]
+
+    def values(self):
+        """(turns, positions) array of position values in cents."""
+        return self._values[:self._count]
+
+    def totals(self):
+        return self.cash() + self.values().sum(axis=1)
+
+    def row(self, index):
+        """(cash, position values, total) of one recorded turn."""
+        cash = int(self._cash[index])
+        values = self._values[index]
+        return cash, values, cash + int(values.sum())
+
+    # -----------------------------------
+    # Zapis gry
+    # -----------------------------------
+    def to_dict(self):
+        return {"cash": self.cash().tolist(), "values": self.values().tolist()}
+
+    def load(self, data):
+        """Replaces the history with one saved by to_dict()."""
+        self.clear()
+        for cash, values in zip(data.get("cash", []), data.get("values", [])):
+            self.record(cash, values)
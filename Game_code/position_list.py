@@ -0,0 +1,121 @@
+# position_list.py
+"""
+Model/view list of portfolio positions.
+
+PositionListModel exposes the ledger's positions as rows; PositionDelegate
+paints each row (logo, ticker, value, change) straight onto the view, so no
+widgets are created per position. PositionListView uses uniform row heights,
+which lets Qt lay out and paint only the visible rows, so the list itself
+does not grow in cost with the number of rows.
+
+The game still has PORTFOLIO_SIZE (six) positions picked and traded in the
+ActionWidget tiles; this list is a read-only overview of them behind the
+"$" button. Larger portfolios would also need the rules, the what-if
+analysis, the hot seat roster and the save format to drop the fixed size.
+"""
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QRect, QSize, Qt
+from PySide6.QtGui import QColor, QFont
+from PySide6.QtWidgets import QListView, QStyle, QStyledItemDelegate
+
+from Game_code.game_rules import format_money
+from Game_code.logos import logo_pixmap
+
+ROW_HEIGHT = 32
+
+TickerRole = Qt.ItemDataRole.UserRole + 1
+ValueRole = Qt.ItemDataRole.UserRole + 2   # value in cents
+ChangeRole = Qt.ItemDataRole.UserRole + 3  # value / money put in
+LogoRole = Qt.ItemDataRole.UserRole + 4    # image path
+
+
+class PositionListModel(QAbstractListModel):
+    def __init__(self, ledger, parent=None):
+        super().__init__(parent)
+        self.ledger = ledger
+        # (ticker, ledger slot, logo path) per row
+        self._rows = []
+        ledger.changed.connect(self.refresh)
+
+    def set_positions(self, positions):
+        """Replaces the rows; positions is a list of (ticker, slot, logo_path)."""
+        self.beginResetModel()
+        self._rows = list(positions)
+        self.endResetModel()
+
+    def refresh(self):
+        """Values changed in the ledger: one dataChanged for all rows."""
+        if self._rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self._rows) - 1),
+                                  [ValueRole, ChangeRole, Qt.ItemDataRole.DisplayRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        ticker, slot, logo = self._rows[index.row()]
+        if role == TickerRole:
+            return ticker
+        if role == ValueRole:
+            return self.ledger.position(slot)
+        if role == ChangeRole:
+            return self.ledger.change(slot)
+        if role == LogoRole:
+            return logo
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{ticker}  $ {format_money(self.ledger.position(slot))}"
+        return None
+
+
+class PositionDelegate(QStyledItemDelegate):
+    """Paints one position row; logos are scaled once and cached by logos.logo_pixmap."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ticker_font = QFont("Arial", 12, QFont.Weight.Bold)
+        self.value_font = QFont("Arial", 11)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(rect, QColor(255, 215, 0, 60))
+        elif index.row() % 2:
+            painter.fillRect(rect, QColor(255, 255, 255, 12))
+
+        icon_size = rect.height() - 6
+        left = rect.left() + 4
+        logo = logo_pixmap(index.data(TickerRole), index.data(LogoRole), icon_size, icon_size, scaled=True)
+        painter.drawPixmap(left, rect.top() + 3, logo)
+        left += icon_size + 8
+
+        change = index.data(ChangeRole)
+        value = index.data(ValueRole)
+        text_rect = QRect(left, rect.top(), rect.right() - left - 4, rect.height())
+        align = Qt.AlignmentFlag.AlignVCenter
+
+        painter.setFont(self.ticker_font)
+        painter.setPen(QColor("white"))
+        painter.drawText(text_rect, align | Qt.AlignmentFlag.AlignLeft, index.data(TickerRole))
+
+        painter.setFont(self.value_font)
+        painter.setPen(QColor(100, 255, 100) if change >= 1.0 else QColor(255, 100, 100))
+        painter.drawText(text_rect, align | Qt.AlignmentFlag.AlignRight,
+                         f"$ {format_money(value)}  {(change - 1.0) * 100:+.1f}%")
+        painter.restore()
+
+
+class PositionListView(QListView):
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setItemDelegate(PositionDelegate(self))
+        # Every row has the same height: Qt can skip measuring and only paint what is visible
+        self.setUniformItemSizes(True)
+        self.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.setSelectionMode(QListView.SelectionMode.SingleSelection)
+        self.setStyleSheet("QListView { background-color: rgba(38, 39, 59, 0.8); border: none; }")
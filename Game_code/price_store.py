@@ -0,0 +1,133 @@
+# price_store.py
+"""
+Local store of full daily price history for the whole game period.
+
+The game itself downloads one turn at a time into Stock_prizes. The offline
+tools (simulator, what-if engine) need every turn of every ticker without
+network access, so they read from this store instead. Run
+`python -m Game_code.simulate --download` once while online to fill it.
+
+Each series is indexed once (trading_calendar.TradingIndex) and kept as a
+NumPy array, so a turn is a row slice found by binary search.
+"""
+import csv
+import os
+
+import numpy as np
+
+from Game_code.game_rules import MAX_TURNS
+from Game_code.trading_calendar import DEFAULT_SCHEDULE, TradingIndex
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_DIR = os.path.join(REPO_DIR, "Stock_history")
+
+
+class PriceStore:
+    def __init__(self, history_dir=HISTORY_DIR, schedule=DEFAULT_SCHEDULE):
+        self.history_dir = history_dir
+        self.schedule = schedule
+        # ticker -> (dates, closes), loaded lazily
+        self._series = {}
+        # ticker -> (TradingIndex, closes as float64 array)
+        self._arrays = {}
+
+    def history_path(self, ticker):
+        return os.path.join(self.history_dir, f"{ticker}.csv")
+
+    def has(self, ticker):
+        return ticker in self._series or os.path.exists(self.history_path(ticker))
+
+    def missing(self, tickers):
+        """Returns the tickers that have no local history."""
+        return [ticker for ticker in tickers if not self.has(ticker)]
+
+    def load(self, ticker):
+        """
+        Returns (dates, closes) for a ticker. Dates are "YYYY-MM-DD" strings.
+        Raises FileNotFoundError if the ticker was never downloaded.
+        """
+        series = self._series.get(ticker)
+        if series is not None:
+            return series
+
+        dates, closes = [], []
+        with open(self.history_path(ticker), newline="") as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            date_idx = header.index("Date")
+            close_idx = header.index("Close")
+            for row in reader:
+                if not row[close_idx]:
+                    continue
+                dates.append(row[date_idx][:10])
+                closes.append(float(row[close_idx]))
+
+        series = (dates, closes)
+        self._series[ticker] = series
+        return series
+
+    def series(self, ticker):
+        """(TradingIndex, closes array) of a ticker, built once."""
+        arrays = self._arrays.get(ticker)
+        if arrays is None:
+            dates, closes = self.load(ticker)
+            arrays = self._arrays[ticker] = (TradingIndex(dates), np.asarray(closes, dtype=np.float64))
+        return arrays
+
+    def rows(self, ticker, turn):
+        """[start_row, end_row) of a turn in the ticker's history."""
+        index, _ = self.series(ticker)
+        return self.schedule.rows(index, turn)
+
+    def window(self, ticker, turn):
+        """Closing prices of a ticker inside the window of a turn (a view of the array)."""
+        _, closes = self.series(ticker)
+        start_row, end_row = self.rows(ticker, turn)
+        return closes[start_row:end_row]
+
+    def turn_multiplier(self, ticker, turn):
+        """
+        Same rule as get_price_change: last / first close of the turn window.
+        """
+        _, closes = self.series(ticker)
+        start_row, end_row = self.rows(ticker, turn)
+        if end_row <= start_row or closes[start_row] == 0:
+            return 1.0
+        return float(closes[end_row - 1] / closes[start_row])
+
+    def turn_multipliers(self, tickers, max_turns=MAX_TURNS):
+        """
+        Returns {ticker: [multiplier for turn 0..max_turns]}.
+        The windows are resolved for all turns at once with one searchsorted per ticker.
+        """
+        starts, ends = self.schedule.bounds_array(max_turns + 1)
+        result = {}
+        for ticker in tickers:
+            index, closes = self.series(ticker)
+            start_rows, end_rows = index.rows_many(starts, ends)
+            multipliers = np.ones(len(starts))
+            valid = end_rows > start_rows
+            first = closes[start_rows[valid]]
+            last = closes[end_rows[valid] - 1]
+            ratios = np.ones(len(first))
+            np.divide(last, first, out=ratios, where=first != 0)
+            multipliers[valid] = ratios
+            result[ticker] = multipliers.tolist()
+        return result
+
+    def download(self, tickers, max_turns=MAX_TURNS):
+        """
+        Downloads the history covering turns 0..max_turns for every ticker.
+        This is the only method that needs network access.
+        """
+        import yfinance as yf
+        from Game_code.http_session import get_session
+
+        os.makedirs(self.history_dir, exist_ok=True)
+        start_date, end_date = self.schedule.period(max_turns)
+        for ticker in tickers:
+            data = yf.Ticker(ticker, session=get_session()).history(start=start_date, end=end_date)
+            data.to_csv(self.history_path(ticker))
+            self._series.pop(ticker, None)
+            self._arrays.pop(ticker, None)
+            print(f"Saved history for {ticker} -> {self.history_path(ticker)}")
@@ -0,0 +1,94 @@
+# savegame.py
+"""
+Save and resume of a game in progress.
+
+A snapshot is one compact JSON file written after every turn: turn number,
+difficulty, selected tickers, the ledger (cash, positions, cost basis), the
+player's data, the NPC dialogue and, per ticker, the data cache key of the
+turn's prices plus its closing prices. Resuming copies the prices back from
+the cache, or rebuilds the CSV from the saved closes when the cache entry is
+gone, and renders the charts locally (usually a cache hit too), so no
+download and no AI call is needed. The file is replaced atomically, so a
+crash during a save keeps the previous turn.
+"""
+import json
+import os
+
+from Game_code.data_cache import atomic_write, get_cache, user_cache_root
+from Game_code.stock_data import get_data_chart, history_path, ingest_summary, price_cache_key, read_prices
+
+SAVE_VERSION = 1
+
+
+def save_path():
+    """$DEATHMONOPOLY_SAVE, else savegame.json in the per-user directory."""
+    return os.getenv("DEATHMONOPOLY_SAVE") or os.path.join(user_cache_root(), "savegame.json")
+
+
+def turn_prices(tickers, turn):
+    """{ticker: {"key", "dates", "closes"}} of the current turn's CSV files."""
+    prices = {}
+    for ticker in tickers:
+        data = read_prices(ticker)
+        dates, closes = data if data is not None else ([], [])
+        prices[ticker] = {"key": price_cache_key(ticker, turn), "dates": dates, "closes": closes}
+    return prices
+
+
+def write_snapshot(snapshot, path=None):
+    path = path or save_path()
+    data = json.dumps(dict(snapshot, version=SAVE_VERSION), separators=(",", ":")).encode("utf-8")
+
+    def write(tmp):
+        with open(tmp, "wb") as file:
+            file.write(data)
+
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        atomic_write(path, write)
+    except OSError as e:
+        print(f"Warning: Could not save the game: {e}")
+        return False
+    return True
+
+
+def load_snapshot(path=None):
+    """The saved snapshot, or None if there is none or it cannot be used."""
+    path = path or save_path()
+    try:
+        with open(path, encoding="utf-8") as file:
+            snapshot = json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read the saved game: {e}")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SAVE_VERSION:
+        print("Warning: The saved game is from another version, ignoring it.")
+        return None
+    return snapshot
+
+
+def has_snapshot(path=None):
+    return os.path.exists(path or save_path())
+
+
+def delete_snapshot(path=None):
+    try:
+        os.remove(path or save_path())
+    except OSError:
+        pass
+
+
+def restore_turn_files(snapshot):
+    """Recreates the saved turn's CSV and chart files without going online."""
+    cache = get_cache()
+    for ticker, saved in snapshot["prices"].items():
+        csv_file = history_path(ticker)
+        if not cache.fetch("prices", saved["key"], csv_file):
+            rows = "".join(f"{date},{close!r}\n" for date, close in zip(saved["dates"], saved["closes"]))
+            os.makedirs(os.path.dirname(csv_file), exist_ok=True)
+            with open(csv_file, "w", newline="") as file:
+                file.write("Date,Close\n" + rows)
+        ingest_summary(ticker, saved["key"])
+        get_data_chart(ticker)
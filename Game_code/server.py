@@ -0,0 +1,420 @@
+# server.py
+"""
+Headless game server: a whole classroom plays from one machine.
+
+    python -m Game_code.server --port 8765
+    python -m Game_code.loadtest --sessions 30
+
+One asyncio process runs the game rules without Qt (hot_seat.Roster and
+game_rules) for many sessions at once, and the sessions share everything
+that does not depend on the player:
+
+- prices: each (ticker, turn) window is fetched once, through the same data
+  cache, negative cache and circuit breaker as the game (stock_data), and
+  kept in memory for every session;
+- charts: rendered once per window by the shared ChartRenderer, stored in
+  the data cache ("charts", same keys as the game) and served over HTTP;
+- NPC replies: asked once per (persona, turn, tickers). The question has no
+  budget in it, so sessions that picked the same stocks share the replies.
+
+Blocking work (downloads, rendering) runs in worker threads; a request for
+a key that is already being produced waits for that result instead of
+starting another one.
+
+API, JSON over the WebSocket at /ws (one reply per message, "id" is echoed):
+    {"op": "new", "name": "Ala", "difficulty": 1}
+    {"op": "start", "session": id, "tickers": [6 tickers], "amounts": [6 dollar amounts]}
+    {"op": "next", "session": id}
+    {"op": "npc", "session": id}
+    {"op": "state", "session": id}
+    {"op": "close", "session": id}
+Errors come back as {"error": message}. Plain HTTP GET: /health, /stats,
+/sessions/<id> and /charts/<ticker>/<turn>.png (only tickers the server
+offers and turns 0..max_turns; anything else is a 404). At most
+--max-sessions games run at once.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import secrets
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict, deque
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from websockets.asyncio.server import serve
+
+from Game_code.chart_renderer import get_chart_renderer
+from Game_code.data_cache import cache_key, get_cache
+from Game_code.game_rules import DIFFICULTY_BALANCES, MAX_TURNS, cents_to_dollars, get_start_balance, to_cents
+from Game_code.hot_seat import Roster
+from Game_code.simulate import check_portfolio, percentile
+from Game_code.stock_data import fetch_turn_csv, price_change, read_price_file
+from Game_code.universe import load_universe
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Ile gier naraz (każda sesja trzyma Roster w pamięci)
+MAX_SESSIONS = 500
+
+# Ile wyników trzyma każda wspólna pamięć
+PRICE_ENTRIES = 4096
+CHART_ENTRIES = 4096
+REPLY_ENTRIES = 2048
+# Ile ostatnich czasów tury wchodzi do percentyli w /stats
+LATENCY_WINDOW = 10000
+
+CHART_PATH = re.compile(r"/charts/([A-Za-z0-9.\-^=]+)/(\d+)\.png")
+
+
+class SharedResults:
+    """
+    Results by key, produced once: the first caller starts the coroutine,
+    concurrent callers wait for the same task, later callers get the kept
+    result (LRU of max_entries). Failed results, and results `keep` rejects,
+    are not kept.
+    """
+
+    def __init__(self, max_entries, keep=None):
+        self.max_entries = max_entries
+        self.keep = keep
+        self._results = OrderedDict()
+        self._running = {}
+        self.hits = 0
+        self.shared = 0
+        self.misses = 0
+
+    async def get(self, key, produce):
+        if key in self._results:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return self._results[key]
+        task = self._running.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._running[key] = asyncio.ensure_future(produce())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.shared += 1
+        # Anulowanie jednego klienta nie przerywa pracy, na którą czekają inni
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        self._running.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self.keep is not None and not self.keep(task.result()):
+            return
+        self._results[key] = task.result()
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def stats(self):
+        return {"entries": len(self._results), "hits": self.hits, "shared": self.shared, "misses": self.misses}
+
+
+class GameSession:
+    """One player's game on the server: a one-player Roster and the turn counter."""
+
+    def __init__(self, session_id, name, difficulty, max_turns=MAX_TURNS):
+        if difficulty not in DIFFICULTY_BALANCES:
+            raise ValueError(f"Unknown difficulty {difficulty!r}")
+        self.id = session_id
+        self.difficulty = difficulty
+        self.balance = get_start_balance(difficulty)
+        self.max_turns = max_turns
+        self.roster = Roster()
+        self.roster.add({"name": name}, to_cents(self.balance))
+        # None until the portfolio is picked; then the index of the last played turn
+        self.turn = None
+        self.multipliers = {}
+        # Wiadomości jednej sesji (np. z dwóch kart przeglądarki) idą po kolei
+        self.lock = asyncio.Lock()
+
+    @property
+    def tickers(self):
+        return [ticker for ticker in self.roster.selected[0] if ticker is not None]
+
+    @property
+    def finished(self):
+        return self.turn is not None and self.turn >= self.max_turns
+
+    def pick(self, tickers, amounts, options):
+        """Sets the opening portfolio (same rules as the game and the simulator)."""
+        if self.turn is not None:
+            raise ValueError("The game has already started")
+        tickers = [str(ticker).upper() for ticker in tickers]
+        check_portfolio(tickers, amounts, options)
+        if sum(amounts) > self.balance:
+            raise ValueError(f"The amounts exceed the ${self.balance} balance")
+        self.roster.selected[0] = tickers
+        self.roster.positions[0] = [to_cents(amount) for amount in amounts]
+        self.roster.cash[0] = to_cents(self.balance - sum(amounts))
+        self.roster.open()
+        self.roster.record_history()
+
+    def apply_turn(self, multipliers):
+        self.multipliers = multipliers
+        self.roster.revalue(multipliers)
+        self.roster.record_history()
+
+    def state(self):
+        cash = int(self.roster.cash[0])
+        positions = self.roster.positions[0].tolist()
+        return {
+            "session": self.id,
+            "name": self.roster.players[0]["name"],
+            "difficulty": self.difficulty,
+            "turn": self.turn,
+            "max_turns": self.max_turns,
+            "finished": self.finished,
+            "tickers": self.tickers,
+            "cash": cents_to_dollars(cash),
+            "positions": [cents_to_dollars(cents) for cents in positions],
+            "net_worth": cents_to_dollars(cash + sum(positions)),
+            "multipliers": self.multipliers,
+            "charts": {ticker: f"/charts/{ticker}/{self.turn}.png" for ticker in self.tickers}
+            if self.turn is not None else {},
+        }
+
+
+class GameServer:
+    def __init__(self, work_dir=None, ai=True, max_turns=MAX_TURNS, universe=None, max_sessions=MAX_SESSIONS):
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="deathmonopoly-server-")
+        self._own_work_dir = work_dir is None
+        self.ai = ai
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.options = (universe or load_universe()).symbols()
+        self.sessions = {}
+        # Puste okno (np. Yahoo chwilowo niedostępne) jest pobierane ponownie w następnej turze
+        self.prices = SharedResults(PRICE_ENTRIES, keep=lambda data: bool(data[1]))
+        self.charts = SharedResults(CHART_ENTRIES)
+        self.replies = SharedResults(REPLY_ENTRIES)
+        self.turn_seconds = deque(maxlen=LATENCY_WINDOW)
+        self.turns_played = 0
+        self.started = time.monotonic()
+
+    def close(self):
+        if self._own_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    # -----------------------------------
+    # Wspólne dane
+    # -----------------------------------
+    async def turn_prices(self, ticker, turn):
+        """(dates, closes) of a ticker's turn window, fetched once for all sessions."""
+        return await self.prices.get((ticker, turn), lambda: asyncio.to_thread(self._load_prices, ticker, turn))
+
+    def _load_prices(self, ticker, turn):
+        csv_file = os.path.join(self.work_dir, f"{ticker}_{turn}.csv")
+        status, _ = fetch_turn_csv(ticker, turn, csv_file)
+        print(f"{status} CSV for {ticker} (turn {turn})")
+        data = read_price_file(csv_file)
+        return data if data is not None else ([], [])
+
+    async def chart_file(self, ticker, turn):
+        """Path of the chart of a ticker's turn window, None when it has no prices."""
+        _, closes = await self.turn_prices(ticker, turn)
+        if not closes:
+            return None
+        return await self.charts.get((ticker, turn),
+                                     lambda: asyncio.to_thread(self._render_chart, ticker, closes))
+
+    def _render_chart(self, ticker, closes):
+        # Ten sam klucz co w stock_data, więc serwer i gra dzielą wykresy w pamięci podręcznej
+        key = f"{ticker}_{cache_key(closes, None)}.png"
+        path = os.path.join(self.work_dir, key)
+        cache = get_cache()
+        if not cache.fetch("charts", key, path):
+            get_chart_renderer().render(ticker, closes, path)
+            cache.store("charts", key, path)
+        return path
+
+    async def npc_replies(self, session):
+        """{persona: reply} for the session's stocks this turn, each asked once per server."""
+        from Game_code.AI import ask_bot_async, build_npc_question, personalities
+        from Game_code.indicators import compute_indicators
+
+        tickers = sorted(session.tickers)
+        turn = session.turn
+        windows = await asyncio.gather(*(self.turn_prices(ticker, turn) for ticker in tickers))
+        indicators = compute_indicators({ticker: closes for ticker, (_, closes) in zip(tickers, windows)})
+        question = build_npc_question(None, tickers)
+
+        async def ask(persona):
+            return await self.replies.get(
+                (persona, turn, tuple(tickers)),
+                lambda: ask_bot_async(question, persona, indicators, turn=turn))
+
+        names = list(personalities)
+        answers = await asyncio.gather(*(ask(name) for name in names), return_exceptions=True)
+        return {name: answer if isinstance(answer, str) else f"({name} did not answer: {answer})"
+                for name, answer in zip(names, answers)}
+
+    # -----------------------------------
+    # Tura
+    # -----------------------------------
+    async def play_turn(self, session):
+        started = time.perf_counter()
+        tickers = session.tickers
+        windows = await asyncio.gather(*(self.turn_prices(ticker, session.turn) for ticker in tickers))
+        session.apply_turn({ticker: price_change(closes) for ticker, (_, closes) in zip(tickers, windows)})
+        self.turn_seconds.append(time.perf_counter() - started)
+        self.turns_played += 1
+        return session.state()
+
+    async def dispatch(self, request):
+        op = request.get("op")
+        if op == "new":
+            if len(self.sessions) >= self.max_sessions:
+                raise ValueError("The server is full, try again later")
+            # Nieodgadywalny identyfikator: uczniowie nie mogą grać cudzą sesją
+            session_id = secrets.token_urlsafe(12)
+            session = GameSession(session_id, str(request.get("name") or f"Player {len(self.sessions) + 1}"),
+                                  int(request.get("difficulty", 1)), self.max_turns)
+            self.sessions[session_id] = session
+            return dict(session.state(), balance=session.balance, options=self.options)
+
+        session = self.sessions.get(str(request.get("session")))
+        if session is None:
+            raise ValueError("Unknown session")
+        async with session.lock:
+            if op == "state":
+                return session.state()
+            if op == "close":
+                self.sessions.pop(session.id, None)
+                return {"closed": session.id}
+            if op == "start":
+                session.pick(request.get("tickers") or [], request.get("amounts"), self.options)
+                session.turn = 0
+                return await self.play_turn(session)
+            if session.turn is None:
+                raise ValueError("Pick the portfolio first (op: start)")
+            if op == "next":
+                if session.finished:
+                    raise ValueError("The game is over")
+                session.turn += 1
+                return await self.play_turn(session)
+            if op == "npc":
+                if not self.ai:
+                    raise ValueError("NPC replies are turned off on this server")
+                return {"turn": session.turn, "replies": await self.npc_replies(session)}
+        raise ValueError(f"Unknown op {op!r}")
+
+    def stats(self):
+        latencies = sorted(self.turn_seconds)
+        return {
+            "sessions": len(self.sessions),
+            "turns_played": self.turns_played,
+            "turn_ms": {name: percentile(latencies, fraction) * 1000
+                        for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))},
+            "cpu_seconds": time.process_time(),
+            "uptime_seconds": time.monotonic() - self.started,
+            "cores": os.cpu_count() or 1,
+            "prices": self.prices.stats(),
+            "charts": self.charts.stats(),
+            "replies": self.replies.stats(),
+        }
+
+    # -----------------------------------
+    # HTTP i WebSocket
+    # -----------------------------------
+    async def handle(self, websocket):
+        async for message in websocket:
+            request_id = None
+            try:
+                request = json.loads(message)
+                if not isinstance(request, dict):
+                    raise ValueError("A message must be a JSON object")
+                request_id = request.get("id")
+                reply = await self.dispatch(request)
+            except (ValueError, TypeError) as e:
+                reply = {"error": str(e)}
+            except OSError as e:
+                print(f"Warning: Request failed: {e}")
+                reply = {"error": f"Server error: {e}"}
+            await websocket.send(json.dumps(dict(reply, id=request_id)))
+
+    async def process_request(self, connection, request):
+        """Answers plain HTTP GETs; /ws goes on to the WebSocket handshake."""
+        path = urlsplit(request.path).path
+        if path == "/ws":
+            return None
+        if path == "/health":
+            return connection.respond(HTTPStatus.OK, "ok\n")
+        if path == "/stats":
+            return _json_response(connection, self.stats())
+        if path.startswith("/sessions/"):
+            session = self.sessions.get(path[len("/sessions/"):])
+            if session is not None:
+                return _json_response(connection, session.state())
+        match = CHART_PATH.fullmatch(path)
+        if match and self.serves_chart(match.group(1).upper(), match.group(2)):
+            chart = await self.chart_file(match.group(1).upper(), int(match.group(2)))
+            if chart is not None:
+                with open(chart, "rb") as file:
+                    return _response(connection, file.read(), "image/png")
+        return connection.respond(HTTPStatus.NOT_FOUND, "Not found\n")
+
+    def serves_chart(self, ticker, turn):
+        """Only charts a game can show: an offered ticker and a turn 0..max_turns (nothing is downloaded otherwise)."""
+        # Najpierw długość: bardzo długiej liczby nie ma sensu (ani nie da się) zamieniać na int
+        return ticker in self.options and len(turn) <= len(str(self.max_turns)) and int(turn) <= self.max_turns
+
+    def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """websockets server (async context manager) for the API."""
+        return serve(self.handle, host, port, process_request=self.process_request)
+
+
+def _response(connection, body, content_type):
+    response = connection.respond(HTTPStatus.OK, "")
+    response.body = body
+    for name, value in (("Content-Type", content_type), ("Content-Length", str(len(body)))):
+        del response.headers[name]
+        response.headers[name] = value
+    return response
+
+
+def _json_response(connection, value):
+    return _response(connection, json.dumps(value).encode(), "application/json")
+
+
+async def run(args):
+    server = GameServer(ai=not args.no_ai, max_turns=args.max_turns, max_sessions=args.max_sessions)
+    try:
+        async with server.serve(args.host, args.port) as websocket_server:
+            print(f"DeathMonopoly server on http://{args.host}:{args.port} (WebSocket: ws://{args.host}:{args.port}/ws)")
+            await websocket_server.serve_forever()
+    finally:
+        server.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m Game_code.server", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--no-ai", action="store_true", help="do not ask the NPCs (no OpenAI calls)")
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS,
+                        help=f"last turn index, a game plays turns 0..max (default: {MAX_TURNS})")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS,
+                        help=f"games running at once, new ones are refused above it (default: {MAX_SESSIONS})")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
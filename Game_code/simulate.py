@@ -0,0 +1,323 @@
+# simulate.py
+"""
+Monte Carlo strategy simulator.
+
+Plays many games with random or scripted portfolios through every turn of the
+game and reports the final balance distribution for each difficulty level.
+Runs fully offline from the local price history (see price_store.py).
+
+Usage:
+    python -m Game_code.simulate --download          # once, needs network
+    python -m Game_code.simulate --games 100000 --strategy random
+    python -m Game_code.simulate --tickers AAPL,MSFT,NVDA,AMZN,PEP,EA --amounts 400,400,400,400,400,400
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+
+from Game_code.game_rules import (
+    DIFFICULTY_BALANCES,
+    INVESTMENT_STEP,
+    MAX_TURNS,
+    PORTFOLIO_SIZE,
+    cents_to_dollars,
+    format_dollars,
+    get_start_balance,
+    revalue_cents,
+    to_cents,
+)
+
+STRATEGIES = ("random", "equal", "all-in", "scripted")
+
+# Worker state, filled once per process by _init_worker
+_worker = {}
+
+
+# -----------------------------------
+# Strategie
+# -----------------------------------
+def pick_random(rng, tickers, balance):
+    """Random tickers, random number of $100 steps spread randomly; leftover stays unspent."""
+    picks = rng.sample(tickers, PORTFOLIO_SIZE)
+    amounts = [INVESTMENT_STEP] * PORTFOLIO_SIZE
+    extra_steps = rng.randint(0, balance // INVESTMENT_STEP - PORTFOLIO_SIZE)
+    for _ in range(extra_steps):
+        amounts[rng.randrange(PORTFOLIO_SIZE)] += INVESTMENT_STEP
+    return picks, amounts
+
+
+def pick_equal(rng, tickers, balance):
+    """Random tickers, the whole balance split as evenly as $100 steps allow."""
+    picks = rng.sample(tickers, PORTFOLIO_SIZE)
+    steps = balance // INVESTMENT_STEP
+    amounts = [(steps // PORTFOLIO_SIZE) * INVESTMENT_STEP] * PORTFOLIO_SIZE
+    for i in range(steps % PORTFOLIO_SIZE):
+        amounts[i] += INVESTMENT_STEP
+    return picks, amounts
+
+
+def pick_all_in(rng, tickers, balance):
+    """Random tickers, the minimum in five of them and everything else in one."""
+    picks = rng.sample(tickers, PORTFOLIO_SIZE)
+    amounts = [INVESTMENT_STEP] * PORTFOLIO_SIZE
+    amounts[rng.randrange(PORTFOLIO_SIZE)] += (balance // INVESTMENT_STEP - PORTFOLIO_SIZE) * INVESTMENT_STEP
+    return picks, amounts
+
+
+STRATEGY_FUNCTIONS = {
+    "random": pick_random,
+    "equal": pick_equal,
+    "all-in": pick_all_in,
+}
+
+
+# -----------------------------------
+# Rozgrywka
+# -----------------------------------
+def play_game(picks, amounts, balance, multipliers, turns):
+    """
+    Plays one game with the same rules as GamePage: every turn each position
+    is multiplied by the price change of its stock and rounded to the cent.
+    Returns the final balance (unspent money + value of all positions).
+    """
+    unspent = to_cents(balance - sum(amounts))
+    values = [to_cents(amount) for amount in amounts]
+    for turn in range(turns):
+        for i, ticker in enumerate(picks):
+            values[i] = revalue_cents(values[i], multipliers[ticker][turn])
+    return cents_to_dollars(unspent + sum(values))
+
+
+def _init_worker(multipliers, tickers, turns):
+    _worker["multipliers"] = multipliers
+    _worker["tickers"] = tickers
+    _worker["turns"] = turns
+
+
+def _run_chunk(task):
+    seed, games, balance, strategy, script = task
+    rng = random.Random(seed)
+    multipliers = _worker["multipliers"]
+    tickers = _worker["tickers"]
+    turns = _worker["turns"]
+
+    results = []
+    for _ in range(games):
+        if strategy == "scripted":
+            picks, amounts = script
+        else:
+            picks, amounts = STRATEGY_FUNCTIONS[strategy](rng, tickers, balance)
+        results.append(play_game(picks, amounts, balance, multipliers, turns))
+    return results
+
+
+# -----------------------------------
+# Raport
+# -----------------------------------
+def percentile(sorted_values, fraction):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def summarize(results, start_balance, bankrupt_below):
+    ordered = sorted(results)
+    return {
+        "games": len(ordered),
+        "start_balance": start_balance,
+        "mean": statistics.fmean(ordered),
+        "stdev": statistics.pstdev(ordered),
+        "min": ordered[0],
+        "p5": percentile(ordered, 0.05),
+        "p25": percentile(ordered, 0.25),
+        "median": percentile(ordered, 0.5),
+        "p75": percentile(ordered, 0.75),
+        "p95": percentile(ordered, 0.95),
+        "max": ordered[-1],
+        "profit_rate": sum(1 for value in ordered if value > start_balance) / len(ordered),
+        "bankruptcy_rate": sum(1 for value in ordered if value < bankrupt_below) / len(ordered),
+    }
+
+
+def print_report(summary, difficulty, elapsed, workers):
+    print(f"\n=== Difficulty {difficulty} (start ${summary['start_balance']}) ===")
+    print(f"Games:           {summary['games']}  ({workers} workers, {elapsed:.2f}s, "
+          f"{summary['games'] / elapsed if elapsed else 0:,.0f} games/sec)")
+    print(f"Final balance:   mean ${summary['mean']:.2f}  stdev ${summary['stdev']:.2f}")
+    print(f"Distribution:    min ${format_dollars(summary['min'])}  p5 ${summary['p5']:.0f}  p25 ${summary['p25']:.0f}  "
+          f"median ${summary['median']:.0f}  p75 ${summary['p75']:.0f}  p95 ${summary['p95']:.0f}  max ${format_dollars(summary['max'])}")
+    print(f"Profitable:      {summary['profit_rate']:.1%}")
+    print(f"Bankruptcy rate: {summary['bankruptcy_rate']:.1%}")
+
+
+def parse_script(args, tickers):
+    """Validates --tickers/--amounts and returns (picks, amounts) or raises ValueError."""
+    picks = [name.strip().upper() for name in args.tickers.split(",") if name.strip()]
+    amounts = [int(value) for value in args.amounts.split(",")] if args.amounts else None
+    check_portfolio(picks, amounts, tickers)
+    return picks, amounts
+
+
+def check_portfolio(picks, amounts, tickers):
+    """Raises ValueError unless picks/amounts are a valid opening portfolio (also used by the server)."""
+    if len(picks) != PORTFOLIO_SIZE or len(set(picks)) != PORTFOLIO_SIZE:
+        raise ValueError(f"A portfolio needs {PORTFOLIO_SIZE} different tickers")
+    unknown = [name for name in picks if name not in tickers]
+    if unknown:
+        raise ValueError(f"Unknown tickers: {', '.join(unknown)}")
+    if amounts is None or len(amounts) != PORTFOLIO_SIZE:
+        raise ValueError(f"A portfolio needs {PORTFOLIO_SIZE} amounts")
+    if any(amount < INVESTMENT_STEP or amount % INVESTMENT_STEP for amount in amounts):
+        raise ValueError(f"Every amount must be a multiple of ${INVESTMENT_STEP} and at least ${INVESTMENT_STEP}")
+
+
+def build_schedule(args):
+    """The turn schedule from --start/--window-months/--step-months/--gap-free (the game's by default)."""
+    from Game_code.trading_calendar import DEFAULT_SCHEDULE, TurnSchedule
+    if not (args.start or args.window_months or args.step_months or args.gap_free):
+        return DEFAULT_SCHEDULE
+    kwargs = {}
+    if args.start:
+        kwargs["start"] = args.start
+    if args.window_months:
+        kwargs["window"] = args.window_months
+    kwargs["step"] = None if args.gap_free else (args.step_months or DEFAULT_SCHEDULE.step)
+    return TurnSchedule(**kwargs)
+
+
+def non_negative_int(text):
+    """argparse type: an integer >= 0."""
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return value
+
+
+def positive_int(text):
+    """argparse type: an integer >= 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 or more, got {value}")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m Game_code.simulate", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=non_negative_int, default=10000, help="games per difficulty (default: 10000)")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="random")
+    parser.add_argument("--tickers", help="comma separated tickers for --strategy scripted")
+    parser.add_argument("--amounts", help="comma separated dollar amounts for --strategy scripted")
+    parser.add_argument("--difficulty", type=int, nargs="+", choices=sorted(DIFFICULTY_BALANCES),
+                        default=sorted(DIFFICULTY_BALANCES))
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS,
+                        help=f"last turn index, the game plays turns 0..max (default: {MAX_TURNS})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=positive_int, default=2000, help="games per worker task")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bankrupt-below", type=int, default=PORTFOLIO_SIZE * INVESTMENT_STEP,
+                        help="final balance counted as bankrupt (default: cannot fund six $100 positions)")
+    parser.add_argument("--json", action="store_true", help="print the summaries as JSON")
+    parser.add_argument("--universe", help="universe manifest (CSV/JSON) with the tradable tickers "
+                                           "(default: the game's manifest)")
+    parser.add_argument("--start", help="first day of turn 0, YYYY-MM-DD (default: the game's 2015-01-01)")
+    parser.add_argument("--window-months", type=int,
+                        help="length of a turn window in months (default: the game's 1st to 28th of next month)")
+    parser.add_argument("--step-months", type=int, help="months between turn starts (default: 3)")
+    parser.add_argument("--gap-free", action="store_true", help="each turn starts where the previous one ended")
+    parser.add_argument("--history-dir", help="directory with <TICKER>.csv price history (default: Game_code/Stock_history)")
+    parser.add_argument("--download", action="store_true",
+                        help="download the price history for all tickers and exit (needs network)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from Game_code.price_store import PriceStore, HISTORY_DIR
+    from Game_code.universe import load_universe
+
+    try:
+        schedule = build_schedule(args)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    store = PriceStore(args.history_dir or HISTORY_DIR, schedule)
+    tickers = load_universe(args.universe).symbols()
+
+    if args.download:
+        store.download(tickers, args.max_turns)
+        return 0
+
+    if args.tickers:
+        args.strategy = "scripted"
+    script = None
+    if args.strategy == "scripted":
+        if not args.tickers:
+            print("--strategy scripted needs --tickers and --amounts", file=sys.stderr)
+            return 2
+        try:
+            script = parse_script(args, tickers)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 2
+
+    missing = store.missing(tickers)
+    if missing:
+        print(f"No local price history for: {', '.join(missing)}", file=sys.stderr)
+        print("Run `python -m Game_code.simulate --download` once while online.", file=sys.stderr)
+        return 1
+
+    turns = args.max_turns + 1
+    multipliers = store.turn_multipliers(tickers, args.max_turns)
+    workers = max(1, args.workers)
+    summaries = {}
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(multipliers, tickers, turns)) as pool:
+        for difficulty in args.difficulty:
+            balance = get_start_balance(difficulty)
+            if script is not None and sum(script[1]) > balance:
+                print(f"Difficulty {difficulty}: scripted amounts exceed the ${balance} balance, skipped.",
+                      file=sys.stderr)
+                continue
+
+            tasks = []
+            remaining = args.games
+            chunk_index = 0
+            while remaining > 0:
+                count = min(args.chunk, remaining)
+                seed = args.seed * 1_000_003 + difficulty * 10_007 + chunk_index
+                tasks.append((seed, count, balance, args.strategy, script))
+                remaining -= count
+                chunk_index += 1
+
+            started = time.perf_counter()
+            results = []
+            for chunk in pool.imap_unordered(_run_chunk, tasks):
+                results.extend(chunk)
+            elapsed = time.perf_counter() - started
+
+            if not results:
+                continue
+            summary = summarize(results, balance, args.bankrupt_below)
+            summary["seconds"] = elapsed
+            summary["games_per_sec"] = len(results) / elapsed if elapsed else 0.0
+            summaries[difficulty] = summary
+            if not args.json:
+                print_report(summary, difficulty, elapsed, workers)
+
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
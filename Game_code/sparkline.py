@@ -0,0 +1,48 @@
+# sparkline.py
+"""
+Sparkline of a price series drawn straight into a QPixmap.
+
+Used in place of the matplotlib chart when the turn is out of time: the
+line is a QPainterPath of the series cut to the tile width (downsample.py),
+so drawing it takes about a millisecond whatever the window length.
+"""
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QColor, QPainter, QPainterPath, QPen, QPixmap
+
+from Game_code.downsample import reduce_series
+from Game_code.logos import LOGO_HEIGHT, LOGO_WIDTH
+
+MARGIN = 12
+
+
+def sparkline_pixmap(prices, width=LOGO_WIDTH, height=LOGO_HEIGHT):
+    """Green (up) or red (down) line of the closes on a white tile."""
+    pixmap = QPixmap(width, height)
+    pixmap.fill(QColor("white"))
+    if len(prices) == 0:
+        return pixmap
+
+    x, y = reduce_series(prices, width)
+    last = max(len(prices) - 1, 1)
+    low, high = float(y.min()), float(y.max())
+    span = (high - low) or 1.0
+    plot_width, plot_height = width - 2 * MARGIN, height - 2 * MARGIN
+
+    path = QPainterPath()
+    for i, (position, close) in enumerate(zip(x.tolist(), y.tolist())):
+        point = QPointF(MARGIN + position / last * plot_width,
+                        MARGIN + (high - close) / span * plot_height)
+        if i:
+            path.lineTo(point)
+        else:
+            path.moveTo(point)
+
+    painter = QPainter(pixmap)
+    try:
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        color = QColor("green") if prices[-1] >= prices[0] else QColor("red")
+        painter.setPen(QPen(color, 2, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap))
+        painter.drawPath(path)
+    finally:
+        painter.end()
+    return pixmap
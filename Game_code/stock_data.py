@@ -1,16 +1,28 @@
 # stock_data.py
 import csv
+import json
 import os
+import sys
 import glob
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
 import yfinance as yf
-import matplotlib.pyplot as plt
+from yfinance.exceptions import YFPricesMissingError
+from Game_code.chart_renderer import get_chart_renderer
+from Game_code.tracing import span
+from Game_code.trading_calendar import DEFAULT_SCHEDULE
+from Game_code.fetch_guard import get_breaker, get_negative_cache
+from Game_code.http_session import get_session, session_metrics
+from Game_code.deadline import NO_DEADLINE
+from Game_code.price_store import PriceStore
+from Game_code.data_cache import atomic_write, get_cache, cache_key, user_cache_root
 
-# Relative paths for CSV and chart directories
+# Current turn's CSV and chart files. Next to the code when run from source;
+# a PyInstaller build may be read-only or unpacked to a temp dir, so there
+# they go to the per-user directory. Downloads and charts are kept across
+# games in data_cache.
 REPO_DIR = os.path.dirname(os.path.abspath(__file__))
-CSV_DIR = os.path.join(REPO_DIR, "Stock_prizes")
-CHART_DIR = os.path.join(REPO_DIR, "Stock_charts")
+WORK_DIR = os.path.join(user_cache_root(), "session") if getattr(sys, "frozen", False) else REPO_DIR
+CSV_DIR = os.path.join(WORK_DIR, "Stock_prizes")
+CHART_DIR = os.path.join(WORK_DIR, "Stock_charts")
 
 # Ensure directories exist
 os.makedirs(CSV_DIR, exist_ok=True)
@@ -18,101 +30,333 @@ os.makedirs(CHART_DIR, exist_ok=True)
 
 def get_turn_dates(turn_counter):
     """
-    Calculate start and end dates for a given turn.
+    Calculate start and end dates for a given turn (see trading_calendar).
     """
-    start = datetime(2015, 1, 1)
-    end = datetime(2015, 2, 28)  # Skrócony okres do 2 miesięcy
-    start += relativedelta(months=3 * turn_counter)  # 3 miesiące zamiast 5
-    end += relativedelta(months=3 * turn_counter)
-    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    return DEFAULT_SCHEDULE.dates(turn_counter)
 
-def get_data(selected_companies, turn_counter):
+def history_path(company):
+    """Path of the CSV with the current turn's prices of a company."""
+    return os.path.join(CSV_DIR, f"{company}_history.csv")
+
+def chart_path(company):
+    """Path of the generated chart image of a company."""
+    return os.path.join(CHART_DIR, f"{company}_chart.png")
+
+def summary_path(company):
+    """Path of the JSON summary stored next to the company's CSV."""
+    return os.path.join(CSV_DIR, f"{company}_history.json")
+
+def price_cache_key(company, turn_counter):
+    """Data cache key of a company's prices for one turn."""
+    start_date, end_date = get_turn_dates(turn_counter)
+    return f"{company}_{start_date}_{end_date}.csv"
+
+def file_size(path):
+    """Size of a file in bytes, 0 if it does not exist."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def get_data(selected_companies, turn_counter, deadline=NO_DEADLINE):
     """
     Download stock data from Yahoo Finance and save as CSV.
+    Past turns never change, so a download is kept in the data cache and the
+    next game (or launch) copies it instead of downloading again.
+    A ticker that had no data for the window is not asked again until its
+    negative cache entry expires, and Yahoo is not called at all while its
+    circuit breaker is open (see fetch_guard.py); such a ticker gets a CSV
+    without rows for the turn.
+    Downloads only get the time left before the turn's deadline; once it is
+    spent, or a download fails or runs past it, the window is taken from the
+    local price history when it has the ticker (see deadline.py). Such a
+    window is neither cached nor negative-cached, so it is asked from Yahoo
+    again the next time it is needed.
     """
-    start_date, end_date = get_turn_dates(turn_counter)
     for company in selected_companies:
-        ticker = yf.Ticker(company)
-        data = ticker.history(start=start_date, end=end_date)
-        csv_file = os.path.join(CSV_DIR, f"{company}_history.csv")
-        data.to_csv(csv_file)
-        print(f"Saved CSV for {company} -> {csv_file}")
+        key = price_cache_key(company, turn_counter)
+        with span("get_data", ticker=company, turn=turn_counter, cache_hit=False) as trace_span:
+            csv_file = history_path(company)
+            status, cache_hit = fetch_turn_csv(company, turn_counter, csv_file, deadline, trace_span)
+            ingest_summary(company, key)
+            if trace_span:
+                trace_span.set(bytes=file_size(csv_file), cache_hit=cache_hit, **session_metrics())
+        print(f"{status} CSV for {company} -> {csv_file}")
 
-def get_data_chart(company, all_prices=None):
+def fetch_turn_csv(company, turn_counter, csv_file, deadline=NO_DEADLINE, trace_span=None):
     """
-    Generate a stock chart from CSV data with color based on price change.
+    Writes one company's prices for a turn to csv_file, from the data cache or
+    Yahoo, with the guards described in get_data. Returns (status, cache_hit).
+    """
+    start_date, end_date = get_turn_dates(turn_counter)
+    key = price_cache_key(company, turn_counter)
+    negative = get_negative_cache()
+    breaker = get_breaker("yahoo")
+    cache_hit = get_cache().fetch("prices", key, csv_file)
+    if cache_hit:
+        return "Loaded cached", True
+    if negative.is_empty(key):
+        write_empty_csv(csv_file)
+        return "No data (cached) for", False
+    if deadline.expired():
+        return local_fallback(company, turn_counter, csv_file, "Out of time", trace_span), False
+    if not breaker.allow():
+        return local_fallback(company, turn_counter, csv_file, "Yahoo unavailable", trace_span), False
+    status = _download(company, key, start_date, end_date, csv_file, breaker, negative, deadline.remaining())
+    if status == "Failed":
+        # Błąd albo przekroczony czas tury: ceny z lokalnej historii zamiast mnożnika 1.0
+        return local_fallback(company, turn_counter, csv_file, "Download failed", trace_span), False
+    return status, False
+
+def local_fallback(company, turn_counter, csv_file, reason, trace_span=None):
+    """Writes the window from the local price history instead of Yahoo; returns the status."""
+    if trace_span:
+        trace_span.set(degraded=True)
+    if write_local_history(company, turn_counter, csv_file):
+        return f"{reason}, local history"
+    return f"{reason}, skipped"
+
+def _download(company, key, start_date, end_date, csv_file, breaker, negative, timeout=None):
+    """
+    Downloads one window from Yahoo. yfinance hides network errors and
+    timeouts as an empty frame by default, so they are raised instead: only
+    a window Yahoo reports without rows is negative-cached, everything else
+    counts as a breaker failure.
     """
-    csv_file = os.path.join(CSV_DIR, f"{company}_history.csv")
+    try:
+        # Jedna sesja HTTP na cały program: połączenia i ciasteczka Yahoo są używane ponownie
+        ticker = yf.Ticker(company, session=get_session())
+        if timeout is None:
+            data = ticker.history(start=start_date, end=end_date, raise_errors=True)
+        else:
+            data = ticker.history(start=start_date, end=end_date, timeout=timeout, raise_errors=True)
+    except YFPricesMissingError:
+        # Yahoo odpowiedział, ale nie ma notowań w tym oknie
+        breaker.record_success()
+        negative.add(key)
+        write_empty_csv(csv_file)
+        return "No data in"
+    except Exception as e:
+        breaker.record_failure()
+        print(f"Warning: Could not download {company}: {e}")
+        write_empty_csv(csv_file)
+        return "Failed"
+    breaker.record_success()
+    data.to_csv(csv_file)
+    # Empty answers are remembered for a while instead of being cached for good
+    if data.empty:
+        negative.add(key)
+        return "No data in"
+    get_cache().store("prices", key, csv_file)
+    return "Saved"
+
+def write_local_history(company, turn_counter, csv_file):
+    """
+    Writes the turn's window from the local price history (price_store.py).
+    Returns False, with a CSV without rows, when the ticker is not there.
+    """
+    store = PriceStore()
+    if not store.has(company):
+        write_empty_csv(csv_file)
+        return False
+    try:
+        dates, closes = store.load(company)
+        start_row, end_row = store.rows(company, turn_counter)
+        rows = "".join(f"{dates[i]},{closes[i]!r}\n" for i in range(start_row, end_row))
+        with open(csv_file, "w", newline="") as file:
+            file.write("Date,Close\n" + rows)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read the local history of {company}: {e}")
+        write_empty_csv(csv_file)
+        return False
+    return end_row > start_row
+
+def write_empty_csv(csv_file):
+    """A CSV without rows, so the turn does not show the previous turn's prices."""
+    try:
+        with open(csv_file, "w", newline="") as file:
+            file.write("Date,Close\n")
+    except OSError as e:
+        print(f"Warning: Could not write {csv_file}: {e}")
+
+def read_prices(company):
+    """
+    Reads (dates, closing prices) from the company's CSV.
+    Returns None if the CSV does not exist. A CSV without rows (Yahoo had no
+    data for the turn) gives empty lists.
+    """
+    return read_price_file(history_path(company))
+
+def read_price_file(csv_file):
+    """read_prices() for any CSV path."""
     if not os.path.exists(csv_file):
-        print(f"CSV not found for {company}, skipping chart generation.")
-        return
+        return None
+    dates, prices = [], []
     with open(csv_file, "r") as file:
         reader = csv.reader(file)
-        header = next(reader)
+        header = next(reader, [])
+        if "Date" not in header or "Close" not in header:
+            return dates, prices
         date_idx = header.index("Date")
         close_idx = header.index("Close")
-        dates, prices = [], []
         for row in reader:
+            if len(row) <= close_idx or not row[close_idx]:
+                continue
             dates.append(row[date_idx])
             prices.append(float(row[close_idx]))
-    
-    # Określ kolor na podstawie zmiany ceny
-    color = 'green' if prices[-1] >= prices[0] else 'red'
-    
+    return dates, prices
+
+# -----------------------------------
+# Podsumowanie serii (liczone raz, przy pobraniu)
+# -----------------------------------
+def summarize(dates, prices):
+    """first, last, min, max, count and the date range of a series."""
+    if not prices:
+        return {"count": 0}
+    return {
+        "count": len(prices),
+        "first": prices[0],
+        "last": prices[-1],
+        "min": min(prices),
+        "max": max(prices),
+        "start": dates[0][:10],
+        "end": dates[-1][:10],
+    }
+
+def ingest_summary(company, key):
+    """
+    Stores the summary of the company's current CSV next to it. It is read
+    from the data cache ("stats") when known, otherwise computed from the
+    CSV once and cached, so later turns and games never recompute it.
+    """
+    cache = get_cache()
+    summary = cache.get_json("stats", key)
+    if summary is None:
+        data = read_prices(company)
+        if data is None:
+            return None
+        summary = summarize(*data)
+        if summary["count"]:
+            cache.put_json("stats", key, summary)
+    write_summary(company, summary)
+    return summary
+
+def write_summary(company, summary):
+    """Writes the summary with the size and mtime of the CSV it describes."""
+    try:
+        stat = os.stat(history_path(company))
+        data = json.dumps(dict(summary, csv_size=stat.st_size, csv_mtime_ns=stat.st_mtime_ns))
+
+        def write(tmp):
+            with open(tmp, "w", encoding="utf-8") as file:
+                file.write(data)
+
+        atomic_write(summary_path(company), write)
+    except OSError as e:
+        print(f"Warning: Could not save the summary of {company}: {e}")
+
+def read_summary(company):
+    """
+    The stored summary of the company's CSV, or None when there is none or
+    it no longer matches the CSV (the file was replaced after ingest).
+    """
+    try:
+        with open(summary_path(company), encoding="utf-8") as file:
+            summary = json.load(file)
+        stat = os.stat(history_path(company))
+        if summary["csv_size"] != stat.st_size or summary["csv_mtime_ns"] != stat.st_mtime_ns:
+            return None
+        return summary
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def get_data_chart(company, all_prices=None, y_range=None):
+    """
+    Generate a stock chart from CSV data with color based on price change.
+    """
+    with span("get_data_chart", ticker=company) as trace_span:
+        _render_chart(company, all_prices, y_range, trace_span)
+
+def _render_chart(company, all_prices, y_range, trace_span):
+    data = read_prices(company)
+    if data is None:
+        print(f"CSV not found for {company}, skipping chart generation.")
+        return
+    dates, prices = data
+    if not prices:
+        print(f"No prices for {company}, skipping chart generation.")
+        return
+
     # Określ skalę Y (jeśli podano all_prices)
-    if all_prices is not None and len(all_prices) > 0:
-        y_min = min(all_prices) * 0.95
-        y_max = max(all_prices) * 1.05
-    else:
-        y_min = min(prices) * 0.95
-        y_max = max(prices) * 1.05
-    
-    plt.figure(figsize=(10, 6))
-    plt.plot(dates, prices, color=color, linewidth=2)
-    plt.title(f"{company} Stock Price")
-    plt.ylabel("Price (USD)")
-    plt.ylim(y_min, y_max)
-    plt.xticks([])
-    plt.grid(True, alpha=0.3)
-    
-    chart_file = os.path.join(CHART_DIR, f"{company}_chart.png")
-    plt.savefig(chart_file, dpi=300, bbox_inches="tight")
-    plt.close()
+    if y_range is None and all_prices is not None and len(all_prices) > 0:
+        y_range = (min(all_prices) * 0.95, max(all_prices) * 1.05)
+
+    # The chart depends only on its prices and Y scale
+    chart_file = chart_path(company)
+    key = f"{company}_{cache_key(prices, y_range)}.png"
+    cache = get_cache()
+    if cache.fetch("charts", key, chart_file):
+        if trace_span:
+            trace_span.set(bytes=file_size(chart_file), points=len(prices), cache_hit=True)
+        print(f"Loaded cached chart for {company} -> {chart_file}")
+        return
+    try:
+        get_chart_renderer().render(company, prices, chart_file, y_range=y_range)
+    except (OSError, ValueError) as error:
+        print(f"Warning: Could not save chart for {company}: {error}")
+        return
+    cache.store("charts", key, chart_file)
+    if trace_span:
+        trace_span.set(bytes=file_size(chart_file), points=len(prices), cache_hit=False)
     print(f"Saved chart for {company} -> {chart_file}")
 
 def generate_all_charts(companies):
     """
     Generate charts for all companies with unified Y-axis scale.
     """
-    all_prices = []
-    
-    # Zbierz wszystkie ceny ze wszystkich firm
+    lows, highs = [], []
+
+    # Skala ze zapisanych podsumowań; CSV czytany tylko, gdy podsumowania brak
     for company in companies:
-        csv_file = os.path.join(CSV_DIR, f"{company}_history.csv")
-        if os.path.exists(csv_file):
-            with open(csv_file, "r") as file:
-                reader = csv.reader(file)
-                header = next(reader)
-                close_idx = header.index("Close")
-                for row in reader:
-                    all_prices.append(float(row[close_idx]))
-    
+        summary = read_summary(company)
+        if summary is not None:
+            if summary["count"]:
+                lows.append(summary["min"])
+                highs.append(summary["max"])
+            continue
+        data = read_prices(company)
+        if data is not None and data[1]:
+            lows.append(min(data[1]))
+            highs.append(max(data[1]))
+
+    y_range = (min(lows) * 0.95, max(highs) * 1.05) if lows else None
+
     # Generuj wykresy z jednolitą skalą
     for company in companies:
-        get_data_chart(company, all_prices)
+        get_data_chart(company, y_range=y_range)
 
 def get_price_change(stock_name):
     """
     Returns the multiplier based on first and last closing price in CSV.
+    Uses the summary stored at ingest when it matches the CSV.
     """
-    csv_file = os.path.join(CSV_DIR, f"{stock_name}_history.csv")
+    summary = read_summary(stock_name)
+    if summary is not None:
+        if not summary["count"] or summary["first"] == 0:
+            return 1.0
+        return summary["last"] / summary["first"]
+    csv_file = history_path(stock_name)
     if not os.path.exists(csv_file):
         print(f"CSV not found for {stock_name}")
         return 1.0
     with open(csv_file, newline="") as csvfile:
         reader = csv.DictReader(csvfile)
         prices = [float(row["Close"]) for row in reader if row.get("Close")]
-    if not prices:
+    return price_change(prices)
+
+def price_change(prices):
+    """Last / first closing price, 1.0 for an empty series or a zero first price."""
+    if len(prices) == 0:
         return 1.0
     start_price = prices[0]
     end_price = prices[-1]
@@ -122,9 +366,10 @@ def get_price_change(stock_name):
 
 def clear_stock_files():
     """
-    Deletes all CSV and chart files.
+    Deletes the current game's CSV and chart files (the data cache stays).
     """
-    for file in glob.glob(os.path.join(CSV_DIR, "*_history.csv")):
+    # CSV and its summary (*_history.json)
+    for file in glob.glob(os.path.join(CSV_DIR, "*_history.*")):
         try:
             os.remove(file)
         except OSError:
@@ -0,0 +1,192 @@
+# ticker_picker.py
+"""
+Type-ahead ticker picker.
+
+TickerIndex is built once per universe: a sorted list of lowercase keys
+(symbol and each word of the company name) answers prefix queries with a
+binary search, and one "symbol<TAB>name" string per ticker answers substring
+queries. When the query only grows (the user keeps typing) the previous
+matches are narrowed instead of scanning the whole universe again.
+
+TickerPicker is a popup with a search box over a list view. It is created
+once and reused; opening it only swaps the set of disabled tickers, so the
+cost does not depend on how many tickers are already picked.
+"""
+from bisect import bisect_left
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QPoint, Qt, Signal
+from PySide6.QtWidgets import QApplication, QFrame, QLineEdit, QListView, QVBoxLayout
+
+
+class TickerIndex:
+    def __init__(self, universe):
+        securities = list(universe)
+        self.symbols = [security.symbol for security in securities]
+        self.names = [security.name for security in securities]
+        self._haystack = [f"{security.symbol}\t{security.name}".lower() for security in securities]
+
+        # (key, rank, id): rank 0 = symbol, 1 = word of the name
+        entries = [(security.symbol.lower(), 0, i) for i, security in enumerate(securities)]
+        for i, security in enumerate(securities):
+            entries.extend((word, 1, i) for word in set(security.name.lower().split()))
+        entries.sort()
+        self._keys = [key for key, _, _ in entries]
+        self._entries = entries
+
+        self._last_query = ""
+        self._last_matches = list(range(len(securities)))
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def prefix(self, query):
+        """Ids whose symbol or a name word starts with query: symbols first, then names."""
+        start = bisect_left(self._keys, query)
+        hits = ([], [])
+        for key, rank, i in self._entries[start:bisect_left(self._keys, query + "\uffff", start)]:
+            hits[rank].append(i)
+        seen = set()
+        return [i for i in hits[0] + hits[1] if not (i in seen or seen.add(i))]
+
+    def search(self, query):
+        """
+        Ids matching query, best first: prefix matches (symbol, then name word),
+        then the remaining substring matches in manifest order.
+        """
+        query = query.strip().lower()
+        if not query:
+            self._last_query = ""
+            self._last_matches = list(range(len(self.symbols)))
+            return self._last_matches
+
+        # Typing one more letter can only narrow the result
+        if self._last_query and query.startswith(self._last_query):
+            candidates = self._last_matches
+        else:
+            candidates = range(len(self.symbols))
+        haystack = self._haystack
+        matches = [i for i in candidates if query in haystack[i]]
+        self._last_query = query
+        self._last_matches = matches
+
+        ranked = self.prefix(query)
+        first = set(ranked)
+        ranked.extend(i for i in matches if i not in first)
+        return ranked
+
+
+class TickerListModel(QAbstractListModel):
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.ticker_index = index
+        self.rows = list(range(len(index)))
+        self.disabled = set()
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def set_disabled(self, symbols):
+        self.disabled = set(symbols)
+        if self.rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self.rows) - 1))
+
+    def symbol(self, row):
+        return self.ticker_index.symbols[self.rows[row]]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        i = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            symbol, name = self.ticker_index.symbols[i], self.ticker_index.names[i]
+            return symbol if name == symbol else f"{symbol}   {name}"
+        if role == Qt.ItemDataRole.UserRole:
+            return self.ticker_index.symbols[i]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if self.symbol(index.row()) in self.disabled:
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+
+class TickerPicker(QFrame):
+    picked = Signal(str)
+
+    def __init__(self, universe, parent=None):
+        super().__init__(parent, Qt.WindowType.Popup)
+        self.ticker_index = TickerIndex(universe)
+        self.model = TickerListModel(self.ticker_index, self)
+
+        self.search = QLineEdit(self)
+        self.search.setPlaceholderText("Search ticker or company...")
+        self.search.textChanged.connect(self.filter)
+        self.search.returnPressed.connect(self.pick_current)
+
+        self.view = QListView(self)
+        self.view.setModel(self.model)
+        # Same-height rows laid out in batches: a reset of thousands of rows
+        # only lays out what is on screen before the popup is painted
+        self.view.setUniformItemSizes(True)
+        self.view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.view.setBatchSize(100)
+        self.view.clicked.connect(self.pick_index)
+        self.view.activated.connect(self.pick_index)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.addWidget(self.search)
+        layout.addWidget(self.view)
+        self.resize(320, 360)
+        self.setStyleSheet("""
+            QFrame { background-color: rgb(38, 39, 59); border: 1px solid rgb(255, 215, 0); }
+            QLineEdit { color: white; background-color: rgb(58, 59, 79); padding: 4px; font-size: 14px; }
+            QListView { color: white; background-color: rgb(38, 39, 59); font-size: 14px; }
+            QListView::item:disabled { color: gray; }
+            QListView::item:selected { background-color: rgba(255, 215, 0, 80); }
+        """)
+
+    def open_at(self, pos, disabled=()):
+        """Shows the picker at a global position with the given tickers greyed out."""
+        self.model.set_disabled(disabled)
+        if self.search.text():
+            self.search.clear()
+        else:
+            self.filter("")
+        self.move(pos if isinstance(pos, QPoint) else QPoint(*pos))
+        self.show()
+        self.search.setFocus()
+
+    def filter(self, text):
+        self.model.set_rows(self.ticker_index.search(text))
+        self.select_first_enabled()
+
+    def select_first_enabled(self):
+        for row in range(self.model.rowCount()):
+            if self.model.symbol(row) not in self.model.disabled:
+                self.view.setCurrentIndex(self.model.index(row))
+                return
+
+    def pick_current(self):
+        self.pick_index(self.view.currentIndex())
+
+    def pick_index(self, index):
+        if not index.isValid() or self.model.symbol(index.row()) in self.model.disabled:
+            return
+        symbol = self.model.symbol(index.row())
+        self.hide()
+        self.picked.emit(symbol)
+
+    def keyPressEvent(self, event):
+        # Arrow keys move through the list while the focus stays in the search box
+        if event.key() in (Qt.Key.Key_Down, Qt.Key.Key_Up, Qt.Key.Key_PageDown, Qt.Key.Key_PageUp):
+            QApplication.sendEvent(self.view, event)
+        else:
+            super().keyPressEvent(event)
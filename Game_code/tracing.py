@@ -0,0 +1,186 @@
+# tracing.py
+"""
+Lightweight tracing of the turn pipeline.
+
+Code wraps interesting work in named spans carrying attributes:
+
+    with span("get_data_chart", ticker=company) as trace_span:
+        ...
+        if trace_span:
+            trace_span.set(bytes=os.path.getsize(chart_file))
+
+When tracing is disabled (the default) span() returns one shared no-op object,
+so the cost is a function call and an empty `with`. The no-op span is falsy,
+which lets callers skip computing expensive attributes.
+
+Enable with the environment variable DEATHMONOPOLY_TRACE=1 (or tracing.enable()).
+Every finished turn is kept in memory and can be exported as Chrome trace-event
+JSON, which opens in chrome://tracing or https://ui.perfetto.dev.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# How many finished turns are kept in memory
+MAX_TURNS_KEPT = 20
+
+TRACE_DIR = os.getenv("DEATHMONOPOLY_TRACE_DIR", "traces")
+
+_enabled = os.getenv("DEATHMONOPOLY_TRACE", "") not in ("", "0")
+_lock = threading.Lock()
+# Finished spans of the turn in progress: (name, start_ns, end_ns, thread_id, attrs)
+_events = []
+_turns = deque(maxlen=MAX_TURNS_KEPT)
+_thread_names = {}
+_origin_ns = time.perf_counter_ns()
+
+
+class _NoopSpan:
+    """Returned by span() while tracing is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __bool__(self):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start_ns")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        thread = threading.current_thread()
+        with _lock:
+            _thread_names.setdefault(thread.ident, thread.name)
+            _events.append((self.name, self.start_ns, end_ns, thread.ident, self.attrs))
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class _TurnSpan(Span):
+    """Root span of a turn; closing it moves the collected spans into a finished turn."""
+    __slots__ = ("turn",)
+
+    def __init__(self, turn, attrs):
+        super().__init__("turn", attrs)
+        self.turn = turn
+
+    def __exit__(self, exc_type, exc, traceback):
+        super().__exit__(exc_type, exc, traceback)
+        with _lock:
+            _turns.append({"turn": self.turn, "events": list(_events)})
+            _events.clear()
+        return False
+
+
+def span(name, **attrs):
+    """Context manager timing a named piece of work."""
+    if not _enabled:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def turn_span(turn, **attrs):
+    """Context manager wrapping a whole turn; see completed_turns()."""
+    if not _enabled:
+        return _NOOP
+    attrs["turn"] = turn
+    return _TurnSpan(turn, attrs)
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """Drops every recorded span and turn."""
+    with _lock:
+        _events.clear()
+        _turns.clear()
+
+
+def completed_turns():
+    with _lock:
+        return list(_turns)
+
+
+def chrome_trace_events(turns=None):
+    """Converts finished turns to a list of Chrome trace events ("X" = complete event)."""
+    turns = completed_turns() if turns is None else turns
+    pid = os.getpid()
+    events = []
+    for thread_id, thread_name in list(_thread_names.items()):
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                       "args": {"name": thread_name}})
+    for turn in turns:
+        for name, start_ns, end_ns, thread_id, attrs in turn["events"]:
+            events.append({
+                "name": name,
+                "cat": "turn",
+                "ph": "X",
+                "ts": (start_ns - _origin_ns) / 1000.0,
+                "dur": (end_ns - start_ns) / 1000.0,
+                "pid": pid,
+                "tid": thread_id,
+                "args": {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                         for key, value in attrs.items()},
+            })
+    return events
+
+
+def export_chrome_trace(path, turns=None):
+    """Writes finished turns as Chrome trace-event JSON and returns the path."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump({"traceEvents": chrome_trace_events(turns), "displayTimeUnit": "ms"}, file)
+    return path
+
+
+def export_last_turn(directory=None):
+    """Exports the most recent finished turn to <directory>/turn_<n>.json, if tracing is on."""
+    turns = completed_turns()
+    if not _enabled or not turns:
+        return None
+    last = turns[-1]
+    path = os.path.join(directory or TRACE_DIR, f"turn_{last['turn']}.json")
+    export_chrome_trace(path, [last])
+    print(f"Saved trace for turn {last['turn']} -> {path}")
+    return path
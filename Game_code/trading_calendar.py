@@ -0,0 +1,114 @@
+# trading_calendar.py
+"""
+Trading-day index and turn schedule.
+
+A TradingIndex holds the trading days of one price series as a sorted int32
+array of day ordinals (date.toordinal()). A TurnSchedule turns a turn number
+into a calendar window [start, end); TradingIndex.rows maps that window to
+a row range [start_row, end_row) with two binary searches, so consumers
+slice the price arrays by row instead of comparing date strings. Weekends
+and holidays are simply days that are not in the index.
+
+The default schedule is the game's: a window from the 1st to the 28th of
+the next month, every 3 months from 2015-01-01. Other schedules can set the
+start date, the window length and the step; step=None makes the windows
+back to back (no gaps).
+No PySide6 here.
+"""
+from datetime import date
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+GAME_START = date(2015, 1, 1)
+
+
+def day_ordinal(day):
+    """Ordinal of a date, datetime or "YYYY-MM-DD..." string (time and zone are ignored)."""
+    if isinstance(day, str):
+        return date.fromisoformat(day[:10]).toordinal()
+    if hasattr(day, "date"):
+        day = day.date()
+    return day.toordinal()
+
+
+class TradingIndex:
+    def __init__(self, dates):
+        self.days = np.fromiter((day_ordinal(day) for day in dates), dtype=np.int32, count=len(dates))
+        if len(self.days) > 1 and np.any(self.days[1:] <= self.days[:-1]):
+            raise ValueError("trading days must be sorted and unique")
+
+    def __len__(self):
+        return len(self.days)
+
+    def rows(self, start_day, end_day):
+        """[start_row, end_row) of the trading days in [start_day, end_day) (ordinals)."""
+        start_row, end_row = np.searchsorted(self.days, (start_day, end_day))
+        return int(start_row), int(end_row)
+
+    def rows_many(self, starts, ends):
+        """Vectorized rows() for arrays of window bounds."""
+        return np.searchsorted(self.days, starts), np.searchsorted(self.days, ends)
+
+
+def _months(value):
+    return relativedelta(months=value) if isinstance(value, int) else value
+
+
+class TurnSchedule:
+    """
+    Window and step are whole months (int) or a relativedelta. The game's
+    windows run from the 1st to the 28th of the next month (1 month 27 days).
+    """
+
+    def __init__(self, start=GAME_START, window=relativedelta(months=1, days=27), step=3):
+        self.start = date.fromisoformat(start) if isinstance(start, str) else start
+        self.window_length = _months(window)
+        # None = back to back windows, each starting where the previous one ends
+        self.step = _months(step) if step is not None else None
+        if self.start + self.window_length <= self.start:
+            raise ValueError("the turn window must be longer than zero days")
+        self._windows = {}
+
+    def window(self, turn):
+        """(start, end) dates of a turn; end is exclusive."""
+        window = self._windows.get(turn)
+        if window is not None:
+            return window
+        if self.step is not None:
+            start = self.start + self.step * turn
+            window = self._windows[turn] = (start, start + self.window_length)
+            return window
+        # Back to back: walk forward from the last known window
+        known = max((t for t in self._windows if t < turn), default=None)
+        end = self.start if known is None else self._windows[known][1]
+        for t in range(0 if known is None else known + 1, turn + 1):
+            window = self._windows[t] = (end, end + self.window_length)
+            end = window[1]
+        return window
+
+    def dates(self, turn):
+        """(start, end) as "YYYY-MM-DD" strings, the form yfinance takes."""
+        start, end = self.window(turn)
+        return start.isoformat(), end.isoformat()
+
+    def bounds(self, turn):
+        """(start, end) day ordinals of a turn."""
+        start, end = self.window(turn)
+        return start.toordinal(), end.toordinal()
+
+    def bounds_array(self, turns):
+        """int32 arrays of start and end ordinals for turns 0..turns-1."""
+        pairs = np.array([self.bounds(turn) for turn in range(turns)], dtype=np.int32).reshape(-1, 2)
+        return pairs[:, 0], pairs[:, 1]
+
+    def rows(self, index, turn):
+        """[start_row, end_row) of a turn in a TradingIndex."""
+        return index.rows(*self.bounds(turn))
+
+    def period(self, max_turns):
+        """(first start, last end) date strings covering turns 0..max_turns."""
+        return self.dates(0)[0], self.dates(max_turns)[1]
+
+
+DEFAULT_SCHEDULE = TurnSchedule()
@@ -0,0 +1,124 @@
+# universe.py
+"""
+Tradable universe loaded from a manifest.
+
+The manifest is a CSV (columns: symbol, name, sector, logo) or a JSON list of
+objects with the same keys, e.g. a whole index. Only `symbol` is required;
+without a logo the game draws a monogram (see logos.py). The file is read
+row by row into small tuples, with repeated sector names shared, so even a
+few thousand tickers take little memory. No PySide6 here: the offline tools
+read the same manifest.
+
+The game uses Game_code/universe.csv unless DEATHMONOPOLY_UNIVERSE points
+to another manifest.
+"""
+import csv
+import json
+import os
+import sys
+from collections import namedtuple
+
+from Game_code.game_rules import STOCK_OPTIONS
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MANIFEST = os.path.join(REPO_DIR, "universe.csv")
+
+Security = namedtuple("Security", "symbol name sector logo")
+
+
+class Universe:
+    def __init__(self, securities=()):
+        # symbol -> Security, in manifest order
+        self.securities = {}
+        for security in securities:
+            self.securities.setdefault(security.symbol, security)
+
+    def __len__(self):
+        return len(self.securities)
+
+    def __contains__(self, symbol):
+        return symbol in self.securities
+
+    def __iter__(self):
+        return iter(self.securities.values())
+
+    def get(self, symbol):
+        return self.securities.get(symbol)
+
+    def symbols(self):
+        return list(self.securities)
+
+    def logo_options(self):
+        """{symbol: logo path or None}, the shape ActionManager.options uses."""
+        return {security.symbol: security.logo for security in self.securities.values()}
+
+
+def _field(row, name):
+    value = row.get(name)
+    return "" if value is None else str(value).strip()
+
+
+def _security(row):
+    # Wiersz JSON może być czymkolwiek; zły plik to ten sam ValueError co nieczytelny JSON
+    if not isinstance(row, dict):
+        raise ValueError(f"A manifest row must be an object, got {row!r}")
+    symbol = _field(row, "symbol").upper()
+    if not symbol:
+        return None
+    name = _field(row, "name") or symbol
+    sector = sys.intern(_field(row, "sector"))
+    logo = _field(row, "logo") or None
+    return Security(sys.intern(symbol), name, sector, logo)
+
+
+def _read_rows(path):
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        if isinstance(data, dict):
+            data = data.get("securities", [])
+        if not isinstance(data, list):
+            raise ValueError(f"{path}: expected a list of securities")
+        yield from data
+        return
+    with open(path, newline="", encoding="utf-8") as file:
+        yield from csv.DictReader(file)
+
+
+def load_manifest(path):
+    """
+    Reads a CSV/JSON manifest. Rows without a symbol are skipped and the first
+    row wins for duplicated symbols. Raises OSError / ValueError for unreadable files.
+    """
+    return Universe(security for security in map(_security, _read_rows(path)) if security is not None)
+
+
+def builtin_universe():
+    """The 11 bundled tickers, used when no manifest can be read."""
+    return Universe(Security(symbol, symbol, "", logo) for symbol, logo in STOCK_OPTIONS.items())
+
+
+_default = None
+
+
+def load_universe(path=None):
+    """
+    The game's universe: `path`, else $DEATHMONOPOLY_UNIVERSE, else the bundled
+    manifest. The default one is read once and shared.
+    """
+    global _default
+    if path is None and _default is not None:
+        return _default
+
+    manifest = path or os.getenv("DEATHMONOPOLY_UNIVERSE") or DEFAULT_MANIFEST
+    try:
+        universe = load_manifest(manifest)
+    except (OSError, ValueError) as e:
+        print(f"Could not read universe manifest {manifest}: {e}")
+        universe = Universe()
+    if len(universe) == 0:
+        universe = builtin_universe()
+
+    if path is None:
+        _default = universe
+    return universe
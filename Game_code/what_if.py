@@ -0,0 +1,262 @@
+# what_if.py
+"""
+Exhaustive what-if evaluation of every portfolio.
+
+With 11 tickers there are only C(11,6) = 462 ticker combinations, and money is
+invested in coarse $100 steps, so every possible portfolio can be evaluated.
+The per-turn price changes are turned into a table of "final value of u units
+invested in ticker k" once; after that every (combination, allocation) pair is
+a couple of gathers and adds, computed in batches with NumPy.
+
+Usage:
+    python -m Game_code.what_if --balance 2400
+    python -m Game_code.what_if --synthetic --repeat 5      # benchmark, no data needed
+"""
+import argparse
+import itertools
+import sys
+import time
+from math import comb
+
+import numpy as np
+
+from Game_code.game_rules import (
+    CENTS,
+    INVESTMENT_STEP,
+    MAX_TURNS,
+    PORTFOLIO_SIZE,
+    STOCK_OPTIONS,
+    cents_to_dollars,
+    format_dollars,
+    revalue_cents,
+    to_cents,
+)
+from Game_code.simulate import positive_int
+
+# Combinations evaluated per batch; keeps each (batch, grid) block at a few MB
+COMBO_BATCH = 8
+
+
+def multiplier_matrix(store, tickers, max_turns=MAX_TURNS):
+    """Returns a (tickers, turns) float64 matrix of per-turn price changes from a PriceStore."""
+    multipliers = store.turn_multipliers(tickers, max_turns)
+    return np.array([multipliers[ticker] for ticker in tickers], dtype=np.float64)
+
+
+def value_table(multipliers, max_units, step=INVESTMENT_STEP):
+    """
+    Returns an int64 (tickers, max_units + 1) table: entry [k, u] is the final
+    value in cents of investing u * step dollars in ticker k, rounded to the
+    cent every turn exactly like the game's ledger does (round half to even).
+    """
+    values = np.broadcast_to(np.arange(max_units + 1, dtype=np.float64) * step * CENTS,
+                             (multipliers.shape[0], max_units + 1)).copy()
+    for turn in range(multipliers.shape[1]):
+        values = np.rint(values * multipliers[:, turn, None])
+    return values.astype(np.int64)
+
+
+def ticker_combinations(n_tickers, size=PORTFOLIO_SIZE):
+    """Returns every combination of `size` ticker indices as an (C, size) int array."""
+    return np.array(list(itertools.combinations(range(n_tickers), size)), dtype=np.intp)
+
+
+def allocation_grid(units, size=PORTFOLIO_SIZE, allow_cash=True):
+    """
+    Returns every allocation of `units` steps over `size` positions, each holding
+    at least one step, as a (G, size) int array. With allow_cash, steps may also
+    stay unspent (the player can keep money in hand).
+    """
+    if units < size:
+        return np.empty((0, size), dtype=np.intp)
+    parts = size + 1 if allow_cash else size
+    # Stars and bars over the steps left after the mandatory one per position
+    free = units - size
+    bars = np.array(list(itertools.combinations(range(free + parts - 1), parts - 1)), dtype=np.intp)
+    if bars.size == 0:
+        bars = np.empty((1, 0), dtype=np.intp)
+    edges = np.concatenate([
+        np.full((len(bars), 1), -1, dtype=np.intp),
+        bars,
+        np.full((len(bars), 1), free + parts - 1, dtype=np.intp),
+    ], axis=1)
+    counts = np.diff(edges, axis=1) - 1
+    return counts[:, :size] + 1
+
+
+def grid_size(units, size=PORTFOLIO_SIZE, allow_cash=True):
+    """Number of rows allocation_grid would return, without building it."""
+    if units < size:
+        return 0
+    parts = size + 1 if allow_cash else size
+    return comb(units - size + parts - 1, parts - 1)
+
+
+def portfolio_outcome(multipliers, ticker_indices, amounts, balance):
+    """Final balance in dollars of one concrete portfolio (amounts in dollars)."""
+    total = to_cents(balance - sum(amounts))
+    for index, amount in zip(ticker_indices, amounts):
+        value = to_cents(amount)
+        for turn in range(multipliers.shape[1]):
+            value = revalue_cents(value, float(multipliers[index, turn]))
+        total += value
+    return cents_to_dollars(total)
+
+
+def _half_tables(table, combos, grid, columns):
+    """
+    Pre-sums the positions in `columns` (one half of the portfolio).
+
+    Returns (combo_rows, alloc_index, sums): sums[r, a] is the value of ticker
+    sub-combination r with sub-allocation a, combo_rows maps every full combination
+    to its r and alloc_index maps every grid row to its a.
+    """
+    sub_allocs, alloc_index = np.unique(grid[:, columns], axis=0, return_inverse=True)
+    sub_combos, combo_rows = np.unique(combos[:, columns], axis=0, return_inverse=True)
+    sums = np.zeros((len(sub_combos), len(sub_allocs)), dtype=np.int32)
+    for j in range(sub_combos.shape[1]):
+        sums += table[sub_combos[:, j]][:, sub_allocs[:, j]]
+    return combo_rows.ravel(), alloc_index.ravel(), sums
+
+
+def evaluate_all(multipliers, balance, grid_step=INVESTMENT_STEP, player_outcome=None,
+                 allow_cash=True, size=PORTFOLIO_SIZE):
+    """
+    Evaluates every ticker combination against every allocation on the grid.
+
+    Returns a dict with the best portfolio, the number evaluated, the mean outcome
+    and, when player_outcome is given, the player's percentile and regret.
+    Balances are in dollars; the evaluation itself runs in cents.
+    """
+    started = time.perf_counter()
+    units = balance // grid_step
+    combos = ticker_combinations(multipliers.shape[0], size)
+    grid = allocation_grid(units, size, allow_cash)
+    if len(combos) == 0 or len(grid) == 0:
+        return None
+
+    table = value_table(multipliers, units, grid_step).astype(np.int32)
+    cash = ((balance - grid.sum(axis=1) * grid_step) * CENTS).astype(np.int32)
+    player_cents = to_cents(player_outcome) if player_outcome is not None else None
+
+    # Meet in the middle: pre-sum each half of the portfolio, so every
+    # (combination, allocation) outcome costs two gathers instead of `size`
+    half = size // 2
+    rows_a, index_a, sums_a = _half_tables(table, combos, grid, slice(0, half))
+    rows_b, index_b, sums_b = _half_tables(table, combos, grid, slice(half, size))
+
+    best_value = None
+    best_combo = best_alloc = 0
+    total_sum = 0
+    below = equal = 0
+    for start in range(0, len(combos), COMBO_BATCH):
+        stop = min(start + COMBO_BATCH, len(combos))
+        # (batch, G) final balances
+        outcomes = sums_a[rows_a[start:stop]][:, index_a]
+        outcomes += sums_b[rows_b[start:stop]][:, index_b]
+        outcomes += cash
+
+        flat_index = int(outcomes.argmax())
+        batch_best = int(outcomes.flat[flat_index])
+        if best_value is None or batch_best > best_value:
+            best_value = batch_best
+            best_combo, best_alloc = divmod(flat_index, outcomes.shape[1])
+            best_combo += start
+
+        total_sum += int(outcomes.sum(dtype=np.int64))
+        if player_cents is not None:
+            below += int(np.count_nonzero(outcomes < player_cents))
+            equal += int(np.count_nonzero(outcomes == player_cents))
+
+    evaluated = len(combos) * len(grid)
+    result = {
+        "evaluated": evaluated,
+        "best_balance": cents_to_dollars(best_value),
+        "best_tickers": [int(i) for i in combos[best_combo]],
+        "best_amounts": [int(u) * grid_step for u in grid[best_alloc]],
+        "mean_balance": total_sum / evaluated / CENTS,
+        "seconds": time.perf_counter() - started,
+    }
+    if player_outcome is not None:
+        # Ties count as half, so an average portfolio lands on the 50th percentile
+        result["player_balance"] = player_outcome
+        result["percentile"] = 100.0 * (below + 0.5 * equal) / evaluated
+        result["regret"] = cents_to_dollars(max(0, best_value - player_cents))
+    return result
+
+
+def evaluate_player(store, picks, amounts, balance, grid_step=INVESTMENT_STEP,
+                    max_turns=MAX_TURNS, tickers=None):
+    """
+    What-if summary for a finished game, or None if some ticker has no local history.
+    `picks`/`amounts` are the player's tickers and the dollars put into each at the start.
+    """
+    tickers = list(tickers or STOCK_OPTIONS)
+    if store.missing(tickers) or any(pick not in tickers for pick in picks):
+        return None
+
+    multipliers = multiplier_matrix(store, tickers, max_turns)
+    player = portfolio_outcome(multipliers, [tickers.index(pick) for pick in picks], amounts, balance)
+    result = evaluate_all(multipliers, balance, grid_step, player_outcome=player)
+    if result is None:
+        return None
+    result["best_tickers"] = [tickers[i] for i in result["best_tickers"]]
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m Game_code.what_if", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--balance", type=int, default=2400)
+    parser.add_argument("--grid-step", type=positive_int, default=INVESTMENT_STEP, help="allocation step in dollars")
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS)
+    parser.add_argument("--no-cash", action="store_true", help="only portfolios that spend the whole balance")
+    parser.add_argument("--repeat", type=positive_int, default=1, help="repeat the evaluation (benchmark mode)")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="random price changes instead of local history (no data needed)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history-dir", help="directory with <TICKER>.csv price history")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    tickers = list(STOCK_OPTIONS)
+
+    if args.synthetic:
+        rng = np.random.default_rng(args.seed)
+        multipliers = rng.normal(1.0, 0.08, size=(len(tickers), args.max_turns + 1)).clip(0.5, 1.5)
+    else:
+        from Game_code.price_store import PriceStore, HISTORY_DIR
+        store = PriceStore(args.history_dir or HISTORY_DIR)
+        missing = store.missing(tickers)
+        if missing:
+            print(f"No local price history for: {', '.join(missing)}", file=sys.stderr)
+            print("Run `python -m Game_code.simulate --download` once, or use --synthetic.", file=sys.stderr)
+            return 1
+        multipliers = multiplier_matrix(store, tickers, args.max_turns)
+
+    units = args.balance // args.grid_step
+    portfolios = comb(len(tickers), PORTFOLIO_SIZE) * grid_size(units, allow_cash=not args.no_cash)
+    print(f"{comb(len(tickers), PORTFOLIO_SIZE)} combinations x "
+          f"{grid_size(units, allow_cash=not args.no_cash)} allocations = {portfolios:,} portfolios")
+
+    result = None
+    timings = []
+    for _ in range(args.repeat):
+        result = evaluate_all(multipliers, args.balance, args.grid_step, allow_cash=not args.no_cash)
+        if result is None:
+            print("Balance too small for a full portfolio on this grid.", file=sys.stderr)
+            return 1
+        timings.append(result["seconds"])
+
+    best = ", ".join(f"{tickers[i]} ${amount}" for i, amount in zip(result["best_tickers"], result["best_amounts"]))
+    print(f"Best final balance: ${format_dollars(result['best_balance'])}  ({best})")
+    print(f"Mean final balance: ${result['mean_balance']:.2f}")
+    fastest = min(timings)
+    print(f"Time: best {fastest:.3f}s over {len(timings)} run(s), "
+          f"{result['evaluated'] / fastest if fastest else 0:,.0f} portfolios/sec")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# what_if_runner.py
+"""
+Runs the what-if evaluation (what_if.evaluate_player) off the GUI thread.
+
+The outcome of every possible portfolio only depends on the opening
+portfolio and the local price history, so each player's evaluation starts
+as soon as the game does, in a worker thread, and is usually done long
+before the last turn. Results come back to the GUI thread through a queued
+signal; a result of an older game (after a reset or a new start) is dropped.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, Qt, Signal
+
+from Game_code.game_rules import MAX_TURNS
+from Game_code.price_store import PriceStore
+from Game_code.what_if import evaluate_player
+
+
+def evaluate_opening(picks, opening, max_turns=MAX_TURNS):
+    """
+    What-if summary of an opening portfolio (hot_seat.Roster.openings entry),
+    or None when the local price history is not available.
+    """
+    try:
+        return evaluate_player(PriceStore(), picks, opening["initial_investments"], opening["start_balance"],
+                               max_turns=max_turns)
+    except (OSError, ValueError) as e:
+        print(f"What-if evaluation skipped: {e}")
+        return None
+
+
+class WhatIfRunner(QObject):
+    # (indeks gracza, wynik albo None)
+    finished = Signal(int, object)
+    # Z wątku roboczego do wątku GUI: (numer gry, indeks gracza, future)
+    _arrived = Signal(int, int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._executor = None
+        self._generation = 0
+        self.results = {}
+        self.pending = set()
+        self._arrived.connect(self._store, Qt.ConnectionType.QueuedConnection)
+
+    def start(self, players, max_turns=MAX_TURNS):
+        """Evaluates [(player index, picks, opening)] one after another in a worker thread."""
+        self.cancel()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="what-if")
+        generation = self._generation
+        for index, picks, opening in players:
+            self.pending.add(index)
+            future = self._executor.submit(evaluate_opening, list(picks), opening, max_turns)
+            future.add_done_callback(
+                lambda done, index=index: self._arrived.emit(generation, index, done))
+
+    def cancel(self):
+        """Forgets the current game's results; evaluations still running are dropped when they end."""
+        self._generation += 1
+        self.results = {}
+        self.pending = set()
+
+    def is_pending(self, index):
+        return index in self.pending
+
+    def _store(self, generation, index, future):
+        if generation != self._generation:
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"What-if evaluation failed: {e}")
+            result = None
+        self.pending.discard(index)
+        self.results[index] = result
+        self.finished.emit(index, result)
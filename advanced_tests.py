@@ -33,6 +33,26 @@ def qapp():
     app.quit()
 
 
+@pytest.fixture(autouse=True)
+def isolated_user_data():
+    # Every test gets empty caches, fresh fetch guards and its own save file and leaderboard instead of the
+    # user's ones; the turn deadline is off so the pipeline does not depend on the machine's speed
+    from Game_code import data_cache, indicators, fetch_guard, leaderboard
+    cache_dir = tempfile.mkdtemp()
+    save_file = os.path.join(cache_dir, 'savegame.json')
+    scores = leaderboard.Leaderboard(os.path.join(cache_dir, 'leaderboard.sqlite3'))
+    with patch.object(data_cache, '_cache', data_cache.DataCache(cache_dir)), \
+            patch.object(indicators, '_engine', indicators.IndicatorEngine()), \
+            patch.object(fetch_guard, '_negative', fetch_guard.NegativeCache()), \
+            patch.object(fetch_guard, '_breakers', {}), \
+            patch.object(leaderboard, '_leaderboard', scores), \
+            patch.dict(os.environ, {'DEATHMONOPOLY_SAVE': save_file, 'DEATHMONOPOLY_TURN_DEADLINE': '0'}):
+        yield
+    scores.close()
+    import shutil
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
 @pytest.fixture
 def game_setup(qapp):
     player_manager = PlayerManager()
@@ -149,12 +169,9 @@ class TestAIDialogueGeneration:
         mock_openai.return_value = mock_client
 
         with patch('Game_code.AI.client', mock_client):
-            with patch('pandas.read_csv') as mock_read_csv:
-                # Create a proper mock DataFrame
-                mock_df = pd.DataFrame({
-                    'Close': [100.0, 105.0, 110.0]
-                })
-                mock_read_csv.return_value = mock_df
+            # The prompt's prices come from the indicator engine's CSV reader
+            with patch('Game_code.indicators.read_price_file') as mock_read:
+                mock_read.return_value = (['d1', 'd2', 'd3'], [100.0, 105.0, 110.0])
 
                 ask_bot("Test", "BORIS")
 
@@ -264,11 +281,8 @@ class TestAIDialogueGeneration:
 
         with patch('Game_code.AI.client', mock_client):
             with patch('os.listdir', return_value=['TEST_history.csv']):
-                with patch('pandas.read_csv') as mock_read_csv:
-                    mock_df = pd.DataFrame({
-                        'Close': [100.0, 110.0]
-                    })
-                    mock_read_csv.return_value = mock_df
+                with patch('Game_code.indicators.read_price_file') as mock_read:
+                    mock_read.return_value = (['d1', 'd2'], [100.0, 110.0])
 
                     ask_bot("Test", "BORIS")
 
@@ -524,49 +538,45 @@ class TestStockDataIntegration:
                 result = get_price_change('TEST')
                 assert result == 1.0
 
-    @patch('matplotlib.pyplot.savefig')
-    @patch('matplotlib.pyplot.plot')
-    def test_get_data_chart_creates_chart(self, mock_plot, mock_savefig):
+    @patch('matplotlib.figure.Figure.savefig')
+    def test_get_data_chart_creates_chart(self, mock_savefig):
         # Verifies chart generation from CSV data
         csv_data = "Date,Close\n2024-01-01,100.0\n2024-01-02,105.0\n2024-01-03,110.0"
 
         with patch('builtins.open', mock_open(read_data=csv_data)):
             with patch('os.path.exists', return_value=True):
                 from Game_code.stock_data import get_data_chart
+                from Game_code.chart_renderer import get_chart_renderer
                 get_data_chart('TEST')
 
-                assert mock_plot.called
+                assert list(get_chart_renderer().line.get_ydata()) == [100.0, 105.0, 110.0]
                 assert mock_savefig.called
 
-    @patch('matplotlib.pyplot.savefig')
+    @patch('matplotlib.figure.Figure.savefig')
     def test_chart_color_green_for_profit(self, mock_savefig):
         # Ensures profitable stocks use green chart lines
         csv_data = "Date,Close\n2024-01-01,100.0\n2024-01-02,110.0"
 
         with patch('builtins.open', mock_open(read_data=csv_data)):
             with patch('os.path.exists', return_value=True):
-                with patch('matplotlib.pyplot.plot') as mock_plot:
-                    from Game_code.stock_data import get_data_chart
-                    get_data_chart('TEST')
+                from Game_code.stock_data import get_data_chart
+                from Game_code.chart_renderer import get_chart_renderer
+                get_data_chart('TEST')
 
-                    # Check that plot was called with green color
-                    call_args = mock_plot.call_args
-                    assert call_args[1].get('color') == 'green' or call_args[1].get('color') == 'red'
+                assert get_chart_renderer().line.get_color() == 'green'
 
-    @patch('matplotlib.pyplot.savefig')
+    @patch('matplotlib.figure.Figure.savefig')
     def test_chart_color_red_for_loss(self, mock_savefig):
         # Ensures losing stocks use red chart lines
         csv_data = "Date,Close\n2024-01-01,110.0\n2024-01-02,100.0"
 
         with patch('builtins.open', mock_open(read_data=csv_data)):
             with patch('os.path.exists', return_value=True):
-                with patch('matplotlib.pyplot.plot') as mock_plot:
-                    from Game_code.stock_data import get_data_chart
-                    get_data_chart('TEST')
+                from Game_code.stock_data import get_data_chart
+                from Game_code.chart_renderer import get_chart_renderer
+                get_data_chart('TEST')
 
-                    # Should use red for loss
-                    call_args = mock_plot.call_args
-                    assert call_args[1].get('color') in ['green', 'red']
+                assert get_chart_renderer().line.get_color() == 'red'
 
     @patch('os.path.exists', return_value=False)
     def test_chart_generation_skips_missing_csv(self, mock_exists):
@@ -574,19 +584,20 @@ class TestStockDataIntegration:
         from Game_code.stock_data import get_data_chart
         get_data_chart('NONEXISTENT')  # Should not crash
 
-    @patch('matplotlib.pyplot.savefig')
+    @patch('matplotlib.figure.Figure.savefig')
     @patch('os.path.exists', return_value=True)
     def test_generate_all_charts_uniform_scale(self, mock_exists, mock_savefig):
         # Verifies all charts use same Y-axis scale for comparison
         csv_data = "Date,Close\n2024-01-01,100.0\n2024-01-02,105.0"
 
         with patch('builtins.open', mock_open(read_data=csv_data)):
-            with patch('matplotlib.pyplot.ylim') as mock_ylim:
+            with patch('matplotlib.axes.Axes.set_ylim') as mock_ylim:
                 from Game_code.stock_data import generate_all_charts
                 generate_all_charts(['AAPL', 'GOOG'])
 
                 # ylim should be called with consistent values
                 assert mock_ylim.call_count >= 2
+                assert mock_ylim.call_args_list[0] == mock_ylim.call_args_list[1]
 
     @patch('os.remove')
     @patch('glob.glob')
@@ -1385,6 +1396,2568 @@ class TestPerformance:
             parent.deleteLater()
 
 
+# ============================================================================
+# Monte Carlo Simulator Tests
+# ============================================================================
+
+@pytest.fixture
+def price_history_dir():
+    history_dir = tempfile.mkdtemp()
+    rows = [
+        ('2015-01-02', '100.0'), ('2015-02-27', '110.0'),   # turn 0: +10%
+        ('2015-04-01', '200.0'), ('2015-05-27', '100.0'),   # turn 1: -50%
+    ]
+    for ticker in ['AAPL', 'GOOG']:
+        with open(os.path.join(history_dir, f'{ticker}.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Date', 'Close'])
+            for date, close in rows:
+                writer.writerow([f'{date} 00:00:00-05:00', close])
+
+    yield history_dir
+
+    for name in os.listdir(history_dir):
+        os.remove(os.path.join(history_dir, name))
+    os.rmdir(history_dir)
+
+
+class TestMonteCarloSimulator:
+    """Test the offline strategy simulator"""
+
+    def test_start_balance_matches_difficulty(self):
+        # Verifies the shared difficulty table used by GamePage and the simulator
+        from Game_code.game_rules import get_start_balance
+        assert get_start_balance(1) == 2400
+        assert get_start_balance(2) == 1200
+        assert get_start_balance(3) == 600
+        assert get_start_balance(-1) == 600
+
+    def test_price_store_turn_multiplier(self, price_history_dir):
+        # Ensures the store slices each turn window and uses first/last close
+        from Game_code.price_store import PriceStore
+        store = PriceStore(price_history_dir)
+
+        assert abs(store.turn_multiplier('AAPL', 0) - 1.1) < 1e-9
+        assert abs(store.turn_multiplier('AAPL', 1) - 0.5) < 1e-9
+        assert store.turn_multiplier('AAPL', 2) == 1.0  # no data in window
+
+    def test_price_store_reports_missing_tickers(self, price_history_dir):
+        # Tests that missing local history is detected before simulating
+        from Game_code.price_store import PriceStore
+        store = PriceStore(price_history_dir)
+        assert store.missing(['AAPL', 'GOOG', 'MSFT']) == ['MSFT']
+
+    def test_play_game_rounds_to_cents_like_game_page(self):
+        # Verifies positions are multiplied and rounded to the cent every turn
+        from Game_code.simulate import play_game
+        multipliers = {'AAPL': [1.5, 0.5], 'GOOG': [1.0, 1.0]}
+
+        final = play_game(['AAPL', 'GOOG'], [101, 100], 300, multipliers, 2)
+
+        # AAPL: 101.00 * 1.5 = 151.50 -> 151.50 * 0.5 = 75.75; GOOG stays 100; 99 unspent
+        assert final == 75.75 + 100 + 99
+
+    def test_random_strategies_respect_rules(self):
+        # Ensures generated portfolios follow the 6 x $100 step rules
+        import random
+        from Game_code.simulate import STRATEGY_FUNCTIONS
+        from Game_code.game_rules import STOCK_OPTIONS
+
+        rng = random.Random(1)
+        for strategy in STRATEGY_FUNCTIONS.values():
+            for balance in (2400, 1200, 600):
+                picks, amounts = strategy(rng, list(STOCK_OPTIONS), balance)
+                assert len(set(picks)) == 6
+                assert all(amount >= 100 and amount % 100 == 0 for amount in amounts)
+                assert sum(amounts) <= balance
+
+    def test_summary_percentiles_and_bankruptcy(self):
+        # Tests distribution summary values
+        from Game_code.simulate import summarize
+        summary = summarize([500, 600, 700, 800, 900], 600, 600)
+
+        assert summary['median'] == 700
+        assert summary['min'] == 500
+        assert summary['max'] == 900
+        assert summary['bankruptcy_rate'] == 0.2
+        assert summary['profit_rate'] == 0.6
+
+    def test_simulate_without_history_fails_cleanly(self):
+        # Verifies the CLI reports missing data instead of going online
+        from Game_code.simulate import main
+        empty_dir = tempfile.mkdtemp()
+        try:
+            assert main(['--history-dir', empty_dir, '--games', '1', '--workers', '1']) == 1
+        finally:
+            os.rmdir(empty_dir)
+
+    def test_simulate_rejects_bad_counts(self):
+        # Ensures --chunk 0 (an endless loop) and negative --games are refused by argparse
+        from Game_code.simulate import build_parser
+        for argv in (['--chunk', '0'], ['--games', '-1']):
+            with pytest.raises(SystemExit):
+                build_parser().parse_args(argv)
+        args = build_parser().parse_args(['--chunk', '1', '--games', '0'])
+        assert (args.chunk, args.games) == (1, 0)
+
+
+# ============================================================================
+# What-If Engine Tests
+# ============================================================================
+
+class TestWhatIfEngine:
+    """Test exhaustive evaluation of every portfolio"""
+
+    def test_allocation_grid_counts(self):
+        # Verifies the grid enumerates every $100 split with at least one step each
+        from Game_code.what_if import allocation_grid, grid_size
+        full = allocation_grid(8, allow_cash=False)
+        with_cash = allocation_grid(8, allow_cash=True)
+
+        assert len(full) == grid_size(8, allow_cash=False) == 21     # C(7, 5)
+        assert len(with_cash) == grid_size(8, allow_cash=True) == 28  # C(8, 6)
+        assert (full.sum(axis=1) == 8).all()
+        assert (with_cash.min(axis=1) >= 1).all()
+        assert (with_cash.sum(axis=1) <= 8).all()
+
+    def test_value_table_rounds_to_cents_every_turn(self):
+        # Ensures the table follows the ledger's per-turn rounding to the cent
+        import numpy as np
+        from Game_code.what_if import value_table
+        from Game_code.game_rules import revalue_cents
+        table = value_table(np.array([[1.5, 0.333]]), 2, step=101)
+
+        assert table[0, 1] == revalue_cents(revalue_cents(10100, 1.5), 0.333)
+        assert table[0, 0] == 0
+
+    def test_evaluate_all_matches_brute_force(self):
+        # Tests the batched evaluation against playing every portfolio one by one
+        import itertools
+        import numpy as np
+        from Game_code.what_if import evaluate_all
+        from Game_code.simulate import play_game
+
+        multipliers = np.random.default_rng(3).normal(1.0, 0.1, size=(7, 3))
+        balance = 800
+        outcomes = []
+        for combo in itertools.combinations(range(7), 6):
+            for alloc in itertools.product(range(1, 4), repeat=6):
+                if sum(alloc) <= 8:
+                    amounts = [units * 100 for units in alloc]
+                    prices = {i: list(multipliers[i]) for i in range(7)}
+                    outcomes.append(play_game(list(combo), amounts, balance, prices, 3))
+
+        result = evaluate_all(multipliers, balance, player_outcome=outcomes[0])
+
+        assert result['evaluated'] == len(outcomes)
+        assert result['best_balance'] == max(outcomes)
+        assert abs(result['mean_balance'] - sum(outcomes) / len(outcomes)) < 1e-9
+        assert result['regret'] == pytest.approx(max(outcomes) - outcomes[0])
+
+    def test_evaluate_player_needs_full_portfolio(self, price_history_dir):
+        # Verifies no summary is produced when fewer than 6 tickers are known
+        from Game_code.price_store import PriceStore
+        from Game_code.what_if import evaluate_player
+
+        result = evaluate_player(PriceStore(price_history_dir), ['AAPL'], [100], 200,
+                                 max_turns=1, tickers=['AAPL', 'GOOG'])
+        assert result is None
+
+    def test_evaluate_player_missing_history(self):
+        # Ensures the dialog gets None instead of an error without local data
+        from Game_code.price_store import PriceStore
+        from Game_code.what_if import evaluate_player
+        empty_dir = tempfile.mkdtemp()
+        try:
+            assert evaluate_player(PriceStore(empty_dir), ['AAPL'], [100], 2400) is None
+        finally:
+            os.rmdir(empty_dir)
+
+    def test_cli_rejects_zero_grid_step(self):
+        # Ensures --grid-step 0 is a usage error instead of a ZeroDivisionError
+        from Game_code.what_if import build_parser, main
+        with pytest.raises(SystemExit):
+            main(['--synthetic', '--grid-step', '0'])
+        with pytest.raises(SystemExit):
+            build_parser().parse_args(['--repeat', '0'])
+        assert build_parser().parse_args(['--grid-step', '50']).grid_step == 50
+
+    def test_game_over_dialog_shows_what_if(self, qapp):
+        # Tests that the best outcome, percentile and regret are displayed
+        from Game_code.game_over_dialog import GameOverDialog
+        text = GameOverDialog.what_if_text({
+            'best_balance': 3100, 'best_tickers': ['NVDA', 'EA'],
+            'percentile': 72.4, 'regret': 450,
+        })
+
+        assert '3100' in text
+        assert '72%' in text
+        assert '450' in text
+        assert GameOverDialog.what_if_text(None) == ""
+
+
+# ============================================================================
+# Turn Pipeline Benchmark Tests
+# ============================================================================
+
+class TestTurnPipelineBenchmark:
+    """Test the timed benchmark suite and its baseline comparison"""
+
+    def test_summarize_samples_percentiles(self):
+        # Verifies percentile summary of timings
+        from Game_code.benchmark import summarize_samples
+        summary = summarize_samples([5.0, 1.0, 3.0, 2.0, 4.0])
+
+        assert summary['p50'] == 3.0
+        assert summary['min'] == 1.0
+        assert summary['max'] == 5.0
+        assert summary['runs'] == 5
+
+    def test_compare_flags_regression_above_threshold(self):
+        # Tests that only stages slower than the threshold are flagged
+        from Game_code.benchmark import compare_results
+        baseline = {'stages': {'chart': {'p50': 100.0}, 'decode': {'p50': 10.0}}}
+        current = {'stages': {'chart': {'p50': 130.0}, 'decode': {'p50': 11.0}}}
+
+        rows = {row[0]: row for row in compare_results(baseline, current, threshold=0.2)}
+
+        assert rows['chart'][4] is True
+        assert rows['decode'][4] is False
+
+    def test_compare_ignores_sub_millisecond_noise(self):
+        # Ensures tiny absolute slowdowns are not reported as regressions
+        from Game_code.benchmark import compare_results
+        baseline = {'stages': {'price_change': {'p50': 0.2}}}
+        current = {'stages': {'price_change': {'p50': 0.4}}}
+
+        rows = compare_results(baseline, current, threshold=0.2, min_delta_ms=0.5)
+        assert rows[0][4] is False
+
+    def test_run_benchmarks_offline(self, qapp):
+        # Verifies the suite times stages against fixtures without touching game data
+        from Game_code.benchmark import run_benchmarks
+        from Game_code.stock_data import CSV_DIR
+        before = sorted(os.listdir(CSV_DIR))
+
+        result = run_benchmarks(['fetch', 'decode', 'price_change', 'prompt'], repeat=2, warmup=0)
+
+        assert set(result['stages']) == {'fetch', 'decode', 'price_change', 'prompt'}
+        for stats in result['stages'].values():
+            assert stats['runs'] == 2
+            assert stats['p50'] >= 0
+        assert sorted(os.listdir(CSV_DIR)) == before
+
+    def test_baseline_round_trip(self):
+        # Tests saving and loading a JSON baseline
+        from Game_code.benchmark import save_json, load_json
+        path = os.path.join(tempfile.mkdtemp(), 'baseline.json')
+        data = {'version': 1, 'stages': {'decode': {'p50': 1.5}}}
+        try:
+            save_json(data, path)
+            assert load_json(path) == data
+        finally:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+    def test_cli_needs_at_least_one_repeat(self):
+        # Ensures --repeat 0 is a usage error instead of an IndexError in summarize_samples
+        from Game_code.benchmark import build_parser
+        for argv in (['run', '--repeat', '0'], ['compare', 'base.json', '--warmup', '-1']):
+            with pytest.raises(SystemExit):
+                build_parser().parse_args(argv)
+        assert build_parser().parse_args(['run', '--repeat', '1', '--warmup', '0']).repeat == 1
+
+
+# ============================================================================
+# Tracing Tests
+# ============================================================================
+
+@pytest.fixture
+def tracing_on():
+    """Enables tracing for one test and drops everything it recorded"""
+    from Game_code import tracing
+    tracing.reset()
+    tracing.enable()
+    yield tracing
+    tracing.disable()
+    tracing.reset()
+
+
+class TestTracing:
+    """Test the span recorder and the Chrome trace export"""
+
+    def test_disabled_span_is_shared_noop(self):
+        # Verifies disabled tracing records nothing and hands out one falsy object
+        from Game_code import tracing
+        tracing.disable()
+        tracing.reset()
+
+        with tracing.span('get_data', ticker='AAPL') as first:
+            pass
+        with tracing.turn_span(0) as second:
+            pass
+
+        assert first is second
+        assert not first
+        assert tracing.completed_turns() == []
+
+    def test_turn_collects_nested_spans(self, tracing_on):
+        # Tests that spans finished inside a turn are grouped under it
+        with tracing_on.turn_span(2):
+            with tracing_on.span('ask_bot', persona='BORIS') as trace_span:
+                trace_span.set(bytes=42)
+
+        turns = tracing_on.completed_turns()
+        assert len(turns) == 1
+        assert turns[0]['turn'] == 2
+        names = [event[0] for event in turns[0]['events']]
+        assert names == ['ask_bot', 'turn']
+        assert turns[0]['events'][0][4] == {'persona': 'BORIS', 'bytes': 42}
+
+    def test_span_marks_errors(self, tracing_on):
+        # Ensures a failing span is still recorded with the exception name
+        with pytest.raises(ValueError):
+            with tracing_on.turn_span(0):
+                with tracing_on.span('get_data_chart', ticker='AAPL'):
+                    raise ValueError('boom')
+
+        events = tracing_on.completed_turns()[0]['events']
+        assert events[0][4]['error'] == 'ValueError'
+
+    def test_export_chrome_trace(self, tracing_on):
+        # Verifies the export is valid Chrome trace-event JSON
+        import json
+        with tracing_on.turn_span(1):
+            with tracing_on.span('decode_pixmap', ticker='AAPL', bytes=1024):
+                pass
+
+        path = os.path.join(tempfile.mkdtemp(), 'trace.json')
+        try:
+            tracing_on.export_chrome_trace(path)
+            with open(path) as file:
+                data = json.load(file)
+        finally:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+        complete = [event for event in data['traceEvents'] if event['ph'] == 'X']
+        assert [event['name'] for event in complete] == ['decode_pixmap', 'turn']
+        assert complete[0]['args'] == {'ticker': 'AAPL', 'bytes': 1024}
+        assert complete[0]['dur'] >= 0
+        assert complete[0]['ts'] >= complete[1]['ts']
+
+    def test_get_data_records_ticker_and_bytes(self, tracing_on):
+        # Tests that the fetch stage is traced per ticker with the CSV size
+        from Game_code import stock_data
+        from Game_code.benchmark import FixtureTicker
+        csv_dir = tempfile.mkdtemp()
+        try:
+            with patch.object(stock_data, 'CSV_DIR', csv_dir), \
+                    patch.object(stock_data.yf, 'Ticker', FixtureTicker):
+                with tracing_on.turn_span(0):
+                    stock_data.get_data(['AAPL', 'MSFT'], 0)
+        finally:
+            import shutil
+            shutil.rmtree(csv_dir)
+
+        events = [event for event in tracing_on.completed_turns()[0]['events'] if event[0] == 'get_data']
+        assert [event[4]['ticker'] for event in events] == ['AAPL', 'MSFT']
+        assert all(event[4]['bytes'] > 0 for event in events)
+        assert all(event[4]['cache_hit'] is False for event in events)
+
+
+# ============================================================================
+# Chart Renderer Tests
+# ============================================================================
+
+class TestChartRenderer:
+    """Test the preallocated chart renderer and its error paths"""
+
+    def test_reuses_one_figure_without_pyplot(self):
+        # Verifies repeated renders reuse the same artists and register no pyplot figures
+        import matplotlib.pyplot as plt
+        from Game_code.chart_renderer import ChartRenderer
+        renderer = ChartRenderer(figsize=(2, 1), dpi=50)
+        figure, line = renderer.figure, renderer.line
+        folder = tempfile.mkdtemp()
+        try:
+            for i in range(5):
+                renderer.render('AAPL', [100.0, 101.0 + i, 99.0], os.path.join(folder, 'chart.png'))
+            assert os.path.getsize(os.path.join(folder, 'chart.png')) > 0
+        finally:
+            import shutil
+            shutil.rmtree(folder)
+
+        assert renderer.renders == 5
+        assert renderer.figure is figure
+        assert list(renderer.axes.lines) == [line]
+        assert plt.get_fignums() == []
+
+    def test_render_sets_limits_and_title(self):
+        # Tests that the shared Y range and title follow each chart
+        from Game_code.chart_renderer import ChartRenderer
+        renderer = ChartRenderer(figsize=(2, 1), dpi=50)
+
+        with patch.object(renderer.figure, 'savefig'):
+            renderer.render('MSFT', [10.0, 20.0], 'unused.png', y_range=(5.0, 50.0))
+
+        assert renderer.axes.get_ylim() == (5.0, 50.0)
+        assert renderer.axes.get_title() == 'MSFT Stock Price'
+        assert renderer.line.get_color() == 'green'
+
+    def test_render_rejects_empty_series(self):
+        # Ensures an empty series raises instead of indexing prices[-1]
+        from Game_code.chart_renderer import ChartRenderer
+        renderer = ChartRenderer(figsize=(2, 1), dpi=50)
+        with pytest.raises(ValueError):
+            renderer.render('AAPL', [], 'unused.png')
+
+    def test_failed_save_removes_partial_file(self):
+        # Verifies a failing save leaves no half-written chart behind
+        from Game_code.chart_renderer import ChartRenderer
+        renderer = ChartRenderer(figsize=(2, 1), dpi=50)
+        folder = tempfile.mkdtemp()
+        path = os.path.join(folder, 'chart.png')
+
+        def broken_save(target, **kwargs):
+            open(target, 'wb').close()
+            raise OSError('disk full')
+
+        try:
+            with patch.object(renderer.figure, 'savefig', side_effect=broken_save):
+                with pytest.raises(OSError):
+                    renderer.render('AAPL', [1.0, 2.0], path)
+            assert not os.path.exists(path)
+        finally:
+            os.rmdir(folder)
+
+    def test_get_data_chart_skips_empty_csv(self):
+        # Tests that a header-only CSV (no data for the turn) is skipped without crashing
+        import matplotlib.pyplot as plt
+        from Game_code.stock_data import get_data_chart
+
+        with patch('builtins.open', mock_open(read_data="Date,Open,High,Low,Close,Volume\n")):
+            with patch('os.path.exists', return_value=True):
+                with patch('matplotlib.figure.Figure.savefig') as mock_savefig:
+                    get_data_chart('EMPTY')
+
+        assert not mock_savefig.called
+        assert plt.get_fignums() == []
+
+
+# ============================================================================
+# Portfolio Ledger Tests
+# ============================================================================
+
+class TestPortfolioLedger:
+    """Test the integer-cents ledger behind balances and positions"""
+
+    def test_buy_and_sell_keep_running_total(self):
+        # Verifies cash moves into positions without changing the total
+        from Game_code.ledger import Ledger
+        ledger = Ledger(240000)
+        first = ledger.open_position()
+        second = ledger.open_position()
+
+        ledger.buy(first, 10000)
+        ledger.buy(second, 30000)
+        ledger.sell(second, 10000)
+
+        assert ledger.cash_cents == 210000
+        assert ledger.invested_cents == 30000
+        assert ledger.total_cents == 240000
+
+    def test_revalue_rounds_to_cent_instead_of_truncating(self):
+        # Tests that many turns do not lose whole dollars to int() truncation
+        from Game_code.ledger import Ledger
+        ledger = Ledger()
+        slot = ledger.open_position()
+        ledger.set_position(slot, 10000)
+
+        for _ in range(10):
+            ledger.revalue(slot, 1.0199)
+
+        assert ledger.position(slot) == round(10000 * 1.0199 ** 10)
+        assert ledger.invested_cents == ledger.position(slot)
+
+    def test_transaction_log_is_append_only(self):
+        # Ensures every change is logged with the balances after it
+        from Game_code.ledger import Ledger
+        ledger = Ledger(50000)
+        slot = ledger.open_position()
+        ledger.buy(slot, 10000)
+        ledger.revalue(slot, 1.5)
+
+        kinds = [entry.kind for entry in ledger.transactions]
+        assert kinds == ['buy', 'revalue']
+        assert [entry.seq for entry in ledger.transactions] == [0, 1]
+        assert ledger.transactions[-1].amount == 5000
+        assert ledger.transactions[-1].invested_cents == 15000
+
+    def test_batch_emits_one_change(self, qapp):
+        # Verifies a whole turn of revaluations triggers a single render
+        from Game_code.ledger import Ledger
+        ledger = Ledger()
+        slots = [ledger.open_position() for _ in range(6)]
+        for slot in slots:
+            ledger.set_position(slot, 10000)
+        emitted = []
+        ledger.changed.connect(lambda: emitted.append(ledger.total_cents))
+
+        with ledger.batch():
+            for slot in slots:
+                ledger.revalue(slot, 1.1)
+
+        assert emitted == [66000]
+
+    def test_widgets_render_from_ledger(self, qapp):
+        # Tests that value labels show cents after a price change without parsing text
+        parent = QWidget()
+        pm = PlayerManager()
+        am = ActionManager()
+        widgets = am.create_action_widgets(parent, player_manager=pm)
+        pm.set_player_balance(1000)
+        widgets[0].increase_value()
+        am.selected_actions[0] = 'AAPL'
+
+        with patch('Game_code.action_manager.get_price_change', return_value=1.23456):
+            am.update_value_labels_by_stock()
+
+        assert widgets[0].value_label.text() == '123.46'
+        assert pm.get_player_balance() == 900
+        assert pm.get_net_worth() == 1023.46
+
+    def test_format_money(self):
+        # Ensures whole dollars print without decimals and cents with two digits
+        from Game_code.game_rules import format_money
+        assert format_money(240000) == '2400'
+        assert format_money(241205) == '2412.05'
+        assert format_money(-150) == '-1.50'
+
+    def test_balance_label_follows_the_ledger_only(self, qapp):
+        # Verifies a click writes the game's balance label once, and net worth is shown once the game runs
+        from Game_code.game_page import GamePage
+        page = GamePage(FakeMainWindow())
+        widget = page.action_manager.action_widgets[0]
+        with patch.object(page.balance, 'setText', wraps=page.balance.setText) as set_text:
+            widget.increase_value()
+        assert set_text.call_count == 1
+        assert page.balance.text() == '$ 2300'
+
+        page.game_started = True
+        page.player_manager.ledger.revalue(widget.slot, 1.0525)
+        assert page.balance.text() == '$ 2405.25'
+
+    def test_standalone_widget_balance_label(self, qapp):
+        from Game_code.action_manager import ActionWidget
+        from Game_code.player_manager import PlayerManager
+        pm = PlayerManager()
+        pm.set_player_balance(500.5)
+        parent, balance_label = QWidget(), QLabel()
+        widget = ActionWidget(parent, player_manager=pm, balance_label=balance_label)
+        widget.increase_value()
+        assert balance_label.text() == '$ 400.50'
+
+
+# ============================================================================
+# Coalesced Repaint Tests
+# ============================================================================
+
+class TestCoalescedRepaints:
+    """Test that turn updates are painted once on the action container"""
+
+    def test_suspended_updates_restores_and_repaints_once(self, qapp):
+        # Verifies painting is off inside the block and switched back on after it
+        from Game_code.action_manager import suspended_updates
+        container = QWidget()
+
+        with patch.object(container, 'update') as mock_update:
+            with suspended_updates(container):
+                assert not container.updatesEnabled()
+                with suspended_updates(container):
+                    pass
+                # The nested block must not switch painting back on
+                assert not container.updatesEnabled()
+
+        assert container.updatesEnabled()
+        assert mock_update.call_count == 1
+
+    def test_suspended_updates_restores_after_error(self, qapp):
+        # Ensures an exception during the turn does not leave the board frozen
+        from Game_code.action_manager import suspended_updates
+        container = QWidget()
+
+        with pytest.raises(RuntimeError):
+            with suspended_updates(container):
+                raise RuntimeError('network down')
+
+        assert container.updatesEnabled()
+
+    def test_turn_values_applied_while_container_suspended(self, qapp):
+        # Tests that all six labels change before the container repaints
+        parent = QWidget()
+        pm = PlayerManager()
+        am = ActionManager()
+        widgets = am.create_action_widgets(parent, player_manager=pm)
+        am.selected_actions = ['AAPL', 'GOOG', 'MSFT', 'NVDA', 'AMZN', 'TSLA']
+        for widget in widgets:
+            widget.quantity = 100
+        states = []
+
+        def price_change(name):
+            states.append(parent.updatesEnabled())
+            return 1.1
+
+        renders = []
+        pm.ledger.changed.connect(lambda: renders.append(parent.updatesEnabled()))
+        with patch('Game_code.action_manager.get_price_change', side_effect=price_change):
+            am.update_value_labels_by_stock()
+
+        assert states == [False] * 6
+        # One ledger signal for the whole turn, delivered before painting resumes
+        assert renders == [False]
+        assert [widget.value_label.text() for widget in widgets] == ['110'] * 6
+        assert parent.updatesEnabled()
+
+
+# ============================================================================
+# Position List Model Tests
+# ============================================================================
+
+class TestPositionListModel:
+    """Test the model/view list of portfolio positions"""
+
+    def make_ledger(self, count):
+        from Game_code.ledger import Ledger
+        ledger = Ledger(10 ** 9)
+        for _ in range(count):
+            ledger.buy(ledger.open_position(), 10000)
+        return ledger
+
+    def test_rows_follow_ledger(self, qapp):
+        # Verifies rows expose ticker, value in cents and change
+        from Game_code.position_list import PositionListModel, TickerRole, ValueRole, ChangeRole
+        ledger = self.make_ledger(2)
+        model = PositionListModel(ledger)
+        model.set_positions([('AAPL', 0, None), ('GOOG', 1, None)])
+        ledger.revalue(1, 1.25)
+
+        assert model.rowCount() == 2
+        assert model.data(model.index(0), TickerRole) == 'AAPL'
+        assert model.data(model.index(1), ValueRole) == 12500
+        assert model.data(model.index(1), ChangeRole) == 1.25
+        assert model.data(model.index(0)) == 'AAPL  $ 100'
+
+    def test_turn_emits_single_data_changed(self, qapp):
+        # Tests that a batched turn refreshes every row with one signal
+        from Game_code.position_list import PositionListModel
+        ledger = self.make_ledger(50)
+        model = PositionListModel(ledger)
+        model.set_positions([(f'T{i}', i, None) for i in range(50)])
+        changes = []
+        model.dataChanged.connect(lambda first, last, roles: changes.append((first.row(), last.row())))
+
+        with ledger.batch():
+            for slot in range(50):
+                ledger.revalue(slot, 1.01)
+
+        assert changes == [(0, 49)]
+
+    def test_view_is_virtualized_with_uniform_rows(self, qapp):
+        # Ensures many positions need no per-row widgets and share one row height
+        from Game_code.position_list import PositionListModel, PositionListView, ROW_HEIGHT
+        ledger = self.make_ledger(500)
+        model = PositionListModel(ledger)
+        model.set_positions([(f'T{i}', i, None) for i in range(500)])
+        view = PositionListView(model)
+        view.resize(300, 200)
+
+        assert view.uniformItemSizes()
+        assert view.sizeHintForRow(0) == ROW_HEIGHT
+        assert view.findChildren(QLabel) == []
+
+    def test_delegate_paints_row(self, qapp):
+        # Verifies the delegate draws a row (with a missing logo) without errors
+        from PySide6.QtGui import QImage, QPainter
+        from PySide6.QtWidgets import QStyleOptionViewItem
+        from Game_code.position_list import PositionListModel, PositionDelegate
+        ledger = self.make_ledger(1)
+        model = PositionListModel(ledger)
+        model.set_positions([('AAPL', 0, 'images/does_not_exist.png')])
+        image = QImage(300, 32, QImage.Format.Format_ARGB32)
+        image.fill(0)
+        option = QStyleOptionViewItem()
+        option.rect = image.rect()
+
+        painter = QPainter(image)
+        try:
+            PositionDelegate().paint(painter, option, model.index(0))
+        finally:
+            painter.end()
+
+        # Something (the row text) was drawn onto the transparent image
+        assert any(image.pixel(x, y) != 0 for x in range(0, 300, 2) for y in range(0, 32, 2))
+
+
+# ============================================================================
+# Universe Manifest Tests
+# ============================================================================
+
+class TestUniverseManifest:
+    """Test the ticker universe manifest and lazy logos"""
+
+    def write_manifest(self, name, content):
+        folder = tempfile.mkdtemp()
+        path = os.path.join(folder, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def test_bundled_manifest_matches_game_tickers(self):
+        # Verifies the shipped manifest lists the 11 game tickers with their logos
+        from Game_code.universe import load_manifest, DEFAULT_MANIFEST
+        from Game_code.game_rules import STOCK_OPTIONS
+        universe = load_manifest(DEFAULT_MANIFEST)
+
+        assert universe.logo_options() == STOCK_OPTIONS
+        assert universe.get('AMZN').name == 'Amazon.com, Inc.'
+
+    def test_csv_manifest_optional_columns(self):
+        # Tests that only the symbol is required and duplicates keep the first row
+        from Game_code.universe import load_manifest
+        path = self.write_manifest('index.csv', 'symbol,name,sector,logo\n'
+                                                'brk.b,Berkshire,Financials,\n'
+                                                'JPM,,Financials,\n'
+                                                ',Nameless,,\n'
+                                                'BRK.B,Duplicate,,\n')
+        universe = load_manifest(path)
+
+        assert universe.symbols() == ['BRK.B', 'JPM']
+        assert universe.get('BRK.B').name == 'Berkshire'
+        assert universe.get('JPM').name == 'JPM'
+        assert universe.get('JPM').logo is None
+        # Repeated sectors share one string object
+        assert universe.get('BRK.B').sector is universe.get('JPM').sector
+
+    def test_json_manifest(self):
+        # Ensures both a plain list and a {"securities": [...]} object load
+        import json
+        from Game_code.universe import load_manifest
+        rows = [{'symbol': 'XOM', 'name': 'Exxon Mobil', 'sector': 'Energy'}]
+        plain = load_manifest(self.write_manifest('a.json', json.dumps(rows)))
+        wrapped = load_manifest(self.write_manifest('b.json', json.dumps({'securities': rows})))
+
+        assert plain.symbols() == wrapped.symbols() == ['XOM']
+
+    def test_malformed_json_rows(self):
+        # Ensures a non-object row is a ValueError (and the game falls back) while odd values are text
+        import json
+        from Game_code.universe import load_manifest, load_universe
+        path = self.write_manifest('bad.json', json.dumps([{'symbol': 'XOM'}, 'JPM']))
+        with pytest.raises(ValueError):
+            load_manifest(path)
+        with pytest.raises(ValueError):
+            load_manifest(self.write_manifest('number.json', '42'))
+        assert len(load_universe(path)) == 11
+
+        universe = load_manifest(self.write_manifest('odd.json', json.dumps([{'symbol': 'xom', 'name': 7}])))
+        assert universe.get('XOM').name == '7'
+
+    def test_unreadable_manifest_falls_back_to_builtin(self):
+        # Verifies the game still has its tickers when the manifest is missing
+        from Game_code.universe import load_universe
+        universe = load_universe(os.path.join(tempfile.gettempdir(), 'no_such_manifest.csv'))
+        assert len(universe) == 11
+
+    def test_missing_logo_gets_monogram(self, qapp):
+        # Tests that tickers without a logo file get a generated, cached tile
+        from Game_code.logos import logo_pixmap, LOGO_WIDTH, LOGO_HEIGHT
+        first = logo_pixmap('JPM', None)
+        broken = logo_pixmap('XOM', 'images/does_not_exist.png')
+
+        assert not first.isNull()
+        assert (first.width(), first.height()) == (LOGO_WIDTH, LOGO_HEIGHT)
+        assert not broken.isNull()
+        assert logo_pixmap('JPM', None).cacheKey() == first.cacheKey()
+
+    def test_action_manager_uses_manifest(self, qapp):
+        # Ensures a manifest ticker can be picked even without a logo
+        from Game_code.universe import load_manifest
+        path = self.write_manifest('u.csv', 'symbol\n' + '\n'.join(f'T{i}' for i in range(300)))
+        with patch('Game_code.action_manager.load_universe', return_value=load_manifest(path)):
+            am = ActionManager()
+        parent = QWidget()
+        am.create_action_widgets(parent)
+
+        am.randomize_actions()
+
+        assert len(am.options) == 300
+        assert all(choice in am.options for choice in am.selected_actions)
+        assert not am.action_widgets[0].image_label.pixmap().isNull()
+
+
+# ============================================================================
+# Ticker Picker Tests
+# ============================================================================
+
+class TestTickerPicker:
+    """Test the indexed ticker picker that replaced the QMenu"""
+
+    def make_universe(self, count=0):
+        from Game_code.universe import Universe, Security
+        securities = [
+            Security('AAPL', 'Apple Inc.', 'Tech', None),
+            Security('PEP', 'PepsiCo, Inc.', 'Staples', None),
+            Security('MAPL', 'Maple Foods', 'Staples', None),
+            Security('GOOG', 'Alphabet Inc.', 'Tech', None),
+        ]
+        securities += [Security(f'T{i:04d}', f'Company {i}', '', None) for i in range(count)]
+        return Universe(securities)
+
+    def test_prefix_matches_rank_first(self):
+        # Verifies symbol prefixes come before name words and plain substrings
+        from Game_code.ticker_picker import TickerIndex
+        index = TickerIndex(self.make_universe())
+
+        assert [index.symbols[i] for i in index.search('ap')] == ['AAPL', 'MAPL']
+        assert [index.symbols[i] for i in index.search('map')] == ['MAPL']
+        assert [index.symbols[i] for i in index.search('alpha')] == ['GOOG']
+        assert [index.symbols[i] for i in index.search('INC')] == ['AAPL', 'PEP', 'GOOG']
+        assert len(index.search('')) == 4
+
+    def test_incremental_search_matches_full_scan(self):
+        # Ensures narrowing the previous result gives the same answer as a fresh search
+        from Game_code.ticker_picker import TickerIndex
+        universe = self.make_universe(5000)
+        typed = TickerIndex(universe)
+        for query in ['c', 'co', 'com', 'company 1', 'company 12', 'company 1']:
+            assert typed.search(query) == TickerIndex(universe).search(query)
+
+    def test_disabled_entries_cannot_be_picked(self, qapp):
+        # Tests that tickers chosen in other slots are greyed out and ignored
+        from Game_code.ticker_picker import TickerPicker
+        picker = TickerPicker(self.make_universe())
+        picked = []
+        picker.picked.connect(picked.append)
+
+        picker.open_at((0, 0), {'AAPL'})
+        picker.search.setText('ap')
+        assert not picker.model.flags(picker.model.index(0)) & Qt.ItemFlag.ItemIsEnabled
+
+        # Enter picks the first enabled row
+        picker.search.returnPressed.emit()
+        picker.pick_index(picker.model.index(0))
+
+        assert picked == ['MAPL']
+        picker.close()
+
+    def test_reopen_clears_search(self, qapp):
+        # Verifies the same picker is reused with a fresh filter each time
+        from Game_code.ticker_picker import TickerPicker
+        picker = TickerPicker(self.make_universe(5000))
+        picker.open_at((0, 0))
+        picker.search.setText('T49')
+        assert picker.model.rowCount() == 100
+
+        picker.open_at((0, 0), {'GOOG'})
+
+        assert picker.search.text() == ''
+        assert picker.model.rowCount() == 5004
+        assert picker.model.disabled == {'GOOG'}
+        picker.close()
+
+    def test_action_manager_uses_picker(self, qapp):
+        # Ensures a choice from the picker sets the logo and the selection
+        am = ActionManager()
+        parent = QWidget()
+        widgets = am.create_action_widgets(parent)
+        am.selected_actions[1] = 'AAPL'
+
+        am.show_action_menu(widgets[0].image_label, parent)
+        picker = am.picker
+        assert picker.model.disabled == {'AAPL'}
+
+        picker.search.setText('nvda')
+        picker.search.returnPressed.emit()
+
+        assert am.selected_actions[0] == 'NVDA'
+        assert not picker.isVisible()
+
+        # The picker and its index are built once
+        am.show_action_menu(widgets[2].image_label, parent)
+        assert am.picker is picker
+        assert picker.model.disabled == {'AAPL', 'NVDA'}
+        picker.close()
+
+
+# ============================================================================
+# Data Cache Tests
+# ============================================================================
+
+class TestDataCache:
+    """Test the persistent per-user data cache"""
+
+    def make_file(self, folder, name, size):
+        path = os.path.join(folder, name)
+        with open(path, 'wb') as file:
+            file.write(b'x' * size)
+        return path
+
+    def test_store_and_fetch_use_versioned_layout(self):
+        # Verifies entries live under <root>/v<version>/<namespace>/<key>
+        from Game_code.data_cache import DataCache, CACHE_VERSION
+        root = tempfile.mkdtemp()
+        cache = DataCache(root)
+        source = self.make_file(root, 'src.csv', 10)
+
+        stored = cache.store('prices', 'AAPL_2015-01-01_2015-02-28.csv', source)
+        copy = os.path.join(root, 'copy', 'AAPL.csv')
+
+        assert stored == os.path.join(root, f'v{CACHE_VERSION}', 'prices', 'AAPL_2015-01-01_2015-02-28.csv')
+        assert cache.fetch('prices', 'AAPL_2015-01-01_2015-02-28.csv', copy)
+        assert open(copy, 'rb').read() == b'x' * 10
+        assert not cache.fetch('prices', 'MSFT.csv', copy)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_failed_write_leaves_nothing(self):
+        # Ensures a crash mid-write never leaves a partial entry or temp file
+        from Game_code.data_cache import DataCache
+
+        root = tempfile.mkdtemp()
+        cache = DataCache(root)
+        cache.put_json('stats', 'ok.json', {'a': 1})
+
+        def failing_writer(tmp):
+            with open(tmp, 'wb') as file:
+                file.write(b'half')
+            raise OSError('disk full')
+
+        assert cache._write('stats', 'bad.json', 4, failing_writer) is None
+        folder = os.path.dirname(cache.path('stats', 'ok.json'))
+        assert os.listdir(folder) == ['ok.json']
+        assert cache.get_json('stats', 'ok.json') == {'a': 1}
+
+    def test_lru_eviction_keeps_recently_used(self):
+        # Tests that the least recently used file is removed when over the cap
+        from Game_code.data_cache import DataCache
+        root = tempfile.mkdtemp()
+        cache = DataCache(root, max_bytes=300)
+        for i, name in enumerate(['a', 'b', 'c']):
+            source = self.make_file(root, name, 100)
+            path = cache.store('charts', name, source)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        cache.get('charts', 'a')
+        cache.store('charts', 'd', self.make_file(root, 'd', 100))
+
+        assert cache.get('charts', 'b') is None
+        assert cache.get('charts', 'a') is not None
+        assert cache.get('charts', 'd') is not None
+
+    def test_old_versions_are_removed(self):
+        # Verifies a version bump drops old trees but leaves other folders alone
+        from Game_code.data_cache import DataCache
+        root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(root, 'v0', 'prices'))
+        os.makedirs(os.path.join(root, 'videos'))
+        cache = DataCache(root)
+
+        cache.put_json('stats', 'x.json', [1])
+
+        assert not os.path.exists(os.path.join(root, 'v0'))
+        assert os.path.exists(os.path.join(root, 'videos'))
+
+    def test_zero_cap_disables_cache(self):
+        # Ensures DEATHMONOPOLY_CACHE_MB=0 turns the cache off
+        from Game_code.data_cache import DataCache
+        root = tempfile.mkdtemp()
+        with patch.dict(os.environ, {'DEATHMONOPOLY_CACHE_MB': '0'}):
+            cache = DataCache(root)
+
+        assert cache.store('prices', 'a', self.make_file(root, 'a', 10)) is None
+        assert cache.get('prices', 'a') is None
+
+    def test_download_survives_reset(self):
+        # Tests that a new game reuses the cached download after clear_stock_files
+        from Game_code import stock_data
+        from Game_code.benchmark import FixtureTicker
+        csv_dir = tempfile.mkdtemp()
+        with patch.object(stock_data, 'CSV_DIR', csv_dir), \
+                patch.object(stock_data.yf, 'Ticker', wraps=FixtureTicker) as ticker:
+            stock_data.get_data(['AAPL'], 0)
+            first = stock_data.read_prices('AAPL')
+            os.remove(stock_data.history_path('AAPL'))
+
+            stock_data.get_data(['AAPL'], 0)
+
+            assert ticker.call_count == 1
+            assert stock_data.read_prices('AAPL') == first
+            # Another turn is a different entry
+            stock_data.get_data(['AAPL'], 1)
+            assert ticker.call_count == 2
+
+    def test_empty_download_is_not_cached(self):
+        # Verifies an empty answer from Yahoo is fetched again once its negative entry expires
+        import pandas as pd
+        from Game_code import stock_data, fetch_guard
+        csv_dir = tempfile.mkdtemp()
+        now = [1000.0]
+        negative = fetch_guard.NegativeCache(ttl=60, clock=lambda: now[0])
+        with patch.object(stock_data, 'CSV_DIR', csv_dir), \
+                patch.object(fetch_guard, '_negative', negative), \
+                patch.object(stock_data.yf, 'Ticker') as ticker:
+            ticker.return_value.history.return_value = pd.DataFrame({'Close': []})
+            stock_data.get_data(['DELISTED'], 0)
+            stock_data.get_data(['DELISTED'], 0)
+            assert ticker.call_count == 1
+            now[0] += 61
+            stock_data.get_data(['DELISTED'], 0)
+
+        assert ticker.call_count == 2
+
+    def test_chart_reused_for_same_prices(self):
+        # Ensures an identical chart is copied from the cache instead of rendered
+        from Game_code import stock_data
+        from Game_code.chart_renderer import get_chart_renderer
+        csv_dir, chart_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+        with open(os.path.join(csv_dir, 'TEST_history.csv'), 'w') as file:
+            file.write('Date,Close\n2024-01-01,100.0\n2024-01-02,105.0\n')
+        renderer = get_chart_renderer()
+        with patch.object(stock_data, 'CSV_DIR', csv_dir), patch.object(stock_data, 'CHART_DIR', chart_dir):
+            stock_data.get_data_chart('TEST', [90.0, 110.0])
+            rendered = renderer.renders
+            os.remove(stock_data.chart_path('TEST'))
+
+            stock_data.get_data_chart('TEST', [90.0, 110.0])
+            assert renderer.renders == rendered
+            assert os.path.getsize(stock_data.chart_path('TEST')) > 0
+
+            # A different Y scale is a different chart
+            stock_data.get_data_chart('TEST', [50.0, 110.0])
+            assert renderer.renders == rendered + 1
+
+
+# ============================================================================
+# Save / Resume Tests
+# ============================================================================
+
+class FakeMainWindow(QWidget):
+    """Just what GamePage needs from MainWindow"""
+
+    def __init__(self, difficulty=1):
+        super().__init__()
+        self.settings_page = MagicMock()
+        self.settings_page.get_difficulty_id.return_value = difficulty
+
+    def show_menu(self):
+        pass
+
+
+@pytest.fixture
+def turn_dirs():
+    from Game_code import stock_data
+    csv_dir, chart_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    with patch.object(stock_data, 'CSV_DIR', csv_dir), patch.object(stock_data, 'CHART_DIR', chart_dir):
+        yield csv_dir, chart_dir
+
+
+class TestSaveGame:
+    """Test the save/resume snapshot"""
+
+    def play_first_turn(self):
+        from Game_code.game_page import GamePage
+        from Game_code.benchmark import FixtureTicker
+        from Game_code import stock_data
+        page = GamePage(FakeMainWindow())
+        page.action_manager.selected_actions = ['AAPL', 'GOOG', 'MSFT', 'NVDA', 'AMZN', 'TSLA']
+        for widget in page.action_manager.action_widgets:
+            widget.increase_value()
+            widget.increase_value()
+        with patch.object(stock_data.yf, 'Ticker', FixtureTicker), \
+                patch('Game_code.npc_manager.ask_bot', return_value='Buy\npasta'), \
+                patch('Game_code.game_page.LoadingDialog'):
+            page.start_game()
+            page.continue_game()
+        return page
+
+    def test_snapshot_roundtrip(self):
+        # Verifies a snapshot is written compactly and read back unchanged
+        from Game_code import savegame
+        path = os.path.join(tempfile.mkdtemp(), 'save.json')
+        snapshot = {'turn': 2, 'selected': ['AAPL'], 'prices': {}}
+
+        assert savegame.write_snapshot(snapshot, path)
+
+        assert savegame.load_snapshot(path) == dict(snapshot, version=savegame.SAVE_VERSION)
+        assert ' ' not in open(path).read()
+        assert os.listdir(os.path.dirname(path)) == ['save.json']
+
+    def test_unusable_snapshot_is_ignored(self):
+        # Ensures a damaged file or one from another version is not loaded
+        from Game_code import savegame
+        folder = tempfile.mkdtemp()
+        broken = os.path.join(folder, 'broken.json')
+        old = os.path.join(folder, 'old.json')
+        with open(broken, 'w') as file:
+            file.write('{"turn": ')
+        with open(old, 'w') as file:
+            file.write('{"version": 0}')
+
+        assert savegame.load_snapshot(broken) is None
+        assert savegame.load_snapshot(old) is None
+        assert savegame.load_snapshot(os.path.join(folder, 'missing.json')) is None
+
+    def test_restore_rebuilds_csv_without_cache(self, qapp, turn_dirs):
+        # Tests that saved closes bring a turn back even when the cache entry is gone
+        from Game_code import savegame, stock_data
+        snapshot = {'prices': {'AAPL': {'key': 'AAPL_gone.csv', 'dates': ['2015-01-02', '2015-01-05'],
+                                        'closes': [100.5, 101.25]}}}
+        with patch.object(stock_data.yf, 'Ticker', side_effect=AssertionError('no download')):
+            savegame.restore_turn_files(snapshot)
+
+        assert stock_data.read_prices('AAPL') == (['2015-01-02', '2015-01-05'], [100.5, 101.25])
+        assert os.path.getsize(stock_data.chart_path('AAPL')) > 0
+
+    def test_every_turn_is_saved(self, qapp, turn_dirs):
+        # Verifies the snapshot follows the game after each turn
+        from Game_code import savegame
+        page = self.play_first_turn()
+        snapshot = savegame.load_snapshot()
+
+        assert snapshot['turn'] == 1
+        assert snapshot['selected'] == page.action_manager.get_selected_actions()
+        assert snapshot['cash_cents'] == page.player_manager.ledger.cash_cents
+        assert snapshot['positions_cents'] == page.player_manager.ledger.positions
+        assert snapshot['npc_dialogues'][0] == 'Buy<br>pasta'
+        assert snapshot['prices']['AAPL']['closes']
+
+    def test_resume_without_network_or_ai(self, qapp, turn_dirs):
+        # Ensures resuming shows the saved turn from local data only
+        from Game_code.game_page import GamePage
+        from Game_code import stock_data
+        played = self.play_first_turn()
+        stock_data.clear_stock_files()
+
+        page = GamePage(FakeMainWindow())
+        with patch.object(stock_data.yf, 'Ticker', side_effect=AssertionError('no download')), \
+                patch('Game_code.npc_manager.ask_bot', side_effect=AssertionError('no AI')):
+            assert page.resume_game()
+
+        assert page.game_started
+        assert page.turn_counter == played.turn_counter
+        assert page.player_manager.get_net_worth() == played.player_manager.get_net_worth()
+        assert page.player_manager.ledger.change(0) == played.player_manager.ledger.change(0)
+        assert page.balance.text() == played.balance.text()
+        assert page.npc_manager.get_dialogues() == played.npc_manager.get_dialogues()
+        assert page.positions_model.rowCount() == 6
+        assert all(not widget.image_label.pixmap().isNull() for widget in page.action_manager.action_widgets)
+        assert not page.btn_start.isVisibleTo(page)
+
+    def test_reset_discards_save(self, qapp, turn_dirs):
+        # Tests that a new game cannot resume the abandoned one
+        from Game_code import savegame
+        page = self.play_first_turn()
+        assert savegame.has_snapshot()
+
+        page.reset_game()
+
+        assert not savegame.has_snapshot()
+        assert not page.resume_game()
+
+
+# ============================================================================
+# Portfolio History Tests
+# ============================================================================
+
+class TestPortfolioHistory:
+    """Test the per-turn history arrays and the equity curve"""
+
+    def test_grows_geometrically(self):
+        # Verifies capacity doubles and earlier turns are kept when it grows
+        from Game_code.portfolio_history import PortfolioHistory
+        history = PortfolioHistory(2, capacity=2)
+        capacities = []
+        for turn in range(9):
+            history.record(1000 - turn, [turn * 100, 50])
+            capacities.append(history.capacity)
+
+        assert capacities == [2, 2, 4, 4, 8, 8, 8, 8, 16]
+        assert len(history) == 9
+        assert history.values()[:, 0].tolist() == [turn * 100 for turn in range(9)]
+        assert history.totals().tolist() == [1050 + 99 * turn for turn in range(9)]
+        assert (history.min_total, history.max_total) == (1050, 1050 + 99 * 8)
+
+    def test_views_do_not_copy(self):
+        # Ensures reads are views into the preallocated arrays
+        from Game_code.portfolio_history import PortfolioHistory
+        history = PortfolioHistory(3)
+        history.record(10, [1, 2, 3])
+
+        assert history.values().base is not None
+        cash, values, total = history.row(0)
+        assert (cash, values.tolist(), total) == (10, [1, 2, 3], 16)
+
+    def test_saved_history_loads_back(self):
+        # Tests the to_dict/load roundtrip used by the save file
+        from Game_code.portfolio_history import PortfolioHistory
+        history = PortfolioHistory(2)
+        history.record(500, [100, 200])
+        history.record(400, [150, 260])
+        copy = PortfolioHistory(2)
+
+        copy.load(history.to_dict())
+
+        assert copy.to_dict() == {'cash': [500, 400], 'values': [[100, 200], [150, 260]]}
+        assert copy.max_total == 810
+
+    def test_equity_view_appends_one_point_per_turn(self, qapp):
+        # Verifies a new turn extends the paths instead of rebuilding them
+        from PySide6.QtGui import QImage
+        from Game_code.portfolio_history import PortfolioHistory
+        from Game_code.equity_curve import EquityCurveView
+        history = PortfolioHistory(2)
+        view = EquityCurveView(history)
+        view.resize(600, 250)
+        view.set_tickers(['AAPL', 'MSFT'])
+        history.record(0, [10000, 20000])
+        view.refresh()
+        path = view.total_path
+
+        history.record(0, [11000, 19000])
+        view.refresh()
+
+        assert view.total_path is path
+        assert view.total_path.elementCount() == 2
+        assert [p.elementCount() for p in view.ticker_paths] == [2, 2]
+
+        image = QImage(600, 250, QImage.Format.Format_ARGB32)
+        image.fill(0)
+        view.render(image)
+        gold = [image.pixelColor(x, y) for x in range(90, 490, 10) for y in range(0, 250)]
+        assert any(color.red() > 200 and color.green() > 150 and color.blue() < 100 for color in gold)
+
+        history.clear()
+        view.refresh()
+        assert view.drawn == 0
+
+    def test_game_records_every_turn(self, qapp, turn_dirs):
+        # Ensures the opening portfolio and each turn land in the history and the save
+        from Game_code.game_page import GamePage
+        from Game_code import savegame, stock_data
+        page = TestSaveGame().play_first_turn()
+
+        # Opening portfolio, turn 0 and turn 1
+        assert len(page.history) == 3
+        assert page.history.totals()[0] == 240000
+        assert page.history.totals()[-1] == page.player_manager.ledger.total_cents
+        assert page.equity_view.drawn == 3
+
+        # Historia jest zapisana raz, w roster
+        snapshot = savegame.load_snapshot()
+        assert 'history' not in snapshot
+        resumed = GamePage(FakeMainWindow())
+        with patch.object(stock_data.yf, 'Ticker', side_effect=AssertionError('no download')):
+            assert resumed.resume_game()
+        assert resumed.history.to_dict() == page.history.to_dict()
+        assert resumed.history is resumed.roster.histories[0]
+        assert resumed.equity_view.drawn == 3
+
+        # Zapis sprzed gry wieloosobowej: historia pod własnym kluczem
+        legacy = dict(snapshot, history=snapshot['roster']['histories'][0])
+        del legacy['roster']
+        old_save = GamePage(FakeMainWindow())
+        with patch.object(stock_data.yf, 'Ticker', side_effect=AssertionError('no download')):
+            old_save.restore(legacy)
+        assert old_save.history.to_dict() == page.history.to_dict()
+
+        page.reset_game()
+        assert len(page.history) == 0
+
+
+# ============================================================================
+# Trading Calendar Tests
+# ============================================================================
+
+class TestTradingCalendar:
+    """Test the trading-day index and the turn schedule"""
+
+    def business_days(self, start, count):
+        import pandas as pd
+        return [day.strftime('%Y-%m-%d') for day in pd.bdate_range(start, periods=count)]
+
+    def test_rows_skip_weekends(self):
+        # Verifies a window starting on a weekend begins at the next trading day
+        from Game_code.trading_calendar import TradingIndex, day_ordinal
+        days = self.business_days('2015-01-02', 10)   # Fri 2 .. Thu 15
+        index = TradingIndex(days)
+
+        start_row, end_row = index.rows(day_ordinal('2015-01-03'), day_ordinal('2015-01-09'))
+
+        assert index.days.dtype.name == 'int32'
+        assert days[start_row:end_row] == ['2015-01-05', '2015-01-06', '2015-01-07', '2015-01-08']
+        assert index.rows(day_ordinal('2014-01-01'), day_ordinal('2014-02-01')) == (0, 0)
+        assert index.rows(day_ordinal('2016-01-01'), day_ordinal('2016-02-01')) == (10, 10)
+
+    def test_unsorted_days_are_rejected(self):
+        # Ensures the binary search never runs on an unsorted index
+        from Game_code.trading_calendar import TradingIndex
+        with pytest.raises(ValueError):
+            TradingIndex(['2015-01-05', '2015-01-02'])
+
+    def test_gap_free_schedule_with_custom_start(self):
+        # Tests back to back windows from a custom start date
+        from Game_code.trading_calendar import TurnSchedule
+        schedule = TurnSchedule('2020-03-15', window=1, step=None)
+
+        windows = [schedule.dates(turn) for turn in range(4)]
+
+        assert windows[0] == ('2020-03-15', '2020-04-15')
+        assert all(windows[turn][1] == windows[turn + 1][0] for turn in range(3))
+        assert schedule.period(3) == ('2020-03-15', '2020-07-15')
+        # Far turns do not recurse
+        assert schedule.dates(5000)[0] > '2400-01-01'
+
+    def test_rows_many_matches_rows(self):
+        # Verifies the vectorized lookup agrees with one turn at a time
+        from Game_code.trading_calendar import TradingIndex, TurnSchedule
+        index = TradingIndex(self.business_days('2015-01-01', 800))
+        schedule = TurnSchedule(window=2, step=2)
+        starts, ends = schedule.bounds_array(12)
+        start_rows, end_rows = index.rows_many(starts, ends)
+
+        assert list(zip(start_rows.tolist(), end_rows.tolist())) == [schedule.rows(index, t) for t in range(12)]
+
+    def test_price_store_slices_by_row(self, price_history_dir):
+        # Ensures windows are views of the close array and batch multipliers match
+        from Game_code.price_store import PriceStore
+        store = PriceStore(price_history_dir)
+        index, closes = store.series('AAPL')
+
+        window = store.window('AAPL', 1)
+
+        assert window.tolist() == [200.0, 100.0]
+        assert window.base is closes
+        assert store.turn_multipliers(['AAPL'], 2)['AAPL'] == [store.turn_multiplier('AAPL', t) for t in range(3)]
+
+    def test_price_store_custom_schedule(self, price_history_dir):
+        # Tests that the store follows another schedule (one gap-free 6 month turn)
+        from Game_code.price_store import PriceStore
+        from Game_code.trading_calendar import TurnSchedule
+        store = PriceStore(price_history_dir, TurnSchedule(window=6, step=None))
+
+        assert store.turn_multipliers(['GOOG'], 0)['GOOG'] == [1.0]
+        assert store.window('GOOG', 0).tolist() == [100.0, 110.0, 200.0, 100.0]
+
+    def test_simulator_schedule_options(self):
+        # Verifies the simulator builds a schedule only when asked to
+        from Game_code.simulate import build_parser, build_schedule
+        from Game_code.trading_calendar import DEFAULT_SCHEDULE
+        parser = build_parser()
+
+        assert build_schedule(parser.parse_args([])) is DEFAULT_SCHEDULE
+        schedule = build_schedule(parser.parse_args(['--start', '2019-01-01', '--window-months', '1', '--gap-free']))
+        assert schedule.dates(1) == ('2019-02-01', '2019-03-01')
+
+
+# ============================================================================
+# DOWNSAMPLING
+# ============================================================================
+
+class TestDownsampling:
+    """Price series are cut to the chart's pixel width before drawing"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        from Game_code import downsample
+        downsample.clear_cache()
+        yield
+        downsample.clear_cache()
+
+    def _series(self, n):
+        import math
+        return [100 + 20 * math.sin(i / 50) + (i % 7) for i in range(n)]
+
+    def test_short_series_unchanged(self):
+        from Game_code.downsample import reduce_series
+        x, y = reduce_series([1.0, 2.0, 3.0], width=260)
+        assert x.tolist() == [0, 1, 2]
+        assert y.tolist() == [1.0, 2.0, 3.0]
+
+    def test_minmax_keeps_extremes_and_ends(self):
+        from Game_code.downsample import reduce_series
+        prices = self._series(10_000)
+        prices[4321] = 1000.0
+        prices[1234] = -5.0
+        x, y = reduce_series(prices, width=100)
+        # Two points per bucket plus the first and last close
+        assert len(x) <= 202
+        assert x[0] == 0 and x[-1] == len(prices) - 1
+        assert max(y) == 1000.0 and min(y) == -5.0
+        assert 4321 in x.tolist() and 1234 in x.tolist()
+        assert list(x) == sorted(x)
+        assert y.tolist() == [prices[i] for i in x]
+
+    def test_lttb_returns_width_points(self):
+        from Game_code.downsample import reduce_series
+        prices = self._series(5_000)
+        x, y = reduce_series(prices, width=100, method="lttb")
+        assert len(x) == 100
+        assert x[0] == 0 and x[-1] == 4_999
+        assert all(b > a for a, b in zip(x, x[1:]))
+
+    def test_unknown_method(self):
+        from Game_code.downsample import reduce_series
+        with pytest.raises(ValueError):
+            reduce_series(self._series(1_000), width=10, method="average")
+
+    def test_result_cached_per_series_and_width(self):
+        from Game_code.downsample import reduce_series
+        prices = self._series(3_000)
+        first = reduce_series(prices, width=100)
+        assert reduce_series(list(prices), width=100) is first
+        assert reduce_series(prices, width=50) is not first
+        assert not first[1].flags.writeable
+
+    def test_renderer_draws_reduced_series(self, tmp_path):
+        from Game_code.chart_renderer import ChartRenderer
+        renderer = ChartRenderer(figsize=(2, 1), dpi=50, pixels=100)
+        prices = self._series(100_000)
+        renderer.render("AAA", prices, str(tmp_path / "a.png"))
+
+        assert len(renderer.line.get_xdata()) <= 202
+        assert renderer.axes.get_xlim()[1] > 99_000
+        low, high = renderer.axes.get_ylim()
+        assert low == pytest.approx(min(prices) * 0.95)
+        assert high == pytest.approx(max(prices) * 1.05)
+
+
+# ============================================================================
+# INDICATOR ENGINE
+# ============================================================================
+
+class TestIndicators:
+    """One vectorized pass over all tickers, shared by tooltips and prompts"""
+
+    def _write(self, folder, ticker, closes):
+        with open(os.path.join(folder, f"{ticker}_history.csv"), "w") as file:
+            file.write("Date,Close\n")
+            for day, close in enumerate(closes):
+                file.write(f"2015-01-{day + 1:02d},{close}\n")
+
+    def test_matches_per_series_formulas(self):
+        import math
+        import statistics
+        from Game_code.indicators import compute_indicators
+        closes = [100.0, 110.0, 99.0, 120.0, 90.0, 95.0]
+        table = compute_indicators({"AAA": closes, "BBB": [50.0, 55.0]})
+        stats = table.get("AAA")
+
+        daily = [b / a - 1 for a, b in zip(closes, closes[1:])]
+        assert stats["days"] == 6
+        assert stats["first"] == 100.0 and stats["last"] == 95.0
+        assert stats["return"] == pytest.approx(-0.05)
+        assert stats["sma_5"] == pytest.approx(sum(closes[-5:]) / 5)
+        assert stats["sma_20"] is None
+        assert stats["volatility"] == pytest.approx(statistics.stdev(daily) * math.sqrt(252))
+        assert stats["best_day"] == pytest.approx(max(daily))
+        assert stats["worst_day"] == pytest.approx(min(daily))
+        assert stats["max_drawdown"] == pytest.approx(90.0 / 120.0 - 1)
+
+        # A shorter series in the same matrix is not affected by the padding
+        short = table.get("BBB")
+        assert short["return"] == pytest.approx(0.1)
+        assert short["max_drawdown"] == 0.0
+        assert short["volatility"] is None
+
+    def test_missing_and_empty_series(self):
+        from Game_code.indicators import compute_indicators
+        table = compute_indicators({"EMPTY": [], "ZERO": [0.0, 5.0]})
+        assert table.get("EMPTY") is None
+        assert table.get("UNKNOWN") is None
+        assert table.get("ZERO")["return"] == 0.0
+        assert len(compute_indicators({})) == 0
+
+    def test_engine_caches_per_turn_and_ticker_set(self, tmp_path):
+        from Game_code.indicators import IndicatorEngine
+        folder = str(tmp_path)
+        self._write(folder, "AAA", [10.0, 11.0])
+        self._write(folder, "BBB", [20.0, 18.0])
+        engine = IndicatorEngine()
+
+        table = engine.turn_indicators(0, ["AAA", "BBB"], folder)
+        assert engine.turn_indicators(0, ["BBB", "AAA"], folder) is table
+        assert engine.turn_indicators(1, ["AAA", "BBB"], folder) is not table
+        assert table.get("BBB")["return"] == pytest.approx(-0.1)
+        engine.clear()
+        assert engine.turn_indicators(0, ["AAA", "BBB"], folder) is not table
+
+    def test_prompt_uses_given_indicators(self):
+        from Game_code.AI import build_user_prompt
+        from Game_code.indicators import compute_indicators
+        table = compute_indicators({"AAA": [100.0, 101.0, 102.0, 103.0, 104.0, 110.0]})
+        with patch('os.listdir', side_effect=AssertionError("CSV folder read")):
+            prompt = build_user_prompt("Q?", indicators=table)
+        assert "Stock: AAA" in prompt
+        assert "First price: 100.00" in prompt and "Last price: 110.00" in prompt
+        assert "Return: +10.0%" in prompt
+        assert "5-day average: 104.00" in prompt
+
+    def test_tooltips_follow_selected_actions(self, qapp):
+        from Game_code.indicators import compute_indicators
+        manager = ActionManager()
+        parent = QWidget()
+        manager.create_action_widgets(parent)
+        manager.selected_actions = ["AAA", None, None, None, None, None]
+        manager.update_indicator_tooltips(compute_indicators({"AAA": [10.0, 12.0]}))
+
+        tooltip = manager.action_widgets[0].image_label.toolTip()
+        assert tooltip.startswith("AAA") and "Return: +20.0%" in tooltip
+        assert manager.action_widgets[1].image_label.toolTip() == ""
+
+        manager.reset_selections()
+        assert manager.action_widgets[0].image_label.toolTip() == ""
+
+
+# ============================================================================
+# SERIES SUMMARIES
+# ============================================================================
+
+class TestSeriesSummary:
+    """first/last/min/max/count and dates are stored at ingest"""
+
+    def _download(self):
+        from Game_code import stock_data
+        from Game_code.benchmark import FixtureTicker
+        with patch.object(stock_data.yf, 'Ticker', FixtureTicker):
+            stock_data.get_data(['AAPL', 'GOOG'], 0)
+
+    def test_get_data_stores_summary(self, turn_dirs):
+        from Game_code import stock_data
+        self._download()
+        dates, prices = stock_data.read_prices('AAPL')
+        summary = stock_data.read_summary('AAPL')
+        assert summary['count'] == len(prices)
+        assert summary['first'] == prices[0] and summary['last'] == prices[-1]
+        assert summary['min'] == min(prices) and summary['max'] == max(prices)
+        assert summary['start'] == dates[0][:10] and summary['end'] == dates[-1][:10]
+
+    def test_consumers_skip_the_csv(self, turn_dirs):
+        from Game_code import stock_data
+        self._download()
+        expected = stock_data.read_summary('GOOG')
+        with patch.object(stock_data, 'read_prices', side_effect=AssertionError("CSV re-read")), \
+                patch.object(stock_data, 'get_data_chart') as chart:
+            assert stock_data.get_price_change('GOOG') == expected['last'] / expected['first']
+            stock_data.generate_all_charts(['AAPL', 'GOOG'])
+        low = min(stock_data.read_summary(t)['min'] for t in ('AAPL', 'GOOG'))
+        high = max(stock_data.read_summary(t)['max'] for t in ('AAPL', 'GOOG'))
+        assert chart.call_args.kwargs['y_range'] == (low * 0.95, high * 1.05)
+
+    def test_summary_ignored_when_csv_replaced(self, turn_dirs):
+        from Game_code import stock_data
+        self._download()
+        with open(stock_data.history_path('AAPL'), 'w') as file:
+            file.write("Date,Close\n2015-01-02,10.0\n2015-01-05,30.0\n")
+        assert stock_data.read_summary('AAPL') is None
+        assert stock_data.get_price_change('AAPL') == 3.0
+
+    def test_cached_download_reuses_summary(self, turn_dirs):
+        from Game_code import stock_data
+        self._download()
+        first = stock_data.read_summary('AAPL')
+        stock_data.clear_stock_files()
+        assert stock_data.read_summary('AAPL') is None
+        # Ceny i podsumowanie z pamięci podręcznej, bez ponownego liczenia
+        with patch.object(stock_data, 'summarize', side_effect=AssertionError("recomputed")):
+            self._download()
+        assert stock_data.read_summary('AAPL')['max'] == first['max']
+
+
+# ============================================================================
+# FETCH GUARDS
+# ============================================================================
+
+class TestFetchGuard:
+    """Negative cache and circuit breaker around Yahoo downloads"""
+
+    def test_negative_entries_expire_and_persist(self):
+        from Game_code.fetch_guard import NegativeCache
+        now = [0.0]
+        negative = NegativeCache(ttl=10, clock=lambda: now[0])
+        assert not negative.is_empty('X_2015.csv')
+        negative.add('X_2015.csv')
+        assert negative.is_empty('X_2015.csv')
+
+        # Nowy proces widzi wpis z pamięci podręcznej danych
+        assert NegativeCache(ttl=10, clock=lambda: now[0]).is_empty('X_2015.csv')
+        now[0] = 11
+        assert not negative.is_empty('X_2015.csv')
+
+    def test_breaker_opens_after_threshold_then_half_opens(self):
+        from Game_code.fetch_guard import CircuitBreaker
+        now = [0.0]
+        breaker = CircuitBreaker('yahoo', threshold=2, cooldown=30, clock=lambda: now[0])
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+        now[0] = 31
+        assert breaker.allow()          # one trial request
+        assert not breaker.allow()
+        breaker.record_failure()        # trial failed: open again
+        assert breaker.state == CircuitBreaker.OPEN
+
+        now[0] = 62
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+    def test_get_data_stops_calling_failing_source(self, turn_dirs):
+        from Game_code import stock_data
+        from Game_code.fetch_guard import FAILURE_THRESHOLD, get_breaker
+        with patch.object(stock_data.yf, 'Ticker') as ticker:
+            ticker.return_value.history.side_effect = ConnectionError("429 Too Many Requests")
+            stock_data.get_data(['AAPL', 'GOOG', 'MSFT', 'NVDA', 'AMZN'], 0)
+
+        assert ticker.return_value.history.call_count == FAILURE_THRESHOLD
+        assert get_breaker('yahoo').state == 'open'
+        # Every ticker gets an empty CSV instead of the previous turn's prices
+        assert stock_data.read_prices('AMZN') == ([], [])
+        assert stock_data.get_price_change('AMZN') == 1.0
+
+    def test_empty_ticker_not_requested_next_turn_game(self, turn_dirs):
+        import pandas as pd
+        from Game_code import stock_data
+        with patch.object(stock_data.yf, 'Ticker') as ticker:
+            ticker.return_value.history.return_value = pd.DataFrame({'Close': []})
+            stock_data.get_data(['DELISTED'], 3)
+            stock_data.clear_stock_files()
+            stock_data.get_data(['DELISTED'], 3)
+            stock_data.get_data_chart('DELISTED')
+
+        assert ticker.call_count == 1
+        assert stock_data.read_prices('DELISTED') == ([], [])
+
+    def test_hidden_download_errors_are_failures(self, turn_dirs):
+        # Tests that a timeout is not mistaken for a window without data
+        from yfinance.exceptions import YFPricesMissingError
+        from Game_code import stock_data
+        from Game_code.fetch_guard import get_breaker, get_negative_cache
+        with patch.object(stock_data.yf, 'Ticker') as ticker:
+            ticker.return_value.history.side_effect = TimeoutError("read timed out")
+            stock_data.get_data(['AAPL'], 0)
+            assert ticker.return_value.history.call_args.kwargs['raise_errors'] is True
+            assert get_breaker('yahoo').failures == 1
+            assert not get_negative_cache().is_empty(stock_data.price_cache_key('AAPL', 0))
+
+            ticker.return_value.history.side_effect = YFPricesMissingError('DELISTED', '')
+            stock_data.get_data(['DELISTED'], 0)
+
+        assert get_breaker('yahoo').failures == 0
+        assert get_negative_cache().is_empty(stock_data.price_cache_key('DELISTED', 0))
+        assert stock_data.read_prices('DELISTED') == ([], [])
+
+
+# ============================================================================
+# TURN DEADLINE
+# ============================================================================
+
+class TestTurnDeadline:
+    """Stages past the turn's deadline degrade instead of waiting"""
+
+    def test_deadline_and_budget(self):
+        from Game_code.deadline import Deadline, turn_budget, DEFAULT_SECONDS
+        now = [0.0]
+        deadline = Deadline(2.0, clock=lambda: now[0])
+        assert deadline.remaining() == 2.0 and not deadline.expired()
+        now[0] = 2.5
+        assert deadline.remaining() == 0.0 and deadline.expired()
+        assert Deadline(None).remaining() is None and not Deadline(None).expired()
+
+        with patch.dict(os.environ, {'DEATHMONOPOLY_TURN_DEADLINE': '0.5'}):
+            assert turn_budget() == 0.5
+        with patch.dict(os.environ, {'DEATHMONOPOLY_TURN_DEADLINE': '0'}):
+            assert turn_budget() is None
+        with patch.dict(os.environ, {'DEATHMONOPOLY_TURN_DEADLINE': 'soon'}):
+            assert turn_budget() == DEFAULT_SECONDS
+
+    def test_out_of_time_prices_come_from_local_history(self, turn_dirs, tmp_path):
+        from Game_code import stock_data
+        from Game_code.deadline import Deadline
+        from Game_code.price_store import PriceStore
+        with open(tmp_path / 'AAPL.csv', 'w') as file:
+            file.write("Date,Close\n2014-12-31,1.0\n2015-01-02,10.0\n2015-01-05,12.0\n2015-03-02,99.0\n")
+        with patch.object(stock_data, 'PriceStore', lambda: PriceStore(str(tmp_path))), \
+                patch.object(stock_data.yf, 'Ticker') as ticker:
+            stock_data.get_data(['AAPL', 'GOOG'], 0, Deadline(0.0))
+
+        assert not ticker.called
+        assert stock_data.read_prices('AAPL') == (['2015-01-02', '2015-01-05'], [10.0, 12.0])
+        assert stock_data.read_prices('GOOG') == ([], [])
+
+    def test_timed_out_download_uses_local_history(self, turn_dirs, tmp_path):
+        # Tests that a download past the deadline falls back to local prices and is retried later
+        from Game_code import stock_data
+        from Game_code.deadline import Deadline
+        from Game_code.data_cache import get_cache
+        from Game_code.fetch_guard import get_negative_cache
+        from Game_code.price_store import PriceStore
+        with open(tmp_path / 'AAPL.csv', 'w') as file:
+            file.write("Date,Close\n2015-01-02,10.0\n2015-01-05,12.0\n")
+        key = stock_data.price_cache_key('AAPL', 0)
+        with patch.object(stock_data, 'PriceStore', lambda: PriceStore(str(tmp_path))), \
+                patch.object(stock_data.yf, 'Ticker') as ticker:
+            ticker.return_value.history.side_effect = TimeoutError("read timed out")
+            stock_data.get_data(['AAPL'], 0, Deadline(1.5))
+            assert stock_data.read_prices('AAPL') == (['2015-01-02', '2015-01-05'], [10.0, 12.0])
+            assert stock_data.get_price_change('AAPL') == 1.2
+            assert not get_negative_cache().is_empty(key)
+            assert get_cache().get('prices', key) is None
+
+            stock_data.get_data(['AAPL'], 0, Deadline(1.5))
+        assert ticker.return_value.history.call_count == 2
+
+    def test_download_gets_remaining_time(self, turn_dirs):
+        from Game_code import stock_data
+        from Game_code.deadline import Deadline
+        with patch.object(stock_data.yf, 'Ticker') as ticker:
+            stock_data.get_data(['AAPL'], 0, Deadline(1.5))
+        timeout = ticker.return_value.history.call_args.kwargs['timeout']
+        assert 0 < timeout <= 1.5
+
+    def test_late_npc_replies_arrive_later(self, qapp):
+        import threading
+        import time
+        release = threading.Event()
+
+        def ask(question, personality_name, indicators=None, turn=None):
+            if personality_name == 'GERALT':
+                release.wait(5)
+                return 'Late\nreply'
+            return f'{personality_name} here'
+
+        manager = NPCManager()
+        manager.create_npc_widgets(QWidget())
+        before = manager.get_dialogues()[3]
+        with patch('Game_code.npc_manager.ask_bot', side_effect=ask):
+            assert manager.update_dialogs_ai(player_balance=100, timeout=0.5) == 1
+            assert manager.get_dialogues()[0] == 'BORIS here'
+            assert manager.get_dialogues()[3] == before
+            release.set()
+            for _ in range(100):
+                qapp.processEvents()
+                if manager.pending == 0:
+                    break
+                time.sleep(0.01)
+        assert manager.get_dialogues()[3] == 'Late<br>reply'
+
+    def test_reply_to_an_older_request_is_dropped(self, qapp):
+        import threading
+        import time
+        release = threading.Event()
+        answers = iter(['old', 'new'])
+
+        def ask(question, personality_name, indicators=None, turn=None):
+            if personality_name != 'WARIO':
+                return 'ok'
+            answer = next(answers)
+            if answer == 'old':
+                release.wait(5)
+            return answer
+
+        manager = NPCManager()
+        with patch('Game_code.npc_manager.ask_bot', side_effect=ask):
+            manager.update_dialogs_ai(timeout=0.2)
+            manager.update_dialogs_ai(timeout=2)
+            release.set()
+            time.sleep(0.1)
+            qapp.processEvents()
+        assert manager.get_dialogues()[1] == 'new'
+
+    def test_late_npc_reply_is_saved(self, qapp, turn_dirs):
+        # Verifies the snapshot is written again when a late reply arrives after the turn's save
+        import threading
+        import time
+        from Game_code.game_page import GamePage
+        from Game_code.benchmark import FixtureTicker
+        from Game_code import savegame, stock_data
+        release = threading.Event()
+
+        def ask(question, personality_name, indicators=None, turn=None):
+            if personality_name == 'GERALT':
+                release.wait(5)
+                return 'Late\nreply'
+            return 'Hi'
+
+        page = GamePage(FakeMainWindow())
+        page.action_manager.selected_actions = ['AAPL', 'GOOG', 'MSFT', 'NVDA', 'AMZN', 'TSLA']
+        for widget in page.action_manager.action_widgets:
+            widget.increase_value()
+        with patch.object(stock_data.yf, 'Ticker', FixtureTicker), \
+                patch('Game_code.npc_manager.ask_bot', side_effect=ask), \
+                patch('Game_code.game_page.turn_budget', return_value=0.5), \
+                patch('Game_code.game_page.LoadingDialog'):
+            page.start_game()
+            assert savegame.load_snapshot()['npc_dialogues'][3] != 'Late<br>reply'
+            release.set()
+            for _ in range(100):
+                qapp.processEvents()
+                if page.npc_manager.pending == 0:
+                    break
+                time.sleep(0.01)
+        assert savegame.load_snapshot()['npc_dialogues'][3] == 'Late<br>reply'
+
+    def test_late_charts_are_sparklines_then_rendered(self, qapp, turn_dirs):
+        from Game_code.game_page import GamePage
+        from Game_code.benchmark import FixtureTicker
+        from Game_code import stock_data
+        page = GamePage(FakeMainWindow())
+        page.action_manager.selected_actions = ['AAPL', 'GOOG', 'MSFT', 'NVDA', 'AMZN', 'TSLA']
+        for widget in page.action_manager.action_widgets:
+            widget.increase_value()
+        with patch.object(stock_data.yf, 'Ticker', FixtureTicker), \
+                patch('Game_code.npc_manager.ask_bot', return_value='Hi'), \
+                patch('Game_code.game_page.LoadingDialog'):
+            page.start_game()
+
+            # Ta sama tura jeszcze raz, ale bez czasu na wykresy
+            with patch('Game_code.game_page.turn_budget', return_value=1e-9), \
+                    patch('Game_code.game_page.get_data_chart', wraps=stock_data.get_data_chart) as chart, \
+                    patch('Game_code.game_page.get_data'):
+                page.update_turn_display()
+                assert chart.call_count == 0
+                assert not page.action_manager.action_widgets[0].image_label.pixmap().isNull()
+                qapp.processEvents()
+                assert chart.call_count == 6
+
+
+# ============================================================================
+# SHARED HTTP SESSION
+# ============================================================================
+
+@pytest.fixture
+def keep_alive_server():
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpSession:
+    """One pooled session for every price request"""
+
+    def test_connections_are_reused(self, keep_alive_server):
+        from Game_code.http_session import PooledSession
+        session = PooledSession()
+        try:
+            for _ in range(4):
+                assert session.get(keep_alive_server).text == "ok"
+        finally:
+            session.close()
+        assert session.metrics.as_dict() == {
+            "requests": 4, "connections_opened": 1, "connections_reused": 3}
+
+    def test_session_is_supported_by_yfinance(self):
+        from yfinance.data import is_supported_session
+        from Game_code.http_session import get_session
+        assert is_supported_session(get_session())
+
+    def test_shared_across_calls_and_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from Game_code import http_session
+        first = http_session.get_session()
+        with ThreadPoolExecutor(4) as pool:
+            sessions = set(map(id, pool.map(lambda _: http_session.get_session(), range(8))))
+        assert sessions == {id(first)}
+        http_session.close_session()
+        assert http_session.get_session() is not first
+
+    def test_every_download_uses_the_shared_session(self, turn_dirs):
+        from Game_code import stock_data
+        from Game_code.http_session import get_session
+        with patch.object(stock_data.yf, 'Ticker') as ticker:
+            stock_data.get_data(['AAPL', 'GOOG'], 0)
+            stock_data.get_data(['AAPL', 'GOOG'], 1)
+        sessions = {call.kwargs['session'] for call in ticker.call_args_list}
+        assert sessions == {get_session()}
+
+
+# ============================================================================
+# OPENAI CLIENT FACTORY
+# ============================================================================
+
+@pytest.fixture
+def fake_openai_server():
+    # Local OpenAI-compatible endpoint; records the client port of every request
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    ports = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            ports.append(self.client_address[1])
+            request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            body = json.dumps({
+                "id": "resp_1", "object": "response", "created_at": 0, "model": request["model"],
+                "status": "completed", "parallel_tool_calls": False, "tool_choice": "auto", "tools": [],
+                "output": [{"type": "message", "id": "msg_1", "role": "assistant", "status": "completed",
+                            "content": [{"type": "output_text", "text": "Mamma mia", "annotations": []}]}],
+                "usage": {"input_tokens": 120, "input_tokens_details": {"cached_tokens": 96},
+                          "output_tokens": 10, "output_tokens_details": {"reasoning_tokens": 0},
+                          "total_tokens": 130},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1", ports
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fresh_ai_client():
+    from Game_code import AI
+    AI.reset_client()
+    yield AI
+    AI.reset_client()
+
+
+class TestOpenAIClient:
+    """Lazily created, shared and configurable OpenAI client"""
+
+    def test_settings_from_env(self):
+        from Game_code.AI import ClientSettings
+        env = {'OPENAI_BASE_URL': 'http://localhost:8080/v1', 'OPENAI_MODEL': 'local-llama',
+               'OPENAI_TIMEOUT': '7.5', 'OPENAI_MAX_RETRIES': '0', 'OPENAI_MAX_CONNECTIONS': '3',
+               'OPENAI_HTTP2': '1', 'OPENAI_CONCURRENCY': 'many'}
+        with patch.dict(os.environ, env):
+            settings = ClientSettings.from_env()
+        assert settings.base_url == 'http://localhost:8080/v1'
+        assert settings.model == 'local-llama'
+        assert settings.timeout == 7.5 and settings.max_retries == 0
+        assert settings.max_connections == 3 and settings.http2
+        assert settings.concurrency == 5
+
+    def test_client_created_lazily_and_shared(self, fresh_ai_client):
+        AI = fresh_ai_client
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key', 'OPENAI_TIMEOUT': '4', 'OPENAI_MAX_RETRIES': '1'}):
+            assert AI.client is None
+            first = AI.get_client()
+        assert AI.get_client() is first
+        assert first.max_retries == 1 and first.timeout == 4.0
+
+    def test_http2_without_h2_falls_back(self, fresh_ai_client):
+        AI = fresh_ai_client
+        with patch.object(AI, 'DefaultHttpxClient') as http_client:
+            http_client.side_effect = lambda **kwargs: (_ for _ in ()).throw(ImportError("h2")) \
+                if kwargs.get('http2') else Mock()
+            AI._http_client(AI.ClientSettings(http2=True, max_connections=4), http_client)
+        assert http_client.call_args.kwargs['limits'].max_connections == 4
+        assert 'http2' not in http_client.call_args.kwargs
+
+    def test_local_endpoint_over_one_connection(self, fresh_ai_client, fake_openai_server):
+        AI = fresh_ai_client
+        base_url, ports = fake_openai_server
+        with patch.dict(os.environ, {'OPENAI_BASE_URL': base_url, 'OPENAI_API_KEY': 'local', 'OPENAI_TIMEOUT': '5'}), \
+                patch('os.listdir', return_value=[]):
+            answers = [AI.ask_bot("Hi", "WARIO") for _ in range(3)]
+        assert answers == ["Mamma mia"] * 3
+        assert len(ports) == 3 and len(set(ports)) == 1
+
+    def test_async_path_shares_settings(self, fresh_ai_client, fake_openai_server):
+        import asyncio
+        AI = fresh_ai_client
+        base_url, ports = fake_openai_server
+
+        async def ask_all():
+            return await asyncio.gather(*(AI.ask_bot_async("Hi", name) for name in AI.personalities))
+
+        with patch.dict(os.environ, {'OPENAI_BASE_URL': base_url, 'OPENAI_API_KEY': 'local', 'OPENAI_TIMEOUT': '5'}), \
+                patch('os.listdir', return_value=[]):
+            answers = asyncio.run(ask_all())
+        assert answers == ["Mamma mia"] * len(AI.personalities)
+
+    def test_reset_closes_both_clients(self, fresh_ai_client):
+        # Verifies the async connection pool is closed too, with or without a running loop
+        import asyncio
+        AI = fresh_ai_client
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            sync_client, async_client = AI.get_client(), AI.get_async_client()
+            AI.reset_client()
+            assert sync_client.is_closed() and async_client.is_closed()
+
+            async def reset_inside_loop():
+                inner = AI.get_async_client()
+                AI.reset_client()
+                await asyncio.sleep(0)
+                return inner
+
+            assert asyncio.run(reset_inside_loop()).is_closed()
+
+    def test_concurrency_limit(self, fresh_ai_client):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        AI = fresh_ai_client
+        in_flight, peak = [0], [0]
+        lock = threading.Lock()
+
+        def create(**kwargs):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            return Mock(output_text="ok")
+
+        with patch.dict(os.environ, {'OPENAI_CONCURRENCY': '2'}), \
+                patch.object(AI, 'client', Mock()), patch('os.listdir', return_value=[]):
+            AI.client.responses.create.side_effect = create
+            with ThreadPoolExecutor(5) as pool:
+                list(pool.map(lambda name: AI.ask_bot("Hi", name), AI.personalities))
+        assert peak[0] == 2
+
+
+# ============================================================================
+# SHARED PROMPT PREFIX AND TOKEN ACCOUNTING
+# ============================================================================
+
+class TestPromptPrefix:
+    """Persona prompts share one byte-identical prefix; tokens are counted per turn"""
+
+    def test_every_persona_starts_with_shared_instructions(self):
+        from Game_code.AI import SHARED_INSTRUCTIONS
+        for personality in personalities.values():
+            assert personality['system_message'] == SHARED_INSTRUCTIONS + personality['description']
+            assert SHARED_INSTRUCTIONS not in personality['description']
+
+    def test_requests_differ_only_after_prefix(self):
+        from Game_code.AI import SHARED_INSTRUCTIONS
+        mock_client = Mock()
+        mock_client.responses.create.return_value = Mock(output_text="ok", usage=None)
+        with patch('Game_code.AI.client', mock_client), patch('os.listdir', return_value=[]):
+            for name in personalities:
+                ask_bot("Question", name)
+        sent = [call.kwargs['input'] for call in mock_client.responses.create.call_args_list]
+        assert all(messages[0]['content'].startswith(SHARED_INSTRUCTIONS) for messages in sent)
+        assert len({messages[1]['content'] for messages in sent}) == 1
+        assert len({messages[0]['content'] for messages in sent}) == len(personalities)
+
+    def test_meter_sums_usage_per_turn(self):
+        from Game_code.AI import TokenMeter
+        meter = TokenMeter(turns_kept=2)
+        usage = Mock(input_tokens=100, output_tokens=20, input_tokens_details=Mock(cached_tokens=64))
+        meter.record(1, usage)
+        meter.record(1, usage)
+        meter.record(2, None)
+        assert meter.turn_usage(1) == {"calls": 2, "input_tokens": 200, "cached_tokens": 128, "output_tokens": 40}
+        assert meter.turn_usage(2)["calls"] == 1 and meter.turn_usage(2)["input_tokens"] == 0
+        meter.record(3, usage)
+        assert list(meter.turns()) == [2, 3]
+
+    def test_ask_bot_records_tokens_of_the_turn(self, fresh_ai_client, fake_openai_server):
+        AI = fresh_ai_client
+        base_url, _ = fake_openai_server
+        with patch.dict(os.environ, {'OPENAI_BASE_URL': base_url, 'OPENAI_API_KEY': 'local', 'OPENAI_TIMEOUT': '5'}), \
+                patch('os.listdir', return_value=[]), patch.object(AI, 'token_meter', AI.TokenMeter()):
+            for name in ("BORIS", "WARIO"):
+                AI.ask_bot("Hi", name, turn=7)
+            assert AI.token_meter.turn_usage(7) == {"calls": 2, "input_tokens": 240,
+                                                    "cached_tokens": 192, "output_tokens": 20}
+
+    def test_npc_manager_passes_turn(self, qapp):
+        from Game_code.npc_manager import NPCManager
+        with patch('Game_code.npc_manager.ask_bot', return_value="Hi") as ask:
+            manager = NPCManager()
+            manager.update_dialogs_ai(player_balance=100, timeout=5, turn=4)
+        assert {call.kwargs['turn'] for call in ask.call_args_list} == {4}
+
+
+# ============================================================================
+# HOT-SEAT MULTIPLAYER
+# ============================================================================
+
+class TestHotSeat:
+    """Several players at one screen, evaluated together every turn"""
+
+    def test_roster_revalue_matches_ledger_rule(self):
+        # Verifies the matrix revaluation rounds exactly like revalue_cents
+        import numpy as np
+        from Game_code.hot_seat import Roster
+        from Game_code.game_rules import revalue_cents
+        roster = Roster(slots=3)
+        rng = np.random.default_rng(7)
+        picks = [['AAPL', 'GOOG', None], ['GOOG', 'TSLA', 'AAPL'], ['EA', 'AAPL', 'MSFT']]
+        for index, selected in enumerate(picks):
+            roster.add({'name': f'P{index}'}, 1000)
+            roster.selected[index] = selected
+            roster.positions[index] = rng.integers(1, 10 ** 7, 3)
+        before = roster.positions.copy()
+        multipliers = {'AAPL': 1.0371, 'GOOG': 0.955, 'TSLA': 1.5, 'EA': 0.5}
+
+        after = roster.revalue(multipliers)
+
+        for index, selected in enumerate(picks):
+            for slot, ticker in enumerate(selected):
+                expected = revalue_cents(int(before[index, slot]), multipliers.get(ticker, 1.0))
+                assert after[index, slot] == expected
+        assert roster.tickers() == ['AAPL', 'GOOG', 'TSLA', 'EA', 'MSFT']
+        assert roster.net_worth().tolist() == [1000 + int(row.sum()) for row in after]
+
+    def test_ledger_revalue_all_emits_once(self, qapp):
+        from Game_code.ledger import Ledger
+        ledger = Ledger(500)
+        for _ in range(3):
+            ledger.buy(ledger.open_position(), 100)
+        changes = []
+        ledger.changed.connect(lambda: changes.append(1))
+
+        ledger.revalue_all([150, 100, 50])
+
+        assert changes == [1]
+        assert ledger.positions == [150, 100, 50] and ledger.cost_cents == [100, 100, 100]
+        assert ledger.invested_cents == 300
+        assert [t.kind for t in ledger.transactions[-3:]] == ['revalue'] * 3
+
+    def two_player_page(self):
+        from Game_code.game_page import GamePage
+        page = GamePage(FakeMainWindow())
+        page.action_manager.selected_actions = ['AAPL', 'GOOG', 'MSFT', 'NVDA', 'AMZN', 'TSLA']
+        for widget in page.action_manager.action_widgets:
+            widget.increase_value()
+        page.add_player()
+        page.action_manager.selected_actions = ['AAPL', 'META', 'CSCO', 'PEP', 'NFLX', 'EA']
+        for widget in page.action_manager.action_widgets:
+            widget.increase_value()
+            widget.increase_value()
+        return page
+
+    def test_add_and_switch_players(self, qapp):
+        page = self.two_player_page()
+        assert len(page.roster) == 2 and page.roster.active == 1
+        assert page.player_manager.get_player_data()['name'] == 'Player 2'
+        assert page.btn_next_player.text() == 'P2/2'
+
+        page.next_player()
+
+        assert page.roster.active == 0
+        assert page.action_manager.get_selected_actions()[1] == 'GOOG'
+        assert page.player_manager.ledger.positions == [10000] * 6
+        assert page.player_manager.get_player_data()['name'] == 'Waldemar'
+        assert page.roster.positions[1].tolist() == [20000] * 6
+
+    def test_start_shows_unready_player(self, qapp):
+        page = self.two_player_page()
+        page.roster.active, page.action_manager.selected_actions[0] = 1, None
+        page.next_player()
+
+        page.start_game()
+
+        assert not page.game_started
+        assert page.roster.active == 1
+        assert 'select all 6' in page.dialogText.text()
+
+    def test_turn_fetches_once_for_all_players(self, qapp, turn_dirs):
+        from Game_code.benchmark import FixtureTicker
+        from Game_code import stock_data
+        page = self.two_player_page()
+        with patch.object(stock_data.yf, 'Ticker', FixtureTicker), \
+                patch('Game_code.game_page.get_data', wraps=stock_data.get_data) as get_data, \
+                patch('Game_code.npc_manager.ask_bot', return_value='Hi') as ask, \
+                patch('Game_code.game_page.LoadingDialog'):
+            page.start_game()
+            page.continue_game()
+
+        assert get_data.call_count == 2
+        assert len(get_data.call_args.args[0]) == 11
+        assert ask.call_count == 2 * len(page.npc_manager.npc_data_list)
+        multipliers = {ticker: stock_data.get_price_change(ticker) for ticker in page.roster.tickers()}
+        assert multipliers['EA'] != 1.0
+        # Aktywny gracz na ekranie i w roster ma te same wartości; obaj mają historię tur
+        assert page.player_manager.ledger.positions == page.roster.positions[page.roster.active].tolist()
+        assert page.roster.positions[0].tolist() != [10000] * 6
+        assert [len(history) for history in page.roster.histories] == [3, 3]
+
+    def test_resume_keeps_every_player(self, qapp, turn_dirs):
+        from Game_code.benchmark import FixtureTicker
+        from Game_code.game_page import GamePage
+        from Game_code import stock_data
+        page = self.two_player_page()
+        with patch.object(stock_data.yf, 'Ticker', FixtureTicker), \
+                patch('Game_code.npc_manager.ask_bot', return_value='Hi'), \
+                patch('Game_code.game_page.LoadingDialog'):
+            page.start_game()
+
+        resumed = GamePage(FakeMainWindow())
+        with patch.object(stock_data.yf, 'Ticker', side_effect=AssertionError('no download')):
+            assert resumed.resume_game()
+
+        assert len(resumed.roster) == 2 and resumed.roster.active == page.roster.active
+        assert resumed.roster.positions.tolist() == page.roster.positions.tolist()
+        assert resumed.roster.selected == page.roster.selected
+        resumed.next_player()
+        assert resumed.player_manager.get_player_data()['name'] == 'Waldemar'
+        assert resumed.start_balance == 2400
+
+        resumed.reset_game()
+        assert len(resumed.roster) == 1
+        assert not resumed.btn_next_player.isVisible()
+
+    def test_game_over_ranks_players(self, qapp):
+        from PySide6.QtWidgets import QDialog
+        from Game_code.game_over_dialog import GameOverDialog
+        page = self.two_player_page()
+        page.roster.cash[:] = [0, 0]
+        with patch('Game_code.game_page.GameOverDialog') as dialog:
+            dialog.return_value.exec.return_value = QDialog.DialogCode.Accepted
+            page.game_over()
+
+        name, _, _, standings = dialog.call_args.args[1:]
+        assert name == 'Player 2'
+        assert [row[0] for row in standings] == ['Player 2', 'Waldemar']
+        assert '1. Player 2' in GameOverDialog.standings_text(standings)
+
+    def test_what_if_runs_in_background_for_every_player(self, qapp):
+        # Tests that the evaluation starts with the game and fills in the open game over window
+        import threading
+        from Game_code.game_over_dialog import GameOverDialog, WHAT_IF_PENDING
+        page = self.two_player_page()
+        release = threading.Event()
+
+        def slow_evaluate(store, picks, amounts, balance, max_turns):
+            release.wait(5)
+            return {'best_balance': balance + 100, 'best_tickers': picks[:2],
+                    'percentile': 40.0 if picks[1] == 'GOOG' else 80.0, 'regret': 100}
+
+        with patch('Game_code.what_if_runner.PriceStore'), \
+                patch('Game_code.what_if_runner.evaluate_player', side_effect=slow_evaluate):
+            page.sync_active_player()
+            page.roster.open()
+            page.start_what_if()
+            assert page.what_if_for(0) == WHAT_IF_PENDING and page.what_if_for(1) == WHAT_IF_PENDING
+
+            page.game_over_dialog = GameOverDialog(page, 'Player 2', 2400, page.what_if_for(1),
+                                                   page.game_over_standings())
+            assert 'Comparing' in page.game_over_dialog.text.text()
+
+            release.set()
+            page.what_if_runner._executor.shutdown(wait=True)
+            qapp.processEvents()
+
+        text = page.game_over_dialog.text.text()
+        assert 'Comparing' not in text
+        assert '(beat 40%)' in text and '(beat 80%)' in text
+        assert page.what_if_for(1)['percentile'] == 80.0
+
+        page.reset_game()
+        assert page.what_if_for(0) is None
+
+
+# ============================================================================
+
+
+class TestGameServer:
+    """Test the headless game server and the load-test client"""
+
+    TICKERS = ['AAPL', 'GOOG', 'MSFT', 'NVDA', 'AMZN', 'TSLA']
+
+    def test_shared_results_produce_once(self):
+        # Verifies concurrent callers share one task and failed results are not kept
+        import asyncio
+        from Game_code.server import SharedResults
+        calls = []
+
+        async def produce():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'chart'
+
+        async def fail():
+            raise OSError('offline')
+
+        async def scenario():
+            shared = SharedResults(2)
+            results = await asyncio.gather(*(shared.get('AAPL', produce) for _ in range(5)))
+            assert await shared.get('AAPL', produce) == 'chart'
+            for _ in range(2):
+                with pytest.raises(OSError):
+                    await shared.get('MSFT', fail)
+            return results, shared.stats()
+
+        results, stats = asyncio.run(scenario())
+        assert results == ['chart'] * 5 and len(calls) == 1
+        assert stats == {'entries': 1, 'hits': 1, 'shared': 4, 'misses': 3}
+
+    def test_session_checks_portfolio(self):
+        from Game_code.server import GameSession
+        options = self.TICKERS + ['EA']
+        with pytest.raises(ValueError):
+            GameSession('s', 'Ala', 7)
+        session = GameSession('s', 'Ala', 1)
+        with pytest.raises(ValueError):
+            session.pick(['AAPL'] * 6, [100] * 6, options)
+        with pytest.raises(ValueError):
+            session.pick(options[:5] + ['XYZ'], [100] * 6, options)
+        with pytest.raises(ValueError):
+            session.pick(options[:6], [session.balance] * 6, options)
+
+        session.pick([ticker.lower() for ticker in options[:6]], [100] * 6, options)
+        assert session.tickers == options[:6]
+        assert session.state()['cash'] == session.balance - 600
+        session.turn = 0
+        session.apply_turn({'AAPL': 1.5})
+        assert session.state()['net_worth'] == session.balance + 50
+        with pytest.raises(ValueError):
+            session.pick(options[:6], [100] * 6, options)
+
+    @staticmethod
+    def run_with_server(scenario, ai=False, options=None):
+        import asyncio
+        from Game_code.benchmark import FixtureTicker
+        from Game_code.server import GameServer
+        from Game_code import stock_data
+
+        async def main():
+            server = GameServer(ai=ai)
+            server.options = options or server.options
+            try:
+                async with server.serve('127.0.0.1', 0) as websocket_server:
+                    port = websocket_server.sockets[0].getsockname()[1]
+                    return server, await scenario(server, port)
+            finally:
+                server.close()
+
+        with patch.object(stock_data.yf, 'Ticker', FixtureTicker):
+            return asyncio.run(main())
+
+    @staticmethod
+    def http_get(port, path):
+        import urllib.request
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=10) as response:
+            return response.headers['Content-Type'], response.read()
+
+    def test_load_test_shares_prices(self):
+        # Verifies every session finishes and each (ticker, turn) window is fetched once
+        import asyncio
+        import json
+        from Game_code import loadtest
+
+        async def scenario(server, port):
+            report = await loadtest.run(f'ws://127.0.0.1:{port}/ws', 6)
+            health = await asyncio.to_thread(self.http_get, port, '/health')
+            chart = await asyncio.to_thread(self.http_get, port, '/charts/aapl/1.png')
+            stats = await asyncio.to_thread(self.http_get, port, '/stats')
+            return report, health, chart, stats
+
+        server, (report, health, chart, stats) = self.run_with_server(scenario, options=self.TICKERS)
+        assert report['completed'] == 6 and report['failed'] == 0
+        assert report['turns'] == 6 * (server.max_turns + 1)
+        # Wszyscy mają te same akcje: jedno pobranie na akcję i turę
+        assert report['prices']['misses'] == 6 * (server.max_turns + 1)
+        assert report['turn_ms']['p50'] <= report['turn_ms']['p99']
+        assert health[1] == b'ok\n'
+        assert chart[0] == 'image/png' and chart[1].startswith(b'\x89PNG')
+        assert json.loads(stats[1])['charts']['misses'] == 1
+        assert server.sessions == {}
+
+    def test_websocket_errors_and_npc_replies(self):
+        # Verifies errors echo the id and sessions with the same stocks share the NPC replies
+        import asyncio
+        import json
+        from unittest.mock import AsyncMock
+        from websockets.asyncio.client import connect
+        from Game_code.loadtest import call
+        from Game_code import AI
+        tickers = self.TICKERS
+
+        async def scenario(server, port):
+            url = f'ws://127.0.0.1:{port}/ws'
+            async with connect(url) as first, connect(url) as second:
+                await first.send(json.dumps({'op': 'next', 'session': 'nope', 'id': 7}))
+                assert json.loads(await first.recv()) == {'error': 'Unknown session', 'id': 7}
+                replies = []
+                for websocket in (first, second):
+                    created, _ = await call(websocket, {'op': 'new', 'name': 'Ala'})
+                    with pytest.raises(RuntimeError):
+                        await call(websocket, {'op': 'npc', 'session': created['session']})
+                    await call(websocket, {'op': 'start', 'session': created['session'],
+                                           'tickers': tickers[::-1], 'amounts': [100] * 6})
+                    replies.append((await call(websocket, {'op': 'npc', 'session': created['session']}))[0])
+                state = await asyncio.to_thread(self.http_get, port, f"/sessions/{created['session']}")
+                stats = await asyncio.to_thread(self.http_get, port, '/stats')
+            return replies, json.loads(state[1]), json.loads(stats[1])
+
+        with patch.object(AI, 'ask_bot_async', new=AsyncMock(return_value='Mamma mia')) as ask:
+            _, (replies, state, stats) = self.run_with_server(scenario, ai=True, options=tickers)
+
+        personas = len(AI.personalities)
+        assert ask.await_count == personas
+        assert replies[0] == replies[1] == {'turn': 0, 'replies': dict.fromkeys(AI.personalities, 'Mamma mia'), 'id': None}
+        assert stats['replies'] == {'entries': personas, 'hits': personas, 'shared': 0, 'misses': personas}
+        assert state['turn'] == 0 and state['tickers'] == tickers[::-1]
+
+    def test_charts_and_sessions_are_limited(self):
+        # Verifies charts outside the game are a 404 without a download and new sessions are capped
+        import asyncio
+        import urllib.error
+        from websockets.asyncio.client import connect
+        from Game_code.loadtest import call
+
+        async def scenario(server, port):
+            server.max_sessions = 1
+            codes = []
+            for path in ('/charts/EA/0.png', f'/charts/AAPL/{server.max_turns + 1}.png', '/charts/AAPL/' + '9' * 5000 + '.png'):
+                try:
+                    await asyncio.to_thread(self.http_get, port, path)
+                except urllib.error.HTTPError as e:
+                    codes.append(e.code)
+            async with connect(f'ws://127.0.0.1:{port}/ws') as websocket:
+                await call(websocket, {'op': 'new', 'name': 'Ala'})
+                with pytest.raises(RuntimeError):
+                    await call(websocket, {'op': 'new', 'name': 'Ola'})
+            return codes
+
+        server, codes = self.run_with_server(scenario, options=self.TICKERS)
+        assert codes == [404, 404, 404]
+        assert server.prices.stats()['misses'] == 0
+        assert len(server.sessions) == 1
+
+    def test_server_cli_parses_options(self):
+        from Game_code import loadtest, server
+        args = server.build_parser().parse_args(['--port', '9000', '--no-ai', '--max-turns', '5', '--max-sessions', '40'])
+        assert (args.port, args.no_ai, args.max_turns, args.max_sessions) == (9000, True, 5, 40)
+        assert loadtest.stats_url('ws://10.0.0.2:9000/ws') == 'http://10.0.0.2:9000/stats'
+        assert loadtest.main(['--url', 'ws://127.0.0.1:9/ws', '--sessions', '1']) == 1
+
+
+# ============================================================================
+
+
+class TestLeaderboard:
+    """Test the SQLite leaderboard and its view"""
+
+    TICKERS = ['AAPL', 'GOOG', 'MSFT', 'NVDA', 'AMZN', 'TSLA']
+
+    def test_pages_follow_score_order(self):
+        # Verifies keyset pages give the same order as one sorted query, ties included
+        from Game_code.leaderboard import get_leaderboard
+        scores = get_leaderboard()
+        games = [(f'P{i}', 1 + i % 2, (i * 7919) % 50 * 100, self.TICKERS, 4, 30.0) for i in range(200)]
+        assert scores.record_many(games)
+        game_id = scores.record('Ala', 1, 999999, self.TICKERS, 4, 61.5)
+
+        first = scores.page(1, 3)
+        assert [row.id for row in first][0] == game_id
+        assert first[0].tickers == self.TICKERS and first[0].name == 'Ala'
+        seen, after = [], None
+        while True:
+            page = scores.page(1, 7, after=after)
+            if not page:
+                break
+            seen += page
+            after = page[-1]
+        assert len(seen) == 101 and len({row.id for row in seen}) == 101
+        assert [(row.score_cents, row.id) for row in seen] == sorted(
+            ((row.score_cents, row.id) for row in seen), key=lambda key: (-key[0], key[1]))
+        assert {row.difficulty for row in seen} == {1}
+
+    def test_top_queries_read_the_index(self):
+        # Verifies a page is a range scan of (difficulty, score) with no sort, at any depth
+        from Game_code.leaderboard import get_leaderboard
+        scores = get_leaderboard()
+        scores.record_many((f'P{i}', 1 + i % 3, i * 37 % 100000, self.TICKERS, 4, 1.0) for i in range(20000))
+        deep = scores.page(2, 10, after=scores.page(2, 5000)[-1])
+        for plan in (scores.query_plan(2), scores.query_plan(2, after=deep[-1])):
+            assert 'USING INDEX games_by_difficulty_score' in plan
+            assert 'TEMP B-TREE' not in plan
+
+    def test_unwritable_database_warns(self, capsys):
+        from Game_code.leaderboard import Leaderboard
+        scores = Leaderboard(tempfile.mkdtemp())
+        assert scores.record('Ala', 1, 100, self.TICKERS, 4, 1.0) is None
+        assert scores.page(1) == []
+        assert 'Could not record the game' in capsys.readouterr().out
+
+    def test_game_over_records_every_player(self, qapp):
+        from PySide6.QtWidgets import QDialog
+        from Game_code.game_page import GamePage
+        from Game_code.leaderboard import get_leaderboard
+        page = GamePage(FakeMainWindow(difficulty=2))
+        page.action_manager.selected_actions = list(self.TICKERS)
+        for widget in page.action_manager.action_widgets:
+            widget.increase_value()
+        page.add_player()
+        page.action_manager.selected_actions = self.TICKERS[::-1]
+        page.player_manager.ledger.set_cash(page.player_manager.ledger.cash_cents + 500000)
+        import time
+        page.started_at = time.monotonic() - 90
+        page.turn_counter = page.max_turns
+        with patch('Game_code.game_page.GameOverDialog') as dialog:
+            dialog.return_value.exec.return_value = QDialog.DialogCode.Accepted
+            page.game_over()
+
+        rows = get_leaderboard().page(2)
+        assert [row.name for row in rows] == ['Player 2', 'Waldemar']
+        assert rows[0].score_cents == page.roster.standings()[0][2]
+        assert rows[0].tickers == self.TICKERS[::-1] and rows[1].tickers == self.TICKERS
+        assert rows[0].turns == page.max_turns + 1 and rows[0].duration_seconds >= 90
+        assert get_leaderboard().page(1) == []
+        assert page.snapshot()['elapsed_seconds'] >= 90
+
+    def test_dialog_pages_through_results(self, qapp):
+        from Game_code.leaderboard import get_leaderboard, PAGE_SIZE
+        from Game_code.leaderboard_dialog import LeaderboardDialog
+        scores = get_leaderboard()
+        scores.record_many((f'P{i}', 1, i * 100, self.TICKERS, 4, 75.0) for i in range(2 * PAGE_SIZE + 3))
+        scores.record('<b>Ala</b>', 3, 100, self.TICKERS, 4, 5.0)
+        dialog = LeaderboardDialog(None, scores, 1)
+
+        assert not dialog.btn_prev.isEnabled() and dialog.btn_next.isEnabled()
+        dialog.next_page()
+        dialog.next_page()
+        assert dialog.page_label.text() == 'Page 3' and len(dialog.rows) == 3
+        assert not dialog.btn_next.isEnabled()
+        assert f'>{2 * PAGE_SIZE + 1}</td>' in dialog.table.text() and '1:15' in dialog.table.text()
+        dialog.prev_page()
+        assert dialog.rows[0].name == f'P{PAGE_SIZE + 2}'
+
+        dialog.difficulty_group.button(3).click()
+        assert dialog.page_label.text() == 'Page 1'
+        assert '&lt;b&gt;Ala' in dialog.table.text()
+        dialog.show_difficulty(2)
+        assert 'No finished games' in dialog.table.text()
+
+
 # ============================================================================
 # Run tests
 # ============================================================================
@@ -37,6 +37,26 @@ def qapp():
     app.quit()
 
 
+@pytest.fixture(autouse=True)
+def isolated_user_data():
+    # Every test gets empty caches, fresh fetch guards and its own save file and leaderboard instead of the
+    # user's ones; the turn deadline is off so the pipeline does not depend on the machine's speed
+    from Game_code import data_cache, indicators, fetch_guard, leaderboard
+    cache_dir = tempfile.mkdtemp()
+    save_file = os.path.join(cache_dir, 'savegame.json')
+    scores = leaderboard.Leaderboard(os.path.join(cache_dir, 'leaderboard.sqlite3'))
+    with patch.object(data_cache, '_cache', data_cache.DataCache(cache_dir)), \
+            patch.object(indicators, '_engine', indicators.IndicatorEngine()), \
+            patch.object(fetch_guard, '_negative', fetch_guard.NegativeCache()), \
+            patch.object(fetch_guard, '_breakers', {}), \
+            patch.object(leaderboard, '_leaderboard', scores), \
+            patch.dict(os.environ, {'DEATHMONOPOLY_SAVE': save_file, 'DEATHMONOPOLY_TURN_DEADLINE': '0'}):
+        yield
+    scores.close()
+    import shutil
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
 @pytest.fixture
 def qtbot(qapp):
     from pytestqt.qtbot import QtBot
@@ -1146,11 +1166,10 @@ class TestStockDataGeneration:
         get_data(["AAPL"], 0)
         assert mock_ticker.called
 
-    @patch('matplotlib.pyplot.savefig')
-    @patch('matplotlib.pyplot.plot')
+    @patch('matplotlib.figure.Figure.savefig')
     @patch('builtins.open', new_callable=mock_open, read_data='Date,Close\n2024-01-01,100\n2024-01-02,105\n')
     @patch('os.path.exists', return_value=True)
-    def test_get_data_chart_creates_chart(self, mock_exists, mock_file, mock_plot, mock_savefig):
+    def test_get_data_chart_creates_chart(self, mock_exists, mock_file, mock_savefig):
         # Verifies that get_data_chart() creates and saves a chart image
         get_data_chart("AAPL")
         assert mock_savefig.called
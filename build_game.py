@@ -62,6 +62,7 @@ cmd = [
     '--distpath=.',
     f'--add-data=images{separator}images',
     f'--add-data=sounds{separator}sounds',
+    f'--add-data=Game_code/universe.csv{separator}Game_code',
     '--hidden-import=PySide6',
     '--hidden-import=openai',
     '--hidden-import=pandas',